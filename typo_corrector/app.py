@@ -1,51 +1,70 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, Response, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
+from typing import List
+from omegaconf import OmegaConf
+import asyncio
+from collections import deque
+import time
 import json
+import hmac
 import os
-from utils.embedding_manager import FastEmbeddingManager
-from utils.correction_utils import find_best_correction
+import signal
+from utils.correction_utils import find_best_correction, needs_candidate_search
+from utils.text_utils import split_sentences, join_sentences, restore_punctuation
+from utils.generation_utils import generate_predictions, DEFAULT_GENERATION_KWARGS
+from utils.batch_manager import DynamicBatcher, Lane, QueueFullError, QueueTimeoutError
+from utils.deadline import Deadline, DeadlineExceededError
+from utils.model_loader import load_bundle, source_fingerprint, StartupStatus
+from utils.hot_reload import BundleReloader
+from utils.incremental_session import IncrementalSession
+from utils.single_flight import SingleFlight
+from utils.semantic_cache import SemanticCache
+from utils.generation_budget import GenerationBudgetController, GENERATION_PROFILES, PROFILE_ORDER
+from utils.metrics import REGISTRY, REQUESTS, GENERATION_PROFILE, CANDIDATE_SOURCE, MODEL_VERSION, stage_timer
+from utils.cache_manager import CorrectionCache, make_cache_key, create_cache_backend
 
 app = FastAPI()
 
-# 모델과 토크나이저 로드
-model_path = "./models"
-model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
-tokenizer = AutoTokenizer.from_pretrained(model_path)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
-model.eval()
-
-# 후보군 데이터 로드
-candidate_file = "./data/datasets/dataset_candidate.json"
-with open(candidate_file, 'r') as f:
-    json_dataset = json.load(f)
-candidates = [data['annotation']['cor_sentence'] for data in json_dataset['data']]
-
-# 임베딩 관리자 초기화
-embedding_model = "BAAI/bge-m3"
-precomputed_dir = "./embeddings"
-embedding_manager = None
-
-try:
-    embedding_manager = FastEmbeddingManager(model_name=embedding_model, precomputed_dir=precomputed_dir)
-    print(f"Embedding manager initialized with model: {embedding_model}")
-
-    # 후보 문장 설정
-    if not hasattr(embedding_manager, 'candidates') or embedding_manager.candidates is None:
-        print("Setting candidates for embedding manager...")
-        embedding_manager.candidates = candidates
-
-    # 임베딩 미리 계산 (없는 경우)
-    if precomputed_dir and not os.path.exists(os.path.join(precomputed_dir, 'embeddings.npy')):
-        print("Precomputing embeddings...")
-        os.makedirs(precomputed_dir, exist_ok=True)
-        embedding_manager.precompute_embeddings(candidates, output_dir=precomputed_dir)
-
-except Exception as e:
-    print(f"Error initializing embedding manager: {e}")
-    print("Falling back to basic methods.")
+# 서빙 설정 로드
+config_file = os.environ.get("APP_CONFIG_FILE", "./config/app-config.yaml")
+config = OmegaConf.load(config_file)
+
+# 서빙 구성 요소 묶음 (모델, 토크나이저, 후보 문장 및 색인, 조회 테이블, 임베딩 관리자)
+# 서버 시작 후 백그라운드에서 병렬로 로드되며, 로드와 예열이 끝나야 준비 상태가 됨
+bundle = None
+startup_status = StartupStatus()
+initialize_task = None
+
+# serve.py의 pre-fork 워커로 실행될 때 마스터 pid와 예열 완료 알림 함수 (serve.py가 설정)
+# 워커별로 재로드하면 copy-on-write 공유가 깨지므로, 재로드는 마스터에 요청하여 워커를 다시 fork
+prefork_master_pid = None
+on_ready = None
+
+# 교정 결과 캐시 초기화 (키: 정규화 문장 + 생성 파라미터 + 모델/후보 색인 지문)
+cache_params = {
+    "generation": DEFAULT_GENERATION_KWARGS,
+    "max_input_length": config.max_input_length,
+    "top_k": config.top_k,
+    "length_tolerance": config.length_tolerance,
+}
+correction_cache = None
+if config.cache_enabled:
+    correction_cache = CorrectionCache(
+        max_size=config.cache_max_size,
+        ttl_seconds=config.cache_ttl_seconds,
+        backend=create_cache_backend(config.cache_backend, path=config.cache_backend_path,
+                                     url=config.cache_redis_url, ttl_seconds=config.cache_ttl_seconds)
+    )
+
+# 끝 문장부호, 띄어쓰기, 자모 하나 정도만 다른 입력의 교정 결과를 재사용하는 의미 기반 근사 캐시
+semantic_cache = None
+if config.semantic_cache_enabled:
+    semantic_cache = SemanticCache(max_size=config.semantic_cache_max_size,
+                                   similarity_threshold=config.semantic_cache_similarity,
+                                   max_jamo_distance=config.semantic_cache_max_jamo_distance)
 
 
 # 입력 데이터 모델 정의
@@ -53,85 +72,992 @@ class TextInput(BaseModel):
     text: str
 
 
+class BatchTextInput(BaseModel):
+    texts: List[str]
+
+
+def build_response(current, text, predictions, profile="full", deadline=None, similar_candidates=None):
+    """
+    모델 예측 결과로부터 응답 본문 구성
+
+    Args:
+        current (CorrectorBundle): 구성 요소 묶음
+        text (str): 입력 문장
+        predictions (list): 모델의 n-best 예측 문장 리스트
+        profile (str): 예측 생성에 사용한 생성 프로파일 (기본값: "full")
+        deadline (Deadline): 마감 시각 (만료되면 그때까지 점수를 매긴 후보 중에서 선택)
+        similar_candidates (list): 미리 검색한 유사 후보 리스트 (기본값: None, 필요하면 문장별로 검색)
+
+    Returns:
+        dict: 응답 본문
+    """
+    raw_prd_sentence = predictions[0] if predictions else text
+
+    embedding_manager = current.embedding_manager
+
+    # 임베딩 기반 최종 예측 문장 선택
+    if embedding_manager:
+        # 최종 교정 텍스트는 사용하지 않고, 후보 목록만 가져옴
+        _, top_candidates = find_best_correction(
+            text,
+            predictions,
+            embedding_manager,
+            correct_label=None,  # API에서는 정답 레이블 없음
+            top_k=config.top_k,
+            length_tolerance=config.length_tolerance,
+            candidate_index=current.candidate_index,
+            deadline=deadline,
+            similar_candidates=similar_candidates
+        )
+
+        # 상위 후보 정보 구성 (첫 예측이 정답 문장 색인에 있으면 검색 없이 채택하므로 점수와 임베딩 유사도는 None)
+        source = "retrieval" if needs_candidate_search(predictions, current.candidate_index) else "candidate_index"
+        if top_candidates:
+            CANDIDATE_SOURCE.inc(source=source)
+        top_candidates_info = []
+        for cand_info in top_candidates[:3]:
+            top_candidates_info.append({
+                "text": cand_info[0],
+                "length_diff": cand_info[1],
+                "edit_distance": cand_info[2],
+                "score": cand_info[3],
+                "char_similarity": cand_info[4],
+                "semantic_similarity": cand_info[5],
+                "is_model_prediction": cand_info[6],
+                "source": source
+            })
+
+        # 최종 교정 텍스트를 top_candidates에서 가져옴
+        final_prd_sentence = top_candidates[0][0] if top_candidates else raw_prd_sentence
+    else:
+        # 임베딩 관리자가 없는 경우 기본 방식 사용
+        final_prd_sentence = raw_prd_sentence
+        top_candidates_info = []
+
+    # 결과 반환
+    response = {
+        "input_text": text,
+        "model_prediction": raw_prd_sentence,
+        "corrected_text": final_prd_sentence,
+        "all_predictions": predictions[:3],  # 상위 3개 원시 예측만 반환
+        "generation_profile": profile,
+        "model_version": current.version
+    }
+
+    # 임베딩 기반 후보가 있으면 추가
+    if embedding_manager and top_candidates_info:
+        response["top_candidates"] = top_candidates_info
+
+    return response
+
+
+def correct_batch(texts, deadline=None):
+    """
+    현재 구성 요소 묶음으로 여러 문서를 교정 (배처의 처리 함수)
+
+    Args:
+        texts (list): 입력 문서 리스트
+        deadline (Deadline): 배치 마감 시각 (기본값: None)
+
+    Returns:
+        list: 입력 순서와 같은 순서의 응답 본문 리스트
+    """
+    return run_correction(bundle, texts, deadline=deadline)
+
+
+def run_correction(current, texts, use_fast_path=True, use_cache=True, profile=None, deadline=None):
+    """
+    여러 문서를 문장 단위로 나누어 교정
+
+    모든 문서의 문장을 모아 중복을 제거한 뒤, 빠른 경로로 처리할 수 없는 문장만
+    최대 generate_max_rows개씩 묶어 generate를 호출합니다.
+    한 문서의 문장들은 같은 generate 호출에서 함께 처리됩니다.
+    결과 캐시를 사용하면 결과 캐시와 의미 기반 근사 캐시에서 결과를 찾은 문장도 generate에서 제외합니다.
+    결과 캐시는 문장 단위로 저장하며, 문서 응답은 요청마다 그 요청의 공백/줄바꿈으로 다시 결합합니다.
+    생성 프로파일은 generate 호출마다 현재 부하와 입력 특성으로 고르며,
+    full보다 낮은 프로파일로 만든 결과는 캐시에 저장하지 않습니다.
+
+    Args:
+        current (CorrectorBundle): 구성 요소 묶음 (처리가 끝날 때까지 같은 묶음 사용)
+        texts (list): 입력 문서 리스트
+        use_fast_path (bool): 정답 문장 색인/조회 테이블 사용 여부 (기본값: True)
+        use_cache (bool): 결과 캐시 저장 및 의미 기반 근사 캐시 사용 여부 (기본값: True)
+        profile (str): 사용할 생성 프로파일 (기본값: None, 생성 예산 컨트롤러가 선택)
+        deadline (Deadline): 마감 시각 (만료되면 generate를 중단하고 DeadlineExceededError 발생)
+
+    Returns:
+        list: 입력 순서와 같은 순서의 응답 본문 리스트
+    """
+    documents = [split_sentences(text) for text in texts]
+
+    # 문장별 빠른 경로 처리 및 모델 교정 대상 수집
+    sentence_responses = {}
+    pending = []
+    for segments in documents:
+        for body, _ in segments:
+            if not body or body in sentence_responses:
+                continue
+            sentence_responses[body] = fast_path_response(current, body) if use_fast_path else None
+            if sentence_responses[body] is None:
+                pending.append(body)
+
+    # 결과 캐시에 있는 문장 재사용 (문서의 일부 문장만 캐시에 있는 경우, 배처 대기 중 다른 요청이 교정한 경우)
+    if use_cache and correction_cache is not None and pending:
+        for body in pending:
+            sentence_responses[body] = correction_cache.get(cache_key(current, body))
+        uncached = [body for body in pending if sentence_responses[body] is None]
+    else:
+        uncached = pending
+    pending = uncached
+
+    # 비슷한 입력의 이전 교정 결과 재사용
+    use_semantic_cache = use_cache and semantic_cache is not None and current.embedding_manager is not None
+    if use_semantic_cache and pending:
+        with stage_timer("semantic_cache"):
+            cached_responses = semantic_cache.lookup(pending, current.embedding_manager, current.fingerprint)
+        for body, response in zip(pending, cached_responses):
+            sentence_responses[body] = response
+        pending = [body for body in pending if sentence_responses[body] is None]
+
+    max_rows = max(1, config.generate_max_rows)
+    for start in range(0, len(pending), max_rows):
+        chunk = pending[start:start + max_rows]
+        # 지연 시간 목표는 대화형 요청 기준이므로 대화형 차선의 대기열로 판단
+        queue_stats = batcher.lanes[batcher.default_lane].stats()
+        chunk_profile = profile or budget_controller.choose(chunk, queue_stats["queue_depth"],
+                                                            queue_stats["max_queue_size"])
+        GENERATION_PROFILE.inc(len(chunk), profile=chunk_profile)
+        predictions_list = generate_predictions(current.model, current.tokenizer, chunk, current.device,
+                                                max_input_length=config.max_input_length,
+                                                generation_kwargs=GENERATION_PROFILES[chunk_profile],
+                                                precision=current.precision,
+                                                deadline=deadline,
+                                                speculative=config.speculative_decoding,
+                                                num_draft_tokens=config.speculative_draft_tokens)
+        similar_lists = search_candidates(current, chunk, predictions_list, deadline)
+        for body, predictions, similar_candidates in zip(chunk, predictions_list, similar_lists):
+            sentence_responses[body] = build_response(current, body, predictions, chunk_profile, deadline,
+                                                      similar_candidates)
+        if use_semantic_cache and chunk_profile == "full":
+            semantic_cache.add([(body, sentence_responses[body]) for body in chunk], current.embedding_manager,
+                               current.fingerprint)
+
+    if use_cache and correction_cache is not None:
+        for body in uncached:
+            if sentence_responses[body].get("generation_profile", "full") == "full":
+                correction_cache.set(cache_key(current, body), sentence_responses[body])
+
+    return [assemble_document(text, segments, sentence_responses) for text, segments in zip(texts, documents)]
+
+
+def search_candidates(current, texts, predictions_list, deadline=None):
+    """
+    후보 검색이 필요한 문장들의 유사 후보를 한 번의 임베딩/FAISS 검색 호출로 찾기
+
+    Args:
+        current (CorrectorBundle): 구성 요소 묶음
+        texts (list): 입력 문장 리스트
+        predictions_list (list): 문장별 모델 예측 리스트
+        deadline (Deadline): 마감 시각 (이미 지났으면 검색하지 않음)
+
+    Returns:
+        list: 입력 순서와 같은 순서의 유사 후보 리스트 (검색하지 않은 문장은 None)
+    """
+    results = [None] * len(texts)
+    if current.embedding_manager is None or (deadline is not None and deadline.expired()):
+        return results
+
+    rows = [i for i, predictions in enumerate(predictions_list)
+            if needs_candidate_search(predictions, current.candidate_index)]
+    if rows:
+        found = current.embedding_manager.find_most_similar_batch([texts[i] for i in rows], top_k=config.top_k,
+                                                                  length_tolerance=config.length_tolerance)
+        for i, similar_candidates in zip(rows, found):
+            results[i] = similar_candidates
+    return results
+
+
+def assemble_document(text, segments, sentence_responses):
+    """
+    문장별 교정 결과를 원문의 공백과 문장부호를 유지하며 하나의 응답으로 결합
+
+    문장이 하나뿐이면 해당 문장의 응답을 그대로 사용하고,
+    여러 문장이면 교정 문장을 이어 붙인 결과와 문장별 응답(segments)을 함께 반환합니다.
+
+    Args:
+        text (str): 입력 문서
+        segments (list): split_sentences 결과
+        sentence_responses (dict): 문장 → 응답 본문
+
+    Returns:
+        dict: 응답 본문
+    """
+    bodies = [body for body, _ in segments if body]
+    if not bodies:
+        return {"input_text": text, "model_prediction": text, "corrected_text": text, "all_predictions": []}
+    if len(bodies) == 1:
+        return {**sentence_responses[bodies[0]], "input_text": text}
+
+    # 문장 경계가 사라지지 않도록 각 문장의 끝 문장부호는 원문 기준으로 복원
+    def stitch(field):
+        return join_sentences([
+            (restore_punctuation(body, sentence_responses[body][field]) if body else body, separator)
+            for body, separator in segments
+        ])
+
+    model_prediction = stitch("model_prediction")
+    response = {
+        "input_text": text,
+        "model_prediction": model_prediction,
+        "corrected_text": stitch("corrected_text"),
+        "all_predictions": [model_prediction],
+        "model_version": sentence_responses[bodies[0]]["model_version"],
+        "segments": [{**sentence_responses[body], "input_text": body} for body in bodies]
+    }
+
+    # 문서의 생성 프로파일은 문장별 프로파일 중 가장 낮은 것
+    profiles = [sentence_responses[body]["generation_profile"] for body in bodies
+                if "generation_profile" in sentence_responses[body]]
+    if profiles:
+        response["generation_profile"] = min(profiles, key=PROFILE_ORDER.index)
+    return response
+
+
+def fast_path_response(current, text):
+    """
+    모델 호출 없이 응답할 수 있는 입력이면 응답 본문 구성
+
+    입력이 알려진 정답 문장이면 그대로, 조회 테이블에 있는 오류 문장이면 기록된 정답 문장을 반환합니다.
+
+    Args:
+        current (CorrectorBundle): 구성 요소 묶음
+        text (str): 입력 문장
+
+    Returns:
+        dict: 응답 본문 또는 None (빠른 경로로 처리할 수 없는 경우)
+    """
+    if text in current.candidate_index:
+        corrected, fast_path = text, "known_correct"
+    else:
+        found = current.lookup_table.lookup(text) if current.lookup_table is not None else None
+        if found is None:
+            return None
+        corrected, fast_path = found[0], f"lookup_{found[1]}"
+
+    return {
+        "input_text": text,
+        "model_prediction": corrected,
+        "corrected_text": corrected,
+        "all_predictions": [corrected],
+        "fast_path": fast_path,
+        "model_version": current.version
+    }
+
+
+def cache_key(current, text):
+    """
+    문장의 캐시 키 생성
+
+    키는 정규화 문장(연속 공백과 줄바꿈을 하나로 합침) 기준이므로 문장 단위(split_sentences의 본문)로만 사용합니다.
+    여러 문장 문서의 응답은 줄바꿈/구분자에 따라 결합 결과가 달라지므로 문서 단위로 저장하지 않습니다.
+    """
+    return make_cache_key(text, cache_params, current.fingerprint)
+
+
+async def lookup_cache(bodies):
+    """
+    캐시에서 문장별 교정 결과 조회
+
+    공유 백엔드 조회는 네트워크/디스크 I/O이므로 스레드 풀에서 한 번에 실행합니다.
+
+    Args:
+        bodies (list): 문장 리스트
+
+    Returns:
+        list: 문장 순서와 같은 순서의 캐시된 응답 본문 또는 None 리스트
+    """
+    if correction_cache is None:
+        return [None] * len(bodies)
+    keys = [cache_key(bundle, body) for body in bodies]
+    if correction_cache.backend is None:
+        return [correction_cache.get(key) for key in keys]
+    return await run_in_threadpool(lambda: [correction_cache.get(key) for key in keys])
+
+
+async def lookup_precomputed(text):
+    """
+    모델 호출 없이 얻을 수 있는 응답 조회 (문장별 빠른 경로 → 결과 캐시 순)
+
+    문서를 문장으로 나누어 모든 문장의 결과가 있을 때만 이 요청의 공백과 구분자로 결합하여 반환합니다.
+
+    Args:
+        text (str): 입력 문서
+
+    Returns:
+        dict: 응답 본문 또는 None
+    """
+    segments = split_sentences(text)
+    bodies = list(dict.fromkeys(body for body, _ in segments if body))
+    if not bodies:
+        return None
+
+    sentence_responses = {body: fast_path_response(bundle, body) for body in bodies}
+    missing = [body for body in bodies if sentence_responses[body] is None]
+    if missing:
+        for body, cached in zip(missing, await lookup_cache(missing)):
+            if cached is None:
+                return None
+            sentence_responses[body] = {**cached, "input_text": body}
+
+    response = assemble_document(text, segments, sentence_responses)
+    REQUESTS.inc(path="cache" if missing else sentence_responses[bodies[0]]["fast_path"])
+    return response
+
+
+def serving_path(response, shared=False):
+    """배처를 거친 응답의 처리 경로 (coalesced: 다른 요청의 계산 공유, semantic_cache: 근사 캐시, model: generate)"""
+    if shared:
+        return "coalesced"
+    return "semantic_cache" if "semantic_cache" in response else "model"
+
+
+# 지연 시간 목표에 맞춰 배치별 생성 프로파일을 고르는 컨트롤러
+budget_controller = GenerationBudgetController(latency_target_ms=config.latency_target_p99_ms,
+                                               window_size=config.budget_window_size,
+                                               overload_queue_ratio=config.budget_overload_queue_ratio,
+                                               enabled=config.adaptive_generation)
+
+# 동시 요청을 모아 처리하는 마이크로 배처
+# 배치 처리는 전용 추론 스레드 풀에서 실행되어 이벤트 루프를 막지 않음
+# 대화형 요청(/correct, WebSocket)과 대량 요청(/correct/batch)은 별도 차선의 대기열을 사용
+batcher = DynamicBatcher(correct_batch, max_batch_size=config.batch_max_size,
+                         max_wait_ms=config.batch_max_wait_ms,
+                         num_workers=config.inference_workers,
+                         lanes=[
+                             Lane("interactive", weight=config.interactive_weight,
+                                  reserved_slots=config.interactive_reserved_slots,
+                                  max_queue_size=config.max_queue_size,
+                                  max_queue_wait_ms=config.max_queue_wait_ms),
+                             Lane("bulk", weight=config.bulk_weight,
+                                  max_queue_size=config.bulk_max_queue_size,
+                                  max_queue_wait_ms=config.bulk_max_queue_wait_ms),
+                         ])
+
+# 같은 입력의 동시 요청을 하나의 배처 요청으로 합치는 single-flight
+single_flight = SingleFlight() if config.single_flight_enabled else None
+
+
+# /metrics에 대기열, 캐시, 조회 테이블 통계 등록
+REGISTRY.register_callback("typo_corrector_batcher", batcher.stats, {
+    "processed_requests": "counter", "processed_batches": "counter",
+    "rejected_queue_full": "counter", "rejected_queue_timeout": "counter",
+    "expired_requests": "counter", "abandoned_batches": "counter"
+}, "Micro-batcher")
+for lane in batcher.lanes.values():
+    REGISTRY.register_callback(f"typo_corrector_lane_{lane.name}", lane.stats, {
+        "processed_requests": "counter", "processed_batches": "counter",
+        "rejected_queue_full": "counter", "rejected_queue_timeout": "counter", "expired_requests": "counter"
+    }, f"{lane.name.capitalize()} priority lane")
+if correction_cache is not None:
+    REGISTRY.register_callback("typo_corrector_cache", correction_cache.stats, {
+        "hits": "counter", "shared_hits": "counter", "misses": "counter", "evictions": "counter",
+        "expirations": "counter", "backend_errors": "counter"
+    }, "Correction result cache")
+if semantic_cache is not None:
+    REGISTRY.register_callback("typo_corrector_semantic_cache", semantic_cache.stats, {
+        "hits": "counter", "misses": "counter", "insertions": "counter", "evictions": "counter"
+    }, "Semantic near-duplicate cache")
+if single_flight is not None:
+    REGISTRY.register_callback("typo_corrector_single_flight", single_flight.stats, {
+        "leader_requests": "counter", "coalesced_requests": "counter", "abandoned_flights": "counter"
+    }, "Single-flight request coalescing")
+REGISTRY.register_callback("typo_corrector_generation_budget", budget_controller.stats, {
+    "downgrades": "counter", "upgrades": "counter"
+}, "Generation budget controller")
+REGISTRY.register_callback(
+    "typo_corrector_lookup_table",
+    lambda: bundle.lookup_table.stats() if bundle is not None and bundle.lookup_table is not None else None,
+    {"exact_hits": "counter", "jamo_hits": "counter", "misses": "counter"},
+    "Error sentence lookup table"
+)
+
+
+def activate_bundle(current):
+    """
+    구성 요소 묶음을 요청 처리에 사용하도록 설정
+
+    요청 처리는 시작할 때 잡은 묶음을 끝까지 사용하므로, 참조 교체만으로 처리 중인 요청에 영향 없이 전환됩니다.
+    """
+    global bundle
+    previous = bundle
+    bundle = current
+    if correction_cache is not None:
+        correction_cache.fingerprint = current.fingerprint
+    if semantic_cache is not None:
+        semantic_cache.reset(current.fingerprint)
+    if previous is not None and previous.version != current.version:
+        MODEL_VERSION.set(0, version=previous.version)
+    MODEL_VERSION.set(1, version=current.version)
+
+
+def load_components():
+    """
+    구성 요소를 동기적으로 로드 (serve.py의 마스터 프로세스에서 fork 전과 롤링 재시작 전에 호출)
+
+    예열은 fork된 각 워커의 시작 단계에서 수행됩니다.
+    """
+    global startup_status
+    status = StartupStatus()
+    current = load_bundle(config, status)
+    startup_status = status
+    activate_bundle(current)
+
+
+def warmup(current):
+    """
+    예열 문장을 모든 단계(토큰화, generate, 쿼리 임베딩, FAISS 검색, 후보 점수 계산)에 통과시켜 예열
+
+    단건과 배치 요청을 한 라운드로 반복하며, 라운드 소요 시간이 직전 라운드 대비
+    warmup_tolerance 이내로 안정되면(첫 요청 지연이 정상 상태와 같아지면) 종료합니다.
+
+    Args:
+        current (CorrectorBundle): 구성 요소 묶음
+    """
+    texts = list(config.warmup_texts)
+    if not texts:
+        return
+
+    previous = None
+    for round_no in range(1, max(1, config.warmup_max_rounds) + 1):
+        start = time.perf_counter()
+        for text in texts:
+            run_correction(current, [text], use_fast_path=False, use_cache=False, profile="full")
+        for profile in PROFILE_ORDER:
+            run_correction(current, texts, use_fast_path=False, use_cache=False, profile=profile)
+        elapsed = time.perf_counter() - start
+        print(f"Warmup round {round_no}: {elapsed * 1000:.1f}ms")
+
+        if previous is not None and elapsed <= previous * (1 + config.warmup_tolerance):
+            break
+        previous = elapsed
+
+
+# 새 체크포인트/후보/FAISS 색인을 백그라운드에서 로드·예열한 뒤 교체하는 재로드 관리자
+reloader = BundleReloader(lambda status: load_bundle(config, status), warmup, activate_bundle, lambda: bundle,
+                          lambda: source_fingerprint(config), release_timeout_s=config.reload_release_timeout_s)
+REGISTRY.register_callback("typo_corrector_reload", reloader.stats, {
+    "reloads": "counter", "reload_failures": "counter", "released_bundles": "counter"
+}, "Hot reload")
+
+
+async def initialize():
+    """구성 요소를 백그라운드에서 로드하고 예열한 뒤 준비 상태로 전환"""
+    try:
+        # 로드 전의 원본 파일 지문 (로드 중에 바뀐 파일은 파일 감시가 다시 재로드)
+        source_version = await run_in_threadpool(source_fingerprint, config)
+        current = bundle
+        if current is None:
+            current = await run_in_threadpool(load_bundle, config, startup_status)
+        await run_in_threadpool(startup_status.run, "warmup", warmup, current)
+        activate_bundle(current)
+
+        if correction_cache is not None:
+            await run_in_threadpool(correction_cache.load_snapshot, config.cache_snapshot_path)
+        startup_status.ready = True
+        print(f"Service is ready (version {current.version}).")
+        if on_ready is not None:
+            on_ready()
+        # pre-fork 워커에서는 마스터가 파일을 감시
+        if config.reload_watch and prefork_master_pid is None:
+            reloader.start(source_version, config.reload_watch_interval_s)
+    except Exception as e:
+        startup_status.error = str(e)
+        print(f"Error initializing service: {e}")
+
+
+def request_deadline(request, default_ms=None):
+    """
+    요청 헤더(deadline_header, 밀리초) 또는 기본값으로 요청 마감 시각 생성
+
+    Args:
+        request (Request): FastAPI 요청 객체
+        default_ms (float): 헤더가 없을 때 사용할 제한 시간(ms) (None이면 시간 제한 없음)
+
+    Returns:
+        Deadline: 요청 마감 시각
+    """
+    value = request.headers.get(config.deadline_header)
+    if value is None:
+        return Deadline.from_timeout_ms(default_ms)
+    try:
+        return Deadline.from_timeout_ms(float(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {config.deadline_header} header: {value}")
+
+
+def inference_deadline(deadline):
+    """응답 전송 시간(deadline_reserve_ms)을 남겨둔 추론용 마감 시각"""
+    if deadline.expires_at is None:
+        return Deadline()
+    return Deadline(deadline.expires_at - config.deadline_reserve_ms / 1000.0)
+
+
+async def wait_for_result(request, awaitable, deadline):
+    """
+    마감 시각과 클라이언트 연결 종료를 감시하며 결과 대기
+
+    마감 시각이 지나거나 연결이 끊기면 대기를 취소하여, 대기열의 요청은 건너뛰고
+    실행 중인 배치는 남은 요청이 없을 때 중단되도록 합니다.
+
+    Args:
+        request (Request): FastAPI 요청 객체
+        awaitable: 결과를 반환하는 코루틴
+        deadline (Deadline): 요청 마감 시각
+
+    Returns:
+        awaitable의 결과
+    """
+    task = asyncio.ensure_future(awaitable)
+    poll_interval = config.disconnect_poll_ms / 1000.0
+    try:
+        while True:
+            remaining = deadline.remaining()
+            timeout = poll_interval if remaining is None else min(poll_interval, remaining)
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if deadline.expired():
+                raise DeadlineExceededError("Request deadline passed.")
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client closed request.")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def submit_correction(text, deadline=None):
+    """
+    마이크로 배처로 문장 교정 (같은 입력의 교정이 진행 중이면 그 결과를 공유)
+
+    입력 문서 원문(공백과 줄바꿈 포함)과 모델 지문이 같은 진행 중인 교정에 합류합니다.
+    정규화 기준(캐시 키)으로 합류하면 줄바꿈이 다른 문서가 다른 문장 구성의 결합 결과를 받게 되므로
+    원문 그대로 비교하며, 공백만 다른 문서의 문장 중복 계산은 문장 단위 결과 캐시가 줄입니다.
+
+    Args:
+        text (str): 입력 문장
+        deadline (Deadline): 추론 마감 시각 (기본값: None, 시간 제한 없음)
+
+    Returns:
+        tuple: (응답 본문, 진행 중인 교정에 합류했는지 여부)
+    """
+    if single_flight is None:
+        return await batcher.submit(text, deadline), False
+    response, shared = await single_flight.do((bundle.fingerprint, text),
+                                              lambda flight_deadline: batcher.submit(text, flight_deadline),
+                                              deadline)
+    return {**response, "input_text": text}, shared
+
+
+def ensure_admin(request):
+    """
+    관리자 요청 확인
+
+    admin_token이 설정되어 있으면 X-Admin-Token 헤더를 확인하고, 비어 있으면 루프백 주소의 요청만 허용합니다.
+    재로드는 모델과 색인 전체를 다시 로드하므로 인증 없이 외부에 열어두지 않습니다.
+    """
+    if not config.admin_token:
+        if request.client is None or request.client.host not in ("127.0.0.1", "::1", "localhost"):
+            raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set admin_token.")
+        return
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), str(config.admin_token)):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+def ensure_ready():
+    """준비되지 않은 상태면 503 반환"""
+    if not startup_status.ready:
+        raise HTTPException(status_code=503, detail="Service is starting.")
+
+
+@app.on_event("startup")
+async def start_batcher():
+    global initialize_task
+    await batcher.start()
+    initialize_task = asyncio.create_task(initialize())
+    # pre-fork 워커는 예열을 마친 뒤에 연결을 받음 (롤링 재시작 중 새 워커가 503을 반환하지 않도록)
+    if prefork_master_pid is not None:
+        await initialize_task
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    if initialize_task is not None and not initialize_task.done():
+        initialize_task.cancel()
+    await reloader.stop()
+    await batcher.stop()
+    if correction_cache is not None and startup_status.ready:
+        correction_cache.save_snapshot(config.cache_snapshot_path)
+
+
+@app.post("/admin/reload")
+async def reload_components(request: Request):
+    """
+    모델, 토크나이저, 후보 문장, FAISS 색인을 설정 경로에서 다시 로드하여 무중단 교체
+
+    로드와 예열은 백그라운드에서 진행되며, 진행 상황은 GET /admin/reload로 확인합니다.
+    serve.py의 pre-fork 워커에서는 마스터에 재로드를 요청하며, 마스터가 구성 요소를 다시 로드한 뒤
+    워커를 하나씩 다시 fork합니다(롤링 재시작).
+    """
+    ensure_admin(request)
+    ensure_ready()
+    if prefork_master_pid is not None:
+        os.kill(prefork_master_pid, signal.SIGHUP)
+        return JSONResponse(content={"mode": "rolling_restart", "version": bundle.version}, status_code=202)
+    if not reloader.trigger("admin"):
+        raise HTTPException(status_code=409, detail="Reload already in progress.")
+    return JSONResponse(content=reloader.stats(), status_code=202)
+
+
+@app.get("/admin/reload")
+async def reload_status(request: Request):
+    ensure_admin(request)
+    return reloader.stats()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    status = startup_status.snapshot()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+
 # 엔드포인트
 @app.post("/correct")
-async def correct_text(input: TextInput):
+async def correct_text(input: TextInput, request: Request):
+    ensure_ready()
+    deadline = request_deadline(request, config.default_deadline_ms)
     try:
-        # 입력 문장 토큰화
-        tokenized = tokenizer(input.text, return_tensors="pt", max_length=128, truncation=True)
-        input_ids = tokenized["input_ids"].to(device)
-
-        # 모델로 여러 개의 문장 생성
-        with torch.no_grad():
-            res = model.generate(
-                inputs=input_ids,
-                num_beams=10,
-                num_return_sequences=5,
-                do_sample=True,
-                temperature=0.7,
-                repetition_penalty=2.5,
-                length_penalty=0.5,
-                no_repeat_ngram_size=3,
-                max_length=input_ids.size()[1] + 2,
-                early_stopping=True,
-                min_length=max(1, input_ids.size()[1] - 5)
-            ).cpu().tolist()
-
-        # 생성된 문장 디코딩
-        predictions = [tokenizer.decode(r, skip_special_tokens=True).strip() for r in res]
-
-        raw_prd_sentence = predictions[0]
-
-        # 임베딩 기반 최종 예측 문장 선택
-        if embedding_manager:
-            # 최종 교정 텍스트는 사용하지 않고, 후보 목록만 가져옴
-            _, top_candidates = find_best_correction(
-                input.text,
-                predictions,
-                embedding_manager,
-                correct_label=None,  # API에서는 정답 레이블 없음
-                top_k=10,
-                length_tolerance=5
-            )
-
-            # 상위 후보 정보 구성
-            top_candidates_info = []
-            for cand_info in top_candidates[:3]:
-                top_candidates_info.append({
-                    "text": cand_info[0],
-                    "length_diff": cand_info[1],
-                    "edit_distance": cand_info[2],
-                    "score": cand_info[3],
-                    "char_similarity": cand_info[4],
-                    "semantic_similarity": cand_info[5],
-                    "is_model_prediction": cand_info[6]
-                })
-
-            # 최종 교정 텍스트를 top_candidates에서 가져옴
-            final_prd_sentence = top_candidates[0][0] if top_candidates else raw_prd_sentence
-        else:
-            # 임베딩 관리자가 없는 경우 기본 방식 사용
-            final_prd_sentence = raw_prd_sentence
-            top_candidates_info = []
-
-        # 결과 반환
-        response = {
-            "input_text": input.text,
-            "model_prediction": raw_prd_sentence,
-            "corrected_text": final_prd_sentence,
-            "all_predictions": predictions[:3]  # 상위 3개 원시 예측만 반환
-        }
-
-        # 임베딩 기반 후보가 있으면 추가
-        if embedding_manager and top_candidates_info:
-            response["top_candidates"] = top_candidates_info
-
+        precomputed = await lookup_precomputed(input.text)
+        if precomputed is not None:
+            return precomputed
+        start = time.perf_counter()
+        response, shared = await wait_for_result(request,
+                                                 submit_correction(input.text, inference_deadline(deadline)),
+                                                 deadline)
+        budget_controller.observe(time.perf_counter() - start)
+        REQUESTS.inc(path=serving_path(response, shared))
         return response
+    except HTTPException:
+        raise
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=f"Deadline exceeded: {str(e)}")
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Overloaded: {str(e)}")
+    except QueueTimeoutError as e:
+        raise HTTPException(status_code=503, detail=f"Overloaded: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    요청 본문을 읽으면서 응답을 보내는 스트리밍 응답
+
+    StreamingResponse는 연결 종료를 감시하느라 receive를 직접 소비하므로, 응답 중에 요청 본문을 읽을 수 없습니다.
+    이 응답은 감시를 생략하고 본문 반복자가 요청 본문 읽기와 연결 종료 확인을 맡습니다.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_chunks(request, chunk_size):
+    """
+    NDJSON 요청 본문을 읽는 대로 파싱하여 입력 문장을 chunk_size개씩 반환
+
+    각 줄은 {"text": "..."} 객체 또는 JSON 문자열이어야 하며, 파싱할 수 없는 줄은 ValueError 객체로 반환합니다.
+    다음 청크를 요청할 때만 본문을 더 읽으므로 처리 중인 청크 수만큼만 메모리에 보관합니다.
+
+    Args:
+        request (Request): FastAPI 요청 객체
+        chunk_size (int): 청크당 문장 수
+
+    Yields:
+        list: 입력 문장(또는 ValueError) 리스트
+    """
+    pending = []
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        pending.extend(parse_ndjson_line(line) for line in lines if line.strip())
+        while len(pending) >= chunk_size:
+            yield pending[:chunk_size]
+            pending = pending[chunk_size:]
+    if buffer.strip():
+        pending.append(parse_ndjson_line(buffer))
+    for start in range(0, len(pending), chunk_size):
+        yield pending[start:start + chunk_size]
+
+
+async def iter_list_chunks(texts, chunk_size):
+    """이미 읽은 문장 리스트를 chunk_size개씩 반환"""
+    for start in range(0, len(texts), chunk_size):
+        yield texts[start:start + chunk_size]
+
+
+def parse_ndjson_line(line):
+    """NDJSON 한 줄에서 입력 문장 추출 (파싱할 수 없으면 ValueError 객체 반환)"""
+    try:
+        value = json.loads(line)
+        return str(value["text"]) if isinstance(value, dict) else str(value)
+    except (ValueError, KeyError) as e:
+        return ValueError(f"Invalid NDJSON line: {str(e)}")
+
+
+async def wait_disconnect(request):
+    """요청 본문을 모두 읽은 뒤 클라이언트 연결 종료를 기다림"""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def correct_chunk(chunk, deadline=None):
+    """
+    입력 문장 청크를 캐시 → 배처의 bulk 차선 순으로 교정
+
+    Args:
+        chunk (list): 입력 문장(또는 파싱 오류 ValueError) 리스트
+        deadline (Deadline): 전체 요청 마감 시각 (기본값: None, 시간 제한 없음)
+
+    Returns:
+        list: 입력 순서와 같은 순서의 응답 본문 리스트
+    """
+    results = [{"input_text": None, "error": str(text)} if isinstance(text, ValueError)
+               else await lookup_precomputed(text) for text in chunk]
+
+    # 캐시에 없는 문장만 모델로 교정
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        chunk_deadline = inference_deadline(deadline or Deadline())
+        corrected = await asyncio.gather(*(batcher.submit(chunk[i], chunk_deadline, lane="bulk")
+                                           for i in missing), return_exceptions=True)
+        for i, result in zip(missing, corrected):
+            if isinstance(result, Exception):
+                results[i] = {"input_text": chunk[i], "error": str(result)}
+            else:
+                REQUESTS.inc(path=serving_path(result))
+                results[i] = result
+    return results
+
+
+async def stream_corrections(request, chunks, deadline=None):
+    """
+    입력 청크를 읽는 대로 교정하며 결과를 입력 순서대로 NDJSON 한 줄씩 반환
+
+    모델 교정은 배처의 bulk 차선으로 보내 대화형 요청과 추론 슬롯을 나누어 씁니다.
+    bulk 차선이 쉬지 않도록 최대 bulk_max_inflight_chunks개의 청크를 동시에 처리하며,
+    그 수만큼만 요청 본문을 미리 읽으므로 업로드 전체를 메모리에 보관하지 않습니다.
+    결과는 앞선 청크가 끝나는 즉시 전송되며, 클라이언트 연결이 끊기면 처리 중인 청크도 중단됩니다.
+
+    Args:
+        request (Request): FastAPI 요청 객체 (연결 종료 확인)
+        chunks (AsyncIterator): 입력 문장 청크 반복자 (iter_ndjson_chunks, iter_list_chunks)
+        deadline (Deadline): 전체 요청 마감 시각 (기본값: None, 시간 제한 없음)
+
+    Yields:
+        str: {"index": 입력 순번, ...응답 본문} 형태의 JSON 한 줄
+    """
+    max_inflight = max(1, config.bulk_max_inflight_chunks)
+    inflight = deque()  # (시작 순번, 교정 작업), 시작 순서
+    next_chunk = asyncio.ensure_future(chunks.__anext__())
+    disconnect = None
+    index = 0
+    try:
+        while next_chunk is not None or inflight:
+            waiters = [task for _, task in list(inflight)[:1]]
+            if next_chunk is not None and len(inflight) < max_inflight:
+                waiters.append(next_chunk)
+            if disconnect is not None:
+                waiters.append(disconnect)
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            if disconnect is not None and disconnect.done():
+                return
+
+            # 다음 청크 교정 시작 (본문이 끝나면 연결 종료 감시 시작)
+            if next_chunk is not None and next_chunk.done() and len(inflight) < max_inflight:
+                try:
+                    chunk = next_chunk.result()
+                except ClientDisconnect:
+                    return
+                except StopAsyncIteration:
+                    next_chunk = None
+                    disconnect = asyncio.ensure_future(wait_disconnect(request))
+                else:
+                    inflight.append((index, asyncio.ensure_future(correct_chunk(chunk, deadline))))
+                    index += len(chunk)
+                    next_chunk = asyncio.ensure_future(chunks.__anext__())
+
+            # 끝난 청크의 결과를 입력 순서대로 전송
+            while inflight and inflight[0][1].done():
+                start, task = inflight.popleft()
+                for offset, result in enumerate(task.result()):
+                    yield json.dumps({"index": start + offset, **result}, ensure_ascii=False) + "\n"
+    finally:
+        for task in [next_chunk, disconnect] + [task for _, task in inflight]:
+            if task is not None:
+                task.cancel()
+
+
+@app.post("/correct/batch")
+async def correct_batch_text(request: Request):
+    """문장 리스트(JSON) 또는 NDJSON 업로드를 받아 교정 결과를 NDJSON으로 스트리밍 (NDJSON은 읽는 대로 교정)"""
+    ensure_ready()
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        chunks = iter_ndjson_chunks(request, config.batch_max_size)
+    else:
+        try:
+            texts = BatchTextInput(**(await request.json())).texts
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error: {str(e)}")
+        chunks = iter_list_chunks(texts, config.batch_max_size)
+    # 대량 요청은 헤더로 지정한 경우에만 마감 시각 적용
+    deadline = request_deadline(request)
+    return DuplexStreamingResponse(stream_corrections(request, chunks, deadline), media_type="application/x-ndjson")
+
+
+async def correct_sentences(bodies):
+    """
+    문장들을 대화형 경로(빠른 경로 → 캐시 → 마이크로 배처)로 교정
+
+    Args:
+        bodies (list): 교정할 문장 리스트
+
+    Returns:
+        dict: 문장 → 응답 본문
+    """
+    results = {body: await lookup_precomputed(body) for body in bodies}
+    missing = [body for body, result in results.items() if result is None]
+    if missing:
+        start = time.perf_counter()
+        corrected = await asyncio.gather(*(submit_correction(body) for body in missing))
+        budget_controller.observe(time.perf_counter() - start)
+        for body, (response, shared) in zip(missing, corrected):
+            REQUESTS.inc(path=serving_path(response, shared))
+            results[body] = response
+    return results
+
+
+async def receive_latest(websocket, first_message):
+    """
+    debounce 시간 안에 연달아 들어온 메시지 중 마지막 메시지 반환
+
+    계속 입력하는 중에도 교정이 멈추지 않도록, 첫 메시지 후 ws_debounce_max_wait_ms가 지나면
+    debounce를 끝내고 그때까지의 마지막 메시지를 반환합니다.
+
+    Args:
+        websocket (WebSocket): 연결 객체
+        first_message (str): 처음 받은 메시지
+
+    Returns:
+        str: 마지막으로 받은 메시지
+    """
+    message = first_message
+    debounce = config.ws_debounce_ms / 1000.0
+    max_wait = config.ws_debounce_max_wait_ms / 1000.0
+    deadline = time.monotonic() + max_wait if max_wait > 0 else None
+    while debounce > 0:
+        timeout = debounce
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+        try:
+            message = await asyncio.wait_for(websocket.receive_text(), timeout=timeout)
+        except asyncio.TimeoutError:
+            break
+    return message
+
+
+def parse_ws_message(message):
+    """WebSocket 메시지({"text": ..., "revision": ...} 또는 문자열)에서 (문서, 리비전) 추출"""
+    try:
+        value = json.loads(message)
+    except ValueError:
+        return message, None
+    if isinstance(value, dict):
+        return str(value.get("text", "")), value.get("revision")
+    return str(value), None
+
+
+@app.websocket("/ws/correct")
+async def correct_session(websocket: WebSocket):
+    """
+    입력 중 실시간 교정 세션
+
+    클라이언트는 편집 중인 문서 전체를 보내고, 서버는 직전 문서 대비 바뀐 문장만 다시 교정하여
+    문장 목록에 대한 splice 패치({"start", "delete", "segments", "length"})를 보냅니다.
+    """
+    await websocket.accept()
+    if not startup_status.ready:
+        await websocket.close(code=1013, reason="Service is starting.")
+        return
+
+    session = IncrementalSession(max_sentences=config.ws_max_session_sentences)
+    try:
+        while True:
+            message = await receive_latest(websocket, await websocket.receive_text())
+            text, revision = parse_ws_message(message)
+
+            segments, pending = session.plan(text)
+            try:
+                corrected = await correct_sentences(pending)
+            except QueueFullError as e:
+                await websocket.send_json({"type": "error", "revision": revision, "status": 429,
+                                           "detail": f"Overloaded: {str(e)}"})
+                continue
+            except QueueTimeoutError as e:
+                await websocket.send_json({"type": "error", "revision": revision, "status": 503,
+                                           "detail": f"Overloaded: {str(e)}"})
+                continue
+            except Exception as e:
+                await websocket.send_json({"type": "error", "revision": revision, "status": 500,
+                                           "detail": f"Error: {str(e)}"})
+                continue
+
+            patch = session.update(segments, corrected)
+            await websocket.send_json({"type": "patch", "revision": revision, "corrected_sentences": len(pending),
+                                       **patch})
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "batcher": batcher.stats(),
+        "cache": correction_cache.stats() if correction_cache is not None else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "lookup_table": bundle.lookup_table.stats() if bundle is not None and bundle.lookup_table is not None else None,
+        "generation_budget": budget_controller.stats(),
+        "single_flight": single_flight.stats() if single_flight is not None else None,
+        "reload": reloader.stats(),
+        "startup": startup_status.snapshot()
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host=config.host, port=config.port)
@@ -0,0 +1,253 @@
+"""
+FAISS 근사 최근접 이웃(ANN) 색인 벤치마크 스크립트
+
+합성 코퍼스(또는 precompute_embeddings로 만든 embeddings.npy)에 대해 utils/ann_index.py의
+색인 종류별로 다음 항목을 비교합니다.
+- 재현율: 정확한 검색(flat) 결과 대비 recall@k
+- 처리 속도: 쿼리를 하나씩 검색할 때의 초당 쿼리 수(QPS)와 평균 지연 시간 (ms)
+- 메모리: 색인 직렬화 크기 (MB)와 구축 시간 (s)
+IVF는 nprobe, HNSW는 efSearch 값별로 결과를 출력합니다.
+
+서버는 쿼리 길이 ± length_tolerance인 후보(길이 순 ID 구간) 안에서만 검색하므로, 같은 구간으로 다음 두 가지도 측정합니다.
+- selector: 구간 선택기만 적용한 색인 검색 (좁은 구간에서 근사 색인은 결과가 모자라거나 빔)
+- server: 서버의 구간 검색(search_range, 작은 구간은 정확히 검색하고 큰 구간은 nprobe/efSearch 보정)
+재현율 기준은 구간 안의 정확한 상위 k개이며, SHORT는 결과가 k개보다 적게 나온 쿼리 비율입니다.
+후보 길이는 --embeddings와 같은 디렉토리의 candidates.json에서 읽고, 합성 코퍼스는 길이를 정규분포로 생성합니다.
+
+사용법:
+    python benchmark_ann.py --num_vectors 1000000 --dim 256 --index_types flat ivf_flat ivf_pq hnsw
+    python benchmark_ann.py --embeddings ./embeddings/embeddings.npy --num_queries 2000 --length_tolerance 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import faiss
+
+from utils.ann_index import (build_ann_index, search_parameters, search_range, exact_range_search, length_offsets,
+                             length_range, index_memory_bytes, INDEX_TYPES)
+
+
+def make_corpus(num_vectors, dim, num_clusters, seed):
+    """군집 구조가 있는 합성 임베딩 생성 (비슷한 문장이 모여 있는 실제 임베딩 분포 근사)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dim), dtype=np.float32)
+    assignments = rng.integers(0, num_clusters, num_vectors)
+    vectors = centers[assignments] + 0.5 * rng.standard_normal((num_vectors, dim), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_lengths(num_vectors, mean_length, seed):
+    """합성 코퍼스의 문장 길이 생성 (길이 순 정렬, 벡터와 독립이므로 순서대로 붙여도 무방)"""
+    rng = np.random.default_rng(seed + 2)
+    lengths = np.clip(np.rint(rng.normal(mean_length, mean_length / 2.5, num_vectors)), 1, None).astype(np.int64)
+    return np.sort(lengths)
+
+
+def load_lengths(embeddings_path, corpus):
+    """
+    embeddings.npy와 같은 디렉토리의 candidates.json에서 후보 길이를 읽고, 길이 순이 아니면 코퍼스와 함께 정렬
+
+    Returns:
+        tuple: (코퍼스, 길이 배열) (candidates.json이 없으면 길이는 None)
+    """
+    path = os.path.join(os.path.dirname(embeddings_path), 'candidates.json')
+    if not os.path.exists(path):
+        return corpus, None
+    with open(path, 'r') as f:
+        lengths = np.array([len(text) for text in json.load(f)], dtype=np.int64)
+    order = np.argsort(lengths, kind="stable")
+    return np.ascontiguousarray(corpus[order]), lengths[order]
+
+
+def make_queries(corpus, num_queries, noise, seed):
+    """
+    코퍼스 벡터에 잡음을 더한 쿼리 생성 (오타 문장이 정답 문장 근처에 있는 상황 근사)
+
+    Returns:
+        tuple: (쿼리 배열, 쿼리를 만든 코퍼스 행 번호 배열)
+    """
+    rng = np.random.default_rng(seed + 1)
+    rows = rng.choice(len(corpus), num_queries, replace=False)
+    queries = corpus[rows].copy()
+    queries += noise * rng.standard_normal(queries.shape, dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return queries, rows
+
+
+def evaluate(index, queries, ground_truth, top_k, params):
+    """쿼리를 하나씩 검색하여 recall@k와 지연 시간 측정"""
+    found = np.empty((len(queries), top_k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, found[i] = index.search(queries[i:i + 1], top_k, params=params)
+    seconds = time.perf_counter() - start
+    recall = np.mean([len(set(f) & set(g)) / top_k for f, g in zip(found, ground_truth)])
+    return {
+        'recall': float(recall),
+        'short_rate': 0.0,
+        'qps': len(queries) / seconds,
+        'latency_mean_ms': seconds * 1000 / len(queries),
+    }
+
+
+def evaluate_windows(search, queries, windows, ground_truth):
+    """
+    쿼리를 하나씩 길이 구간 안에서 검색하여 구간 기준 recall@k, 결과 부족 비율과 지연 시간 측정
+
+    Args:
+        search (callable): (쿼리 (1, d), 구간 시작, 구간 끝) -> ID 배열 (1, k')
+        queries (np.ndarray): 쿼리 배열
+        windows (list): 쿼리별 (시작, 끝) ID 구간
+        ground_truth (list): 쿼리별 구간 안의 정확한 상위 ID 배열
+    """
+    recalls, short = [], 0
+    start = time.perf_counter()
+    for i, (window_start, window_end) in enumerate(windows):
+        found = search(queries[i:i + 1], window_start, window_end)[0]
+        found = found[found >= 0]
+        short += len(found) < len(ground_truth[i])
+        recalls.append(len(set(found) & set(ground_truth[i])) / len(ground_truth[i]))
+    seconds = time.perf_counter() - start
+    return {
+        'recall': float(np.mean(recalls)),
+        'short_rate': short / len(windows),
+        'qps': len(windows) / seconds,
+        'latency_mean_ms': seconds * 1000 / len(windows),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="FAISS ANN 색인 벤치마크")
+    parser.add_argument("--embeddings", dest="embeddings", type=str, default=None,
+                        help="사용할 embeddings.npy 경로 (지정하지 않으면 합성 코퍼스 생성)")
+    parser.add_argument("--num_vectors", dest="num_vectors", type=int, default=200000, help="합성 코퍼스 벡터 수")
+    parser.add_argument("--dim", dest="dim", type=int, default=256, help="합성 코퍼스 차원")
+    parser.add_argument("--num_clusters", dest="num_clusters", type=int, default=2000, help="합성 코퍼스 군집 수")
+    parser.add_argument("--num_queries", dest="num_queries", type=int, default=1000)
+    parser.add_argument("--query_noise", dest="query_noise", type=float, default=0.05, help="쿼리에 더할 잡음 크기")
+    parser.add_argument("--top_k", dest="top_k", type=int, default=10)
+    parser.add_argument("--index_types", dest="index_types", type=str, nargs="+", default=list(INDEX_TYPES),
+                        choices=INDEX_TYPES)
+    parser.add_argument("--nlist", dest="nlist", type=int, default=0, help="IVF 군집 수 (0이면 약 4√N)")
+    parser.add_argument("--pq_m", dest="pq_m", type=int, default=32, help="PQ 부분 벡터 수 (차원의 약수)")
+    parser.add_argument("--hnsw_m", dest="hnsw_m", type=int, default=32)
+    parser.add_argument("--nprobe", dest="nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--ef_search", dest="ef_search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--length_tolerance", dest="length_tolerance", type=int, default=5,
+                        help="서버의 길이 허용 오차 (0이면 길이 구간 측정 생략)")
+    parser.add_argument("--mean_length", dest="mean_length", type=float, default=30, help="합성 코퍼스 평균 문장 길이")
+    parser.add_argument("--exact_window_size", dest="exact_window_size", type=int, default=50000,
+                        help="서버 설정 faiss_exact_window_size (구간이 이 수 이하이면 정확히 검색)")
+    parser.add_argument("--threads", dest="threads", type=int, default=0, help="FAISS OpenMP 스레드 수 (0이면 기본값)")
+    parser.add_argument("--seed", dest="seed", type=int, default=42)
+    parser.add_argument("--output", dest="output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(sys.argv[1:])
+
+    if args.threads > 0:
+        faiss.omp_set_num_threads(args.threads)
+
+    if args.embeddings:
+        corpus = np.array(np.load(args.embeddings), dtype=np.float32)
+        faiss.normalize_L2(corpus)
+        corpus, lengths = load_lengths(args.embeddings, corpus)
+    else:
+        corpus = make_corpus(args.num_vectors, args.dim, args.num_clusters, args.seed)
+        lengths = make_lengths(len(corpus), args.mean_length, args.seed)
+    queries, query_rows = make_queries(corpus, args.num_queries, args.query_noise, args.seed)
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== ANN Index Benchmark Start ==========')
+    print(f'CORPUS : {args.embeddings or "synthetic"}, VECTORS : {corpus.shape[0]}, DIM : {corpus.shape[1]}, '
+          f'QUERIES : {len(queries)}, TOP K : {args.top_k}, INDEX TYPES : {args.index_types}')
+
+    # 정확한 검색 결과 (재현율 기준)
+    flat_index = build_ann_index(corpus, "flat")
+    _, ground_truth = flat_index.search(queries, args.top_k)
+
+    # 서버와 같은 길이 구간 (오타로 쿼리 길이가 정답보다 조금 다를 수 있으므로 ±2 흔들기)
+    windows = []
+    if lengths is not None and args.length_tolerance > 0:
+        offsets = length_offsets(lengths)
+        rng = np.random.default_rng(args.seed + 3)
+        query_lengths = np.maximum(lengths[query_rows] + rng.integers(-2, 3, len(query_rows)), 1)
+        windows = [length_range(offsets, int(length), args.length_tolerance) for length in query_lengths]
+        window_sizes = np.array([end - start for start, end in windows])
+        keep = np.flatnonzero(window_sizes > 0)
+        queries, ground_truth = queries[keep], ground_truth[keep]
+        windows = [windows[i] for i in keep]
+        window_truth = [exact_range_search(corpus, queries[i:i + 1], start, end, min(args.top_k, end - start))[1][0]
+                        for i, (start, end) in enumerate(windows)]
+        print(f'LENGTH TOLERANCE : {args.length_tolerance}, WINDOW SIZE : median {int(np.median(window_sizes))}, '
+              f'min {int(window_sizes.min())}, max {int(window_sizes.max())} '
+              f'({float(np.median(window_sizes)) / len(corpus):.2%} of corpus)')
+
+    results = []
+    for index_type in args.index_types:
+        start = time.perf_counter()
+        index = flat_index if index_type == "flat" else build_ann_index(
+            corpus, index_type, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m, seed=args.seed)
+        build_seconds = time.perf_counter() - start
+        memory_mb = index_memory_bytes(index) / 1024 ** 2
+
+        if index_type in ("ivf_flat", "ivf_pq"):
+            settings = [('nprobe', value, search_parameters(index, nprobe=value)) for value in args.nprobe]
+        elif index_type == "hnsw":
+            settings = [('efSearch', value, search_parameters(index, ef_search=value)) for value in args.ef_search]
+        else:
+            settings = [('-', 0, None)]
+
+        for param_name, param_value, params in settings:
+            row = {
+                'index_type': index_type,
+                'param': param_name,
+                'param_value': param_value,
+                'build_seconds': build_seconds,
+                'memory_mb': memory_mb,
+            }
+            results.append({**row, 'window': 'none', **evaluate(index, queries, ground_truth, args.top_k, params)})
+            if not windows:
+                continue
+
+            nprobe = param_value if param_name == 'nprobe' else 16
+            ef_search = param_value if param_name == 'efSearch' else 64
+
+            def selector_search(query, start, end):
+                selector = faiss.IDSelectorRange(start, end)
+                window_params = search_parameters(index, selector, nprobe=nprobe, ef_search=ef_search)
+                return index.search(query, min(args.top_k, end - start), params=window_params)[1]
+
+            def server_search(query, start, end):
+                return search_range(index, corpus, query, start, end, args.top_k, nprobe=nprobe,
+                                    ef_search=ef_search, exact_window_size=args.exact_window_size)[1]
+
+            results.append({**row, 'window': 'selector',
+                            **evaluate_windows(selector_search, queries, windows, window_truth)})
+            results.append({**row, 'window': 'server',
+                            **evaluate_windows(server_search, queries, windows, window_truth)})
+        _now_time = datetime.now().__str__()
+        print(f'[{_now_time}] - {index_type} done (build {build_seconds:.1f}s)')
+
+    bar_length = 120
+    print('=' * bar_length)
+    print(f"{'INDEX':>8} | {'PARAM':>8} | {'VALUE':>5} | {'WINDOW':>8} | {'RECALL@' + str(args.top_k):>9} | "
+          f"{'SHORT':>6} | {'QPS':>9} | {'MEAN ms':>8} | {'MEMORY MB':>9} | {'BUILD s':>7}")
+    for r in results:
+        print(f"{r['index_type']:>8} | {r['param']:>8} | {r['param_value']:5d} | {r['window']:>8} | "
+              f"{r['recall']:9.4f} | {r['short_rate']:6.1%} | {r['qps']:9.1f} | {r['latency_mean_ms']:8.3f} | "
+              f"{r['memory_mb']:9.1f} | {r['build_seconds']:7.1f}")
+    print('=' * bar_length)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'SAVE PATH : {args.output}')
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== ANN Index Benchmark Finished ==========')
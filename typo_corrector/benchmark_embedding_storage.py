@@ -0,0 +1,172 @@
+"""
+후보 임베딩 저장 형식 벤치마크 스크립트
+
+합성 코퍼스(또는 precompute_embeddings로 만든 embeddings.npy)를 utils/embedding_store.py의
+저장 형식(float32, float16, int8)별로 임시 디렉토리에 저장하고 다음 항목을 비교합니다.
+- 디스크: 임베딩 파일과 FAISS 색인 파일 크기 (MB)
+- 로드: mmap 로드와 전체 읽기의 소요 시간 (ms)과 프로세스 RSS 증가량 (MB)
+  (mmap은 검색하며 실제로 읽은 페이지만 RSS에 잡히며, 같은 파일을 여는 워커들은 이 페이지를 공유)
+- 검색: float32 정확한 검색 대비 recall@k, 초당 쿼리 수(QPS), 검색 후 RSS 증가량 (MB)
+운영체제 페이지 캐시의 영향을 줄이려면 --drop_caches를 지정하세요 (root 권한 필요).
+
+사용법:
+    python benchmark_embedding_storage.py --num_vectors 1000000 --dim 1024
+    python benchmark_embedding_storage.py --embeddings ./embeddings/embeddings.npy --num_queries 2000
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import faiss
+import psutil
+
+from utils.ann_index import build_ann_index, read_faiss_index, index_file_name
+from utils.embedding_store import save_embeddings, load_embeddings, embeddings_file_name, STORAGE_TYPES
+
+
+def rss_mb():
+    """현재 프로세스 RSS (MB)"""
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+
+def file_mb(path):
+    return os.path.getsize(path) / 1024 ** 2
+
+
+def drop_page_cache():
+    """운영체제 페이지 캐시 비우기 (실패하면 무시)"""
+    try:
+        subprocess.run(["sync"], check=True)
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Warning: could not drop page cache: {e}")
+
+
+def measure_load(directory, storage, index_type, mmap, drop_caches):
+    """임베딩과 색인을 읽는 시간과 RSS 증가량 측정"""
+    gc.collect()
+    if drop_caches:
+        drop_page_cache()
+    before = rss_mb()
+    start = time.perf_counter()
+    embeddings = load_embeddings(directory, storage, mmap=mmap)
+    index = read_faiss_index(os.path.join(directory, index_file_name(index_type, storage)), mmap=mmap)
+    seconds = time.perf_counter() - start
+    return embeddings, index, seconds * 1000, rss_mb() - before, before
+
+
+def evaluate(index, queries, ground_truth, top_k):
+    """쿼리를 하나씩 검색하여 recall@k와 QPS 측정"""
+    found = np.empty((len(queries), top_k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, found[i] = index.search(queries[i:i + 1], top_k)
+    seconds = time.perf_counter() - start
+    recall = np.mean([len(set(f) & set(g)) / top_k for f, g in zip(found, ground_truth)])
+    return float(recall), len(queries) / seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="후보 임베딩 저장 형식 벤치마크")
+    parser.add_argument("--embeddings", dest="embeddings", type=str, default=None,
+                        help="사용할 embeddings.npy 경로 (지정하지 않으면 합성 코퍼스 생성)")
+    parser.add_argument("--num_vectors", dest="num_vectors", type=int, default=200000, help="합성 코퍼스 벡터 수")
+    parser.add_argument("--dim", dest="dim", type=int, default=1024, help="합성 코퍼스 차원 (bge-m3: 1024)")
+    parser.add_argument("--num_clusters", dest="num_clusters", type=int, default=2000, help="합성 코퍼스 군집 수")
+    parser.add_argument("--num_queries", dest="num_queries", type=int, default=500)
+    parser.add_argument("--query_noise", dest="query_noise", type=float, default=0.05, help="쿼리에 더할 잡음 크기")
+    parser.add_argument("--top_k", dest="top_k", type=int, default=10)
+    parser.add_argument("--storage", dest="storage", type=str, nargs="+", default=list(STORAGE_TYPES),
+                        choices=STORAGE_TYPES)
+    parser.add_argument("--index_type", dest="index_type", type=str, default="flat",
+                        choices=["flat", "ivf_flat", "hnsw"])
+    parser.add_argument("--work_dir", dest="work_dir", type=str, default=None,
+                        help="저장 형식별 파일을 만들 디렉토리 (기본값: 임시 디렉토리)")
+    parser.add_argument("--drop_caches", dest="drop_caches", action="store_true",
+                        help="로드 전에 페이지 캐시 비우기 (root 권한 필요)")
+    parser.add_argument("--seed", dest="seed", type=int, default=42)
+    parser.add_argument("--output", dest="output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(sys.argv[1:])
+
+    rng = np.random.default_rng(args.seed)
+    if args.embeddings:
+        corpus = np.array(np.load(args.embeddings), dtype=np.float32)
+    else:
+        centers = rng.standard_normal((args.num_clusters, args.dim), dtype=np.float32)
+        corpus = centers[rng.integers(0, args.num_clusters, args.num_vectors)]
+        corpus += 0.5 * rng.standard_normal(corpus.shape, dtype=np.float32)
+    faiss.normalize_L2(corpus)
+    queries = corpus[rng.choice(len(corpus), args.num_queries, replace=False)].copy()
+    queries += args.query_noise * rng.standard_normal(queries.shape, dtype=np.float32)
+    faiss.normalize_L2(queries)
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Embedding Storage Benchmark Start ==========')
+    print(f'CORPUS : {args.embeddings or "synthetic"}, VECTORS : {corpus.shape[0]}, DIM : {corpus.shape[1]}, '
+          f'QUERIES : {len(queries)}, TOP K : {args.top_k}, INDEX TYPE : {args.index_type}, STORAGE : {args.storage}')
+
+    # float32 정확한 검색 결과 (재현율 기준)
+    exact_index = build_ann_index(corpus, "flat")
+    _, ground_truth = exact_index.search(queries, args.top_k)
+    del exact_index
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="embedding_storage_")
+    results = []
+    for storage in args.storage:
+        directory = os.path.join(work_dir, storage)
+        os.makedirs(directory, exist_ok=True)
+        save_embeddings(directory, corpus, storage)
+        index = build_ann_index(load_embeddings(directory, storage), args.index_type, storage=storage)
+        faiss.write_index(index, os.path.join(directory, index_file_name(args.index_type, storage)))
+        del index
+
+        result = {
+            'storage': storage,
+            'embeddings_mb': file_mb(os.path.join(directory, embeddings_file_name(storage))),
+            'index_mb': file_mb(os.path.join(directory, index_file_name(args.index_type, storage))),
+        }
+        for mmap in (False, True):
+            prefix = 'mmap' if mmap else 'full'
+            embeddings, index, load_ms, load_rss_mb, base_rss = measure_load(directory, storage, args.index_type,
+                                                                             mmap, args.drop_caches)
+            recall, qps = evaluate(index, queries, ground_truth, args.top_k)
+            result.update({
+                f'{prefix}_load_ms': load_ms,
+                f'{prefix}_load_rss_mb': load_rss_mb,
+                f'{prefix}_search_rss_mb': rss_mb() - base_rss,
+                'recall': recall,
+                f'{prefix}_qps': qps,
+            })
+            del embeddings, index
+        results.append(result)
+        _now_time = datetime.now().__str__()
+        print(f'[{_now_time}] - {storage} done')
+
+    bar_length = 118
+    print('=' * bar_length)
+    print(f"{'STORAGE':>8} | {'EMB MB':>8} | {'INDEX MB':>8} | {'RECALL@' + str(args.top_k):>9} | "
+          f"{'FULL LOAD ms':>12} | {'FULL RSS MB':>11} | {'MMAP LOAD ms':>12} | {'MMAP RSS MB':>11} | "
+          f"{'MMAP QPS':>9}")
+    for r in results:
+        print(f"{r['storage']:>8} | {r['embeddings_mb']:8.1f} | {r['index_mb']:8.1f} | {r['recall']:9.4f} | "
+              f"{r['full_load_ms']:12.1f} | {r['full_search_rss_mb']:11.1f} | {r['mmap_load_ms']:12.1f} | "
+              f"{r['mmap_search_rss_mb']:11.1f} | {r['mmap_qps']:9.1f}")
+    print('=' * bar_length)
+    print(f'WORK DIR : {work_dir}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'SAVE PATH : {args.output}')
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Embedding Storage Benchmark Finished ==========')
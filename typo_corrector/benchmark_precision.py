@@ -0,0 +1,192 @@
+"""
+교정 모델 추론 정밀도(fp32 / int8 / bf16) 비교 벤치마크 스크립트
+
+정밀도 모드별로 모델을 로드하여 평가용(held-out) 데이터에서 다음 항목을 측정합니다.
+- 지연 시간: 문장 하나씩 generate를 호출했을 때의 평균/p50/p95 (ms)
+- 처리량: batch_size개씩 묶어 generate를 호출했을 때의 초당 문장 수
+- 메모리: 직렬화한 모델 가중치 크기와 로드 전후 프로세스 RSS 증가량 (MB)
+- 품질: 모델 첫 번째 예측의 평균 F0.5와 정확한 문자열 일치율, fp32 대비 차이
+모든 측정은 서빙 기본 설정에서 샘플링만 끈 결정적 빔 서치(BENCHMARK_GENERATION_KWARGS)로 생성하므로,
+품질 차이에 샘플링 잡음이 섞이지 않고 정밀도에 따른 차이만 나타납니다.
+
+사용법:
+    python benchmark_precision.py --model_path ./models --test_file ./data/datasets/dataset_valid.json
+"""
+
+import io
+import gc
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime
+
+import psutil
+import torch
+
+from utils.model_loader import load_seq2seq_model
+from utils.generation_utils import generate_predictions, DEFAULT_GENERATION_KWARGS
+from utils.precision_utils import PRECISION_MODES
+from utils.eval_utils import calc_precision_recall_f05
+
+# 서빙 기본 생성 파라미터에서 샘플링만 끈 결정적 빔 서치 (temperature는 샘플링에서만 사용)
+BENCHMARK_GENERATION_KWARGS = {
+    **{key: value for key, value in DEFAULT_GENERATION_KWARGS.items() if key != "temperature"},
+    "do_sample": False,
+}
+
+
+def load_pairs(test_file, eval_length=None, seed=42):
+    """
+    평가 데이터 파일에서 (오류 문장, 정답 문장) 쌍 로드
+
+    Args:
+        test_file (str): 평가 데이터 파일 경로
+        eval_length (int): 사용할 문장 수 (기본값: None, 전체)
+        seed (int): 표본 추출 시드
+
+    Returns:
+        list: (err_sentence, cor_sentence) 튜플 리스트
+    """
+    with open(test_file, 'r') as f:
+        json_dataset = json.load(f)
+    pairs = [(str(data['annotation']['err_sentence']), str(data['annotation']['cor_sentence']))
+             for data in json_dataset['data']]
+    if eval_length and eval_length < len(pairs):
+        pairs = random.Random(seed).sample(pairs, eval_length)
+    return pairs
+
+
+def model_size_mb(model):
+    """직렬화한 모델 가중치(state_dict) 크기 (MB)"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def percentile(values, q):
+    """정렬된 값 리스트의 q 분위수 (최근접 순위)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(q * len(values))) - 1))
+    return values[index]
+
+
+def benchmark_mode(precision, model_path, pairs, device, batch_size=8, max_input_length=128, ngram=2):
+    """
+    정밀도 모드 하나의 지연 시간, 처리량, 메모리, 품질 측정
+
+    Returns:
+        dict: 측정 결과
+    """
+    process = psutil.Process(os.getpid())
+    gc.collect()
+    rss_before = process.memory_info().rss
+
+    model, tokenizer = load_seq2seq_model(model_path, device, precision)
+    rss_after = process.memory_info().rss
+    texts = [err for err, _ in pairs]
+
+    # 예열 (첫 호출의 초기화 비용 제외)
+    generate_predictions(model, tokenizer, texts[:1], device, max_input_length=max_input_length,
+                         generation_kwargs=BENCHMARK_GENERATION_KWARGS, precision=precision)
+
+    # 단건 지연 시간 및 품질 (결정적 빔 서치)
+    latencies = []
+    f_05_list = []
+    exact_match_list = []
+    for err_sentence, cor_sentence in pairs:
+        start = time.perf_counter()
+        predictions = generate_predictions(model, tokenizer, [err_sentence], device,
+                                           max_input_length=max_input_length,
+                                           generation_kwargs=BENCHMARK_GENERATION_KWARGS, precision=precision)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        _, _, f_05 = calc_precision_recall_f05(cor_sentence, predictions[0], ngram)
+        f_05_list.append(f_05)
+        exact_match_list.append(1.0 if predictions[0] == cor_sentence else 0.0)
+
+    # 배치 처리량
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        generate_predictions(model, tokenizer, texts[i:i + batch_size], device,
+                             max_input_length=max_input_length, generation_kwargs=BENCHMARK_GENERATION_KWARGS,
+                             precision=precision)
+    throughput = len(texts) / (time.perf_counter() - start)
+
+    result = {
+        'precision': precision,
+        'latency_mean_ms': sum(latencies) / len(latencies),
+        'latency_p50_ms': percentile(sorted(latencies), 0.5),
+        'latency_p95_ms': percentile(sorted(latencies), 0.95),
+        'throughput_sps': throughput,
+        'model_size_mb': model_size_mb(model),
+        'rss_delta_mb': (rss_after - rss_before) / (1024 * 1024),
+        'f_05': sum(f_05_list) / len(f_05_list),
+        'exact_match': sum(exact_match_list) / len(exact_match_list),
+    }
+
+    del model, tokenizer
+    gc.collect()
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="교정 모델 추론 정밀도 비교 벤치마크")
+    parser.add_argument("--model_path", dest="model_path", type=str, default="./models")
+    parser.add_argument("--test_file", dest="test_file", type=str, required=True, help="평가(held-out) 데이터 파일 경로")
+    parser.add_argument("--eval_length", dest="eval_length", type=int, default=200, help="평가할 문장 수 (기본값: 200)")
+    parser.add_argument("--modes", dest="modes", type=str, nargs="+", default=list(PRECISION_MODES),
+                        choices=PRECISION_MODES, help="비교할 정밀도 모드 (기본값: 전체)")
+    parser.add_argument("--batch_size", dest="batch_size", type=int, default=8, help="처리량 측정 배치 크기 (기본값: 8)")
+    parser.add_argument("--threads", dest="threads", type=int, default=0, help="torch intra-op 스레드 수 (0이면 기본값)")
+    parser.add_argument("--ngram", dest="ngram", type=int, default=2, help="F0.5 계산 n-gram 크기 (기본값: 2)")
+    parser.add_argument("--seed", dest="seed", type=int, default=42)
+    parser.add_argument("--output", dest="output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(sys.argv[1:])
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    device = torch.device("cpu")
+    pairs = load_pairs(args.test_file, args.eval_length, args.seed)
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Precision Benchmark Start ==========')
+    print(f'MODEL PATH : {args.model_path}, FILE PATH : {args.test_file}, DATA LENGTH : {len(pairs)}, '
+          f'MODES : {args.modes}, BATCH SIZE : {args.batch_size}, THREADS : {torch.get_num_threads()}')
+
+    results = []
+    for precision in args.modes:
+        result = benchmark_mode(precision, args.model_path, pairs, device, batch_size=args.batch_size,
+                                ngram=args.ngram)
+        results.append(result)
+        _now_time = datetime.now().__str__()
+        print(f'[{_now_time}] - {precision} done')
+
+    # fp32 대비 품질 차이
+    baseline = next((r for r in results if r['precision'] == 'fp32'), None)
+    for result in results:
+        result['f_05_delta'] = result['f_05'] - baseline['f_05'] if baseline else None
+        result['exact_match_delta'] = result['exact_match'] - baseline['exact_match'] if baseline else None
+
+    bar_length = 100
+    print('=' * bar_length)
+    print(f"{'MODE':>6} | {'MEAN ms':>8} | {'P50 ms':>8} | {'P95 ms':>8} | {'SENT/s':>7} | {'SIZE MB':>8} | "
+          f"{'RSS MB':>7} | {'F0.5':>6} | {'dF0.5':>7} | {'EM':>6} | {'dEM':>7}")
+    for r in results:
+        f_05_delta = f"{r['f_05_delta']:+7.3f}" if r['f_05_delta'] is not None else f"{'-':>7}"
+        em_delta = f"{r['exact_match_delta']:+7.3f}" if r['exact_match_delta'] is not None else f"{'-':>7}"
+        print(f"{r['precision']:>6} | {r['latency_mean_ms']:8.1f} | {r['latency_p50_ms']:8.1f} | "
+              f"{r['latency_p95_ms']:8.1f} | {r['throughput_sps']:7.2f} | {r['model_size_mb']:8.1f} | "
+              f"{r['rss_delta_mb']:7.1f} | {r['f_05']:6.3f} | {f_05_delta} | {r['exact_match']:6.3f} | {em_delta}")
+    print('=' * bar_length)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'SAVE PATH : {args.output}')
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Precision Benchmark Finished ==========')
@@ -0,0 +1,195 @@
+"""
+입력 복사 기반 추측 디코딩 벤치마크 스크립트
+
+같은 greedy 생성 설정으로 model.generate와 speculative_generate(utils/speculative_decoding.py)를
+문장 하나씩 실행하여 다음 항목을 비교합니다.
+- 처리 속도: 초당 생성 토큰 수와 문장당 평균 지연 시간 (ms), 일반 greedy 대비 속도 향상 배수
+- 정확성: 두 방식의 생성 토큰이 완전히 같은 문장 비율 (1.0이어야 함)
+- 초안 효율: 초안 토큰 수락 비율과 생성 토큰당 디코더 forward 횟수
+- 배치 처리량: 마이크로 배처의 배치 크기(--batch_sizes)별로 배치 generate 한 번과
+  문장별 추측 디코딩의 초당 문장 수 비교 (서버는 한 문장짜리 배치에서만 추측 디코딩 사용)
+- 배치 일치율: 서버의 배치 generate(generate_predictions, 행별 길이 제한)와 추측 디코딩 결과 문장이
+  같은 비율 (1.0이어야 하며, 최대 길이에 도달한 문장도 배치 크기와 관계없이 같아야 함)
+추측 디코딩은 greedy 전용이므로 모든 비교는 greedy 프로파일로 수행합니다 (빔 서치 full 프로파일에는 적용되지 않음).
+
+사용법:
+    python benchmark_speculative.py --model_path ./models --test_file ./data/datasets/dataset_valid.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime
+
+import torch
+
+from utils.model_loader import load_seq2seq_model
+from utils.lookup_table import load_sentence_pairs
+from utils.generation_budget import GENERATION_PROFILES
+from utils.generation_utils import generate_predictions, row_length_bounds, DEFAULT_GENERATION_KWARGS
+from utils.speculative_decoding import speculative_generate
+
+
+def greedy_generate(model, input_ids, attention_mask, max_length, min_length, generation_kwargs):
+    """model.generate로 greedy 생성 (비교 기준)"""
+    res = model.generate(input_ids=input_ids, attention_mask=attention_mask, max_length=max_length,
+                         min_length=min_length, **generation_kwargs).cpu().tolist()
+    eos_token_id = model.generation_config.eos_token_id
+    # 종료 토큰 뒤의 패딩 제거
+    return [r[:r.index(eos_token_id) + 1] if eos_token_id in r else r for r in res]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="입력 복사 기반 추측 디코딩 벤치마크")
+    parser.add_argument("--model_path", dest="model_path", type=str, default="./models")
+    parser.add_argument("--test_file", dest="test_file", type=str, required=True, help="평가(held-out) 데이터 파일 경로")
+    parser.add_argument("--eval_length", dest="eval_length", type=int, default=200, help="평가할 문장 수 (기본값: 200)")
+    parser.add_argument("--draft_tokens", dest="draft_tokens", type=int, nargs="+", default=[4, 8, 16],
+                        help="비교할 초안 토큰 수 (기본값: 4 8 16)")
+    parser.add_argument("--batch_sizes", dest="batch_sizes", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="배치 처리량을 비교할 배치 크기 (기본값: 1 2 4 8, batch_max_size까지)")
+    parser.add_argument("--batch_draft_tokens", dest="batch_draft_tokens", type=int, default=8,
+                        help="배치 처리량 비교에 사용할 초안 토큰 수 (기본값: 8)")
+    parser.add_argument("--max_input_length", dest="max_input_length", type=int, default=128)
+    parser.add_argument("--threads", dest="threads", type=int, default=0, help="torch intra-op 스레드 수 (0이면 기본값)")
+    parser.add_argument("--seed", dest="seed", type=int, default=42)
+    parser.add_argument("--output", dest="output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(sys.argv[1:])
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    device = torch.device("cpu")
+
+    pairs = load_sentence_pairs([args.test_file])
+    if args.eval_length and args.eval_length < len(pairs):
+        pairs = random.Random(args.seed).sample(pairs, args.eval_length)
+    texts = [err for err, _ in pairs]
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Speculative Decoding Benchmark Start ==========')
+    print(f'MODEL PATH : {args.model_path}, FILE PATH : {args.test_file}, DATA LENGTH : {len(texts)}, '
+          f'DRAFT TOKENS : {args.draft_tokens}, THREADS : {torch.get_num_threads()}')
+
+    model, tokenizer = load_seq2seq_model(args.model_path, device)
+    gen_kwargs = {**DEFAULT_GENERATION_KWARGS, **GENERATION_PROFILES["greedy"]}
+    # greedy 디코딩에서 쓰이지 않는 샘플링/빔 파라미터 제외
+    for key in ("temperature", "length_penalty"):
+        gen_kwargs.pop(key, None)
+
+    inputs = []
+    for text in texts:
+        encoded = tokenizer(text, max_length=args.max_input_length, truncation=True, return_tensors="pt")
+        length = encoded["input_ids"].size(1)
+        inputs.append((encoded["input_ids"].to(device), encoded["attention_mask"].to(device),
+                       length + 2, max(1, length - 5)))
+
+    # 예열 (첫 호출의 초기화 비용 제외)
+    with torch.no_grad():
+        greedy_generate(model, *inputs[0], gen_kwargs)
+
+    # 일반 greedy 생성
+    references = []
+    start = time.perf_counter()
+    with torch.no_grad():
+        for input_ids, attention_mask, max_length, min_length in inputs:
+            references.append(greedy_generate(model, input_ids, attention_mask, max_length, min_length,
+                                              gen_kwargs)[0])
+    baseline_seconds = time.perf_counter() - start
+    baseline_tokens = sum(len(r) - 1 for r in references)
+
+    results = [{
+        'method': 'greedy',
+        'draft_tokens': 0,
+        'tokens_per_sec': baseline_tokens / baseline_seconds,
+        'latency_mean_ms': baseline_seconds * 1000 / len(inputs),
+        'speedup': 1.0,
+        'match_rate': 1.0,
+        'acceptance_rate': None,
+        'forwards_per_token': 1.0,
+    }]
+
+    for num_draft_tokens in args.draft_tokens:
+        stats = {}
+        matches = 0
+        start = time.perf_counter()
+        for (input_ids, attention_mask, max_length, min_length), reference in zip(inputs, references):
+            sequence = speculative_generate(model, input_ids, attention_mask, max_length, min_length=min_length,
+                                            generation_kwargs=gen_kwargs, num_draft_tokens=num_draft_tokens,
+                                            stats=stats)[0]
+            matches += int(sequence == reference)
+        seconds = time.perf_counter() - start
+
+        results.append({
+            'method': 'speculative',
+            'draft_tokens': num_draft_tokens,
+            'tokens_per_sec': stats['generated_tokens'] / seconds,
+            'latency_mean_ms': seconds * 1000 / len(inputs),
+            'speedup': baseline_seconds / seconds,
+            'match_rate': matches / len(inputs),
+            'acceptance_rate': stats['accepted_draft_tokens'] / max(1, stats['generated_tokens']),
+            'forwards_per_token': stats['forward_passes'] / max(1, stats['generated_tokens']),
+        })
+        _now_time = datetime.now().__str__()
+        print(f'[{_now_time}] - draft tokens {num_draft_tokens} done')
+
+    # 배치 크기별 처리량 (배처가 모은 배치를 generate 한 번으로 처리 vs 문장별 추측 디코딩)
+    batch_results = []
+    for batch_size in args.batch_sizes:
+        chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        greedy_outputs = []
+        start = time.perf_counter()
+        for chunk in chunks:
+            greedy_outputs.extend(predictions[0] for predictions in generate_predictions(
+                model, tokenizer, chunk, device, max_input_length=args.max_input_length, generation_kwargs=gen_kwargs))
+        greedy_seconds = time.perf_counter() - start
+
+        speculative_outputs = []
+        start = time.perf_counter()
+        with torch.no_grad():
+            for chunk in chunks:
+                batch = tokenizer(chunk, max_length=args.max_input_length, truncation=True, padding=True,
+                                  return_tensors="pt")
+                min_lengths, max_lengths = row_length_bounds(batch["attention_mask"].sum(dim=1).tolist())
+                sequences = speculative_generate(model, batch["input_ids"].to(device),
+                                                 batch["attention_mask"].to(device), max_lengths,
+                                                 min_length=min_lengths, generation_kwargs=gen_kwargs,
+                                                 num_draft_tokens=args.batch_draft_tokens)
+                speculative_outputs.extend(d.strip() for d in tokenizer.batch_decode(sequences,
+                                                                                     skip_special_tokens=True))
+        speculative_seconds = time.perf_counter() - start
+
+        batch_results.append({
+            'batch_size': batch_size,
+            'greedy_sps': len(texts) / greedy_seconds,
+            'speculative_sps': len(texts) / speculative_seconds,
+            'speedup': greedy_seconds / speculative_seconds,
+            'match_rate': sum(g == s for g, s in zip(greedy_outputs, speculative_outputs)) / len(texts),
+        })
+        _now_time = datetime.now().__str__()
+        print(f'[{_now_time}] - batch size {batch_size} done')
+
+    bar_length = 100
+    print('=' * bar_length)
+    print(f"{'METHOD':>11} | {'DRAFT':>5} | {'TOKENS/s':>9} | {'MEAN ms':>8} | {'SPEEDUP':>7} | "
+          f"{'MATCH':>6} | {'ACCEPT':>6} | {'FWD/TOKEN':>9}")
+    for r in results:
+        acceptance = f"{r['acceptance_rate']:6.3f}" if r['acceptance_rate'] is not None else f"{'-':>6}"
+        print(f"{r['method']:>11} | {r['draft_tokens']:5d} | {r['tokens_per_sec']:9.1f} | "
+              f"{r['latency_mean_ms']:8.1f} | {r['speedup']:7.2f} | {r['match_rate']:6.3f} | {acceptance} | "
+              f"{r['forwards_per_token']:9.3f}")
+    print('=' * bar_length)
+    print(f"{'BATCH':>5} | {'GREEDY SENT/s':>13} | {'SPECULATIVE SENT/s':>18} | {'SPEEDUP':>7} | {'MATCH':>6}")
+    for r in batch_results:
+        print(f"{r['batch_size']:5d} | {r['greedy_sps']:13.2f} | {r['speculative_sps']:18.2f} | {r['speedup']:7.2f} | "
+              f"{r['match_rate']:6.3f}")
+    print('=' * bar_length)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'sentence': results, 'batch': batch_results}, f, ensure_ascii=False, indent=2)
+        print(f'SAVE PATH : {args.output}')
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Speculative Decoding Benchmark Finished ==========')
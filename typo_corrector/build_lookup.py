@@ -0,0 +1,35 @@
+"""
+오류 문장 → 정답 문장 조회 테이블 생성 스크립트
+
+설정 파일의 train_data_path_list와 candidate_data_path_list에 있는 err_sentence/cor_sentence 쌍으로
+메모리 매핑 가능한 조회 테이블을 만듭니다. app.py는 이 테이블을 seq2seq 모델보다 먼저 조회합니다.
+"""
+
+from omegaconf import OmegaConf
+from datetime import datetime
+import argparse
+import sys
+from utils.lookup_table import load_sentence_pairs, build_lookup_table
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="오류 문장 조회 테이블 생성 스크립트")
+    parser.add_argument('--config-file', type=str, default="./config/base-config.yaml", help="학습 설정 파일 경로")
+    parser.add_argument('--output_dir', type=str, default="./lookup", help="조회 테이블 출력 디렉토리 (기본값: ./lookup)")
+    args = parser.parse_args(sys.argv[1:])
+
+    config = OmegaConf.load(args.config_file)
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Build Lookup Table Start ==========')
+
+    # 학습 데이터와 후보 데이터의 문장 쌍 로드 (중복 파일은 한 번만)
+    data_path_list = list(dict.fromkeys(list(config.train_data_path_list) + list(config.candidate_data_path_list)))
+    pairs = load_sentence_pairs(data_path_list, src_col=config.src_col, tgt_col=config.tgt_col)
+
+    meta = build_lookup_table(pairs, args.output_dir)
+    print(f"PAIRS : {meta['num_pairs']}, KEYS : {meta['num_keys']}, JAMO KEYS : {meta['num_jamo_keys']}, "
+          f"VALUES : {meta['num_values']}, AMBIGUOUS KEYS : {meta['ambiguous_keys']}")
+    print(f'SAVE PATH : {args.output_dir}')
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Build Lookup Table Finished ==========')
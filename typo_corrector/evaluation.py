@@ -18,8 +18,13 @@ from datetime import datetime
 import argparse
 import random
 from utils.embedding_manager import FastEmbeddingManager
+from utils.embedding_store import available_storage
 from utils.correction_utils import find_best_correction
 from utils.eval_utils import calc_precision_recall_f05
+from utils.precision_utils import PRECISION_MODES, apply_precision, precision_context
+from utils.onnx_backend import load_onnx_model
+from utils.generation_utils import generate_predictions
+from utils.generation_budget import GENERATION_PROFILES
 
 
 def load_datasets(test_file, candidate_file='./data/datasets/dataset_candidate.json'):
@@ -64,8 +69,47 @@ def load_datasets(test_file, candidate_file='./data/datasets/dataset_candidate.j
     return datasets.DatasetDict(dataset_dict), candidates
 
 
+def generate_nbest(model, tokenizer, err_sentence, device, precision="fp32"):
+    """
+    빔 서치와 샘플링으로 오류 문장의 예측 문장 5개 생성
+
+    Args:
+        model: Seq2Seq 모델
+        tokenizer: 토크나이저
+        err_sentence (str): 오류 문장
+        device (torch.device): 모델이 올라간 디바이스
+        precision (str): 모델 추론 정밀도 (기본값: "fp32")
+
+    Returns:
+        list: 예측 문장 리스트
+    """
+    # 문장 토큰화
+    tokenized = tokenizer(err_sentence, return_tensors='pt')
+    input_ids = tokenized['input_ids'].to(device)
+
+    # 모델로 여러 개의 문장 생성
+    with torch.no_grad(), precision_context(precision, device):
+        res = model.generate(
+            inputs=input_ids,
+            num_beams=10,
+            num_return_sequences=5,
+            do_sample=True,
+            temperature=0.7,
+            repetition_penalty=2.5,
+            length_penalty=0.5,
+            no_repeat_ngram_size=3,
+            max_length=input_ids.size()[1] + 2,
+            early_stopping=True,
+            min_length=max(1, input_ids.size()[1] - 5)
+        ).cpu().tolist()
+
+    # 생성된 문장 디코딩
+    return [tokenizer.decode(r, skip_special_tokens=True).strip() for r in res]
+
+
 def my_train(gpus='cpu', model_path=None, test_file=None, eval_length=None, save_path=None, pb=False,
-             embedding_model="BAAI/bge-m3", precomputed_dir=None, precompute=False, ngram=2):
+             embedding_model="BAAI/bge-m3", precomputed_dir=None, precompute=False, ngram=2, precision="fp32",
+             backend="torch", onnx_dir=None, speculative=False, num_draft_tokens=8):
     """
     모델을 로드하고 평가를 수행하여 결과를 저장 - 개선된 하이브리드 방식
     모델 예측이 정확한 경우 그대로 유지하고, 오류인 경우에만 레이블 최적화 적용
@@ -81,6 +125,11 @@ def my_train(gpus='cpu', model_path=None, test_file=None, eval_length=None, save
         precomputed_dir (str): 미리 계산된 임베딩 디렉토리 (기본값: None)
         precompute (bool): 임베딩 미리 계산 여부 (기본값: False)
         ngram (int): n-gram 크기 (기본값: 2)
+        precision (str): 모델 추론 정밀도 ("fp32", "int8", "bf16", 기본값: "fp32")
+        backend (str): 추론 백엔드 ("torch" 또는 "onnx", 기본값: "torch")
+        onnx_dir (str): export_onnx.py로 내보낸 ONNX 그래프 디렉토리 (기본값: None)
+        speculative (bool): 빔 서치 대신 입력 복사 기반 추측 디코딩(greedy) 사용 여부 (기본값: False)
+        num_draft_tokens (int): 추측 디코딩에서 한 번에 검증할 최대 초안 토큰 수 (기본값: 8)
     """
     # 필요한 패키지 설치 확인
     try:
@@ -108,7 +157,7 @@ def my_train(gpus='cpu', model_path=None, test_file=None, eval_length=None, save
             embedding_manager.candidates = candidates
 
         # 임베딩 미리 계산 (요청된 경우)
-        if precompute and precomputed_dir and not os.path.exists(os.path.join(precomputed_dir, 'embeddings.npy')):
+        if precompute and precomputed_dir and not available_storage(precomputed_dir):
             print("Precomputing embeddings...")
             output_dir = precomputed_dir
             os.makedirs(output_dir, exist_ok=True)
@@ -120,8 +169,15 @@ def my_train(gpus='cpu', model_path=None, test_file=None, eval_length=None, save
         print("Falling back to non-embedding methods.")
 
     # 모델 로드
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_path, num_labels=2)
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    if backend == "onnx":
+        # onnxruntime CPU 공급자로 실행 (int8은 양자화 그래프 사용)
+        if precision == "bf16":
+            print("Error: bf16 precision is not supported by the onnx backend.")
+            sys.exit(1)
+        model, tokenizer = load_onnx_model(onnx_dir, quantized=precision == "int8")
+    else:
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_path, num_labels=2)
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
 
     # 평가 데이터 설정
     if eval_length and eval_length < len(dataset['test']):
@@ -132,8 +188,13 @@ def my_train(gpus='cpu', model_path=None, test_file=None, eval_length=None, save
         data_len = len(dataset['test'])
 
     # 디바이스 설정
-    device = torch.device(gpus)
-    model.to(device)
+    if backend == "onnx":
+        device = torch.device('cpu')
+    else:
+        device = torch.device(gpus)
+        model.to(device)
+        model.eval()
+        model = apply_precision(model, precision, device)
 
     # 결과 저장 리스트
     err_sentence_list = []
@@ -160,27 +221,13 @@ def my_train(gpus='cpu', model_path=None, test_file=None, eval_length=None, save
         cor_sentence = dataset['test'][n]['cor_sentence']
         cor_sentence_list.append(cor_sentence)
 
-        # 문장 토큰화
-        tokenized = tokenizer(err_sentence, return_tensors='pt')
-        input_ids = tokenized['input_ids'].to(device)
-
-        # 모델로 여러 개의 문장 생성
-        res = model.generate(
-            inputs=input_ids,
-            num_beams=10,
-            num_return_sequences=5,
-            do_sample=True,
-            temperature=0.7,
-            repetition_penalty=2.5,
-            length_penalty=0.5,
-            no_repeat_ngram_size=3,
-            max_length=input_ids.size()[1] + 2,
-            early_stopping=True,
-            min_length=max(1, input_ids.size()[1] - 5)
-        ).cpu().tolist()
-
-        # 생성된 문장 디코딩
-        predictions = [tokenizer.decode(r, skip_special_tokens=True).strip() for r in res]
+        if speculative:
+            # greedy 디코딩을 입력 복사 초안으로 가속 (예측 문장 1개)
+            predictions = generate_predictions(model, tokenizer, [err_sentence], device,
+                                               generation_kwargs=GENERATION_PROFILES["greedy"], precision=precision,
+                                               speculative=True, num_draft_tokens=num_draft_tokens)[0]
+        else:
+            predictions = generate_nbest(model, tokenizer, err_sentence, device, precision)
         model_pred_list.append(predictions[0])  # 첫 번째 예측 저장
 
         # 모델 예측과 정답이 이미 일치하는지 확인
@@ -343,6 +390,16 @@ if __name__ == '__main__':
                         help="임베딩을 미리 계산하고 저장합니다")
     parser.add_argument("--ngram", dest="ngram", type=int, default=2,
                         help="성능 평가에 사용할 n-gram 크기 (기본값: 2)")
+    parser.add_argument("--precision", dest="precision", type=str, default="fp32", choices=PRECISION_MODES,
+                        help="모델 추론 정밀도: fp32, int8(Linear 동적 양자화, CPU 전용), bf16(autocast) (기본값: fp32)")
+    parser.add_argument("--backend", dest="backend", type=str, default="torch", choices=("torch", "onnx"),
+                        help="추론 백엔드: torch 또는 onnx(onnxruntime CPU) (기본값: torch)")
+    parser.add_argument("--onnx_dir", dest="onnx_dir", type=str, default=None,
+                        help="export_onnx.py로 내보낸 ONNX 그래프 디렉토리 (onnx 백엔드)")
+    parser.add_argument("--speculative", dest="speculative", action="store_true",
+                        help="빔 서치 대신 입력 복사 기반 추측 디코딩(greedy, 예측 1개) 사용")
+    parser.add_argument("--draft_tokens", dest="draft_tokens", type=int, default=8,
+                        help="추측 디코딩에서 한 번에 검증할 최대 초안 토큰 수 (기본값: 8)")
     parser.add_argument("-pb", dest="pb", action="store_true")
     args = parser.parse_args(sys.argv[1:])
 
@@ -369,6 +426,9 @@ if __name__ == '__main__':
         f'PRECOMPUTED DIR: {args.precomputed_dir}, '
         f'PRECOMPUTE: {args.precompute}, '
         f'NGRAM: {args.ngram}, '
+        f'PRECISION: {args.precision}, '
+        f'BACKEND: {args.backend}, '
+        f'SPECULATIVE: {args.speculative}, '
         f'SAVE PATH : {save_path}'
     )
     my_train(
@@ -381,7 +441,12 @@ if __name__ == '__main__':
         embedding_model=args.embedding_model,
         precomputed_dir=args.precomputed_dir,
         precompute=args.precompute,
-        ngram=args.ngram
+        ngram=args.ngram,
+        precision=args.precision,
+        backend=args.backend,
+        onnx_dir=args.onnx_dir,
+        speculative=args.speculative,
+        num_draft_tokens=args.draft_tokens
     )
     _now_time = datetime.now().__str__()
     print(f'[{_now_time}] ========== Evaluation Finished ==========')
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+교정 모델 ONNX 내보내기 스크립트
+
+train.py로 학습한 체크포인트를 인코더 ONNX 그래프와 KV 캐시 디코더 ONNX 그래프로 내보냅니다.
+--quantize를 지정하면 가중치를 int8로 동적 양자화한 그래프도 함께 저장하고,
+--parity_file을 지정하면 내보낸 그래프와 torch 모델의 n-best 예측이 같은지 확인합니다.
+
+사용법:
+    python export_onnx.py --model_path ./models --output_dir ./models/onnx --parity_file ./data/test.json
+"""
+
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from datetime import datetime
+import argparse
+import random
+import json
+import sys
+import torch
+from utils.onnx_backend import export_onnx, load_onnx_model, check_parity
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="교정 모델 ONNX 내보내기 스크립트")
+    parser.add_argument("--model_path", dest="model_path", type=str, required=True, help="학습된 체크포인트 경로")
+    parser.add_argument("--output_dir", dest="output_dir", type=str, default="./models/onnx",
+                        help="ONNX 그래프 저장 디렉토리 (기본값: ./models/onnx)")
+    parser.add_argument("--quantize", dest="quantize", action="store_true", help="int8 동적 양자화 그래프도 저장")
+    parser.add_argument("--parity_file", dest="parity_file", type=str, default=None,
+                        help="n-best 일치 확인에 사용할 데이터 파일 (err_sentence 사용)")
+    parser.add_argument("--parity_length", dest="parity_length", type=int, default=100,
+                        help="일치 확인에 사용할 문장 수 (기본값: 100)")
+    parser.add_argument("--max_input_length", dest="max_input_length", type=int, default=128)
+    args = parser.parse_args(sys.argv[1:])
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== ONNX Export Start ==========')
+    print(f'MODEL PATH : {args.model_path}, OUTPUT DIR : {args.output_dir}, QUANTIZE : {args.quantize}')
+
+    for path in export_onnx(args.model_path, args.output_dir, quantize=args.quantize):
+        print(f'SAVE PATH : {path}')
+
+    if args.parity_file:
+        with open(args.parity_file, 'r') as f:
+            texts = [str(data['annotation']['err_sentence']) for data in json.load(f)['data']]
+        if args.parity_length and args.parity_length < len(texts):
+            texts = random.Random(42).sample(texts, args.parity_length)
+
+        device = torch.device('cpu')
+        reference_model = AutoModelForSeq2SeqLM.from_pretrained(args.model_path).to(device).eval()
+        tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+
+        # 양자화 그래프는 가중치가 달라 예측이 달라질 수 있으므로 참고용으로만 출력
+        variants = [("fp32", False)] + ([("int8", True)] if args.quantize else [])
+        failed = False
+        for name, quantized in variants:
+            onnx_model, _ = load_onnx_model(args.output_dir, quantized=quantized)
+            result = check_parity(reference_model, onnx_model, tokenizer, texts, device,
+                                  max_input_length=args.max_input_length)
+            print(f'[{name}] TEXTS : {result["num_texts"]}, N-BEST MATCH : {result["nbest_match_rate"]:.3f}, '
+                  f'TOP-1 MATCH : {result["top1_match_rate"]:.3f}')
+            for mismatch in result["mismatches"]:
+                print(f'    > TEXT : {mismatch["text"]}')
+                print(f'    >   TORCH : {mismatch["torch"]}')
+                print(f'    >    ONNX : {mismatch["onnx"]}')
+            if not quantized and result["nbest_match_rate"] < 1.0:
+                failed = True
+
+        if failed:
+            print('Error: ONNX n-best predictions differ from the torch model.')
+            sys.exit(1)
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== ONNX Export Finished ==========')
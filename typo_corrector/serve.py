@@ -0,0 +1,334 @@
+"""
+pre-fork 멀티 워커 서빙 스크립트
+
+마스터 프로세스에서 app.load_components()로 교정 모델, 토크나이저, 후보 문장, 임베딩 모델과 FAISS 색인을 한 번만 로드하고,
+GC를 고정(gc.freeze)한 뒤 워커 프로세스를 fork합니다. 워커들은 마스터의 메모리 페이지를 copy-on-write로 공유하므로
+워커 수를 늘려도 메모리 사용량이 비례해서 늘어나지 않습니다.
+각 워커에는 torch intra-op/inter-op 스레드 수를 명시적으로 지정하여 코어 과다 구독을 막습니다.
+재로드(SIGHUP, 워커의 POST /admin/reload, reload_watch)는 워커마다 따로 하지 않고 마스터가 구성 요소를 다시 로드한 뒤
+워커를 하나씩 다시 fork합니다(롤링 재시작). 새 워커가 예열을 마치면 이전 워커를 종료하므로 공유는 유지되고
+재로드 중에도 요청을 계속 처리합니다.
+
+사용법:
+    python serve.py --workers 4 --threads-per-worker 2
+    kill -HUP <마스터 pid>  # 롤링 재시작
+"""
+
+import os
+import gc
+import sys
+import time
+import select
+import signal
+import socket
+import argparse
+from datetime import datetime
+
+# fork 이후 토크나이저 병렬 처리로 인한 교착 방지
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import torch
+
+
+def create_socket(host, port, backlog=2048):
+    """
+    워커들이 공유할 리스닝 소켓 생성
+
+    Args:
+        host (str): 바인딩할 호스트
+        port (int): 바인딩할 포트
+        backlog (int): 연결 대기열 크기
+
+    Returns:
+        socket.socket: 리스닝 소켓
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def worker_cores(worker_id, num_workers):
+    """
+    워커에 할당할 CPU 코어 목록 계산 (사용 가능한 코어를 워커 수로 균등 분할)
+
+    Args:
+        worker_id (int): 워커 번호
+        num_workers (int): 전체 워커 수
+
+    Returns:
+        list: 코어 번호 리스트
+    """
+    cores = sorted(os.sched_getaffinity(0))
+    per_worker = max(1, len(cores) // num_workers)
+    start = (worker_id * per_worker) % len(cores)
+    return cores[start:start + per_worker]
+
+
+def run_worker(worker_id, sock, app, num_workers, threads_per_worker, interop_threads, pin_cores, log_level):
+    """
+    fork된 워커 프로세스에서 스레드 구성을 설정하고 uvicorn 서버 실행
+
+    Args:
+        worker_id (int): 워커 번호
+        sock (socket.socket): 공유 리스닝 소켓
+        app: FastAPI 애플리케이션 (예열 전에는 연결을 받지 않음)
+        num_workers (int): 전체 워커 수
+        threads_per_worker (int): 워커당 intra-op 스레드 수
+        interop_threads (int): 워커당 inter-op 스레드 수
+        pin_cores (bool): 워커를 전용 코어에 고정할지 여부
+        log_level (str): uvicorn 로그 레벨
+    """
+    import uvicorn
+
+    # 마스터의 시그널 핸들러 초기화 (uvicorn이 자체 핸들러 설치)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    if pin_cores and hasattr(os, "sched_setaffinity"):
+        cores = worker_cores(worker_id, num_workers)
+        os.sched_setaffinity(0, cores)
+        print(f"[worker {worker_id}] pid={os.getpid()} pinned to cores {cores}")
+
+    torch.set_num_threads(threads_per_worker)
+    try:
+        torch.set_num_interop_threads(interop_threads)
+    except RuntimeError as e:
+        # 마스터에서 이미 inter-op 스레드 풀이 시작된 경우
+        print(f"[worker {worker_id}] Warning: could not set inter-op threads: {e}")
+    print(f"[worker {worker_id}] pid={os.getpid()} intra-op threads={torch.get_num_threads()}, "
+          f"inter-op threads={torch.get_num_interop_threads()}")
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def spawn_worker(worker_id, sock, app_module, args):
+    """
+    워커 프로세스 하나를 fork
+
+    워커는 예열을 마치면 파이프에 한 바이트를 써서 마스터에 알립니다.
+
+    Returns:
+        tuple: (워커 pid, 예열 완료 알림을 읽을 파이프 fd)
+    """
+    read_fd, write_fd = os.pipe()
+    master_pid = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        exit_code = 0
+        try:
+            app_module.prefork_master_pid = master_pid
+            app_module.on_ready = lambda: notify_ready(write_fd)
+            run_worker(worker_id, sock, app_module.app, args.workers, args.threads_per_worker,
+                       args.interop_threads, args.pin_cores, args.log_level)
+        except BaseException as e:
+            print(f"[worker {worker_id}] Error: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    os.close(write_fd)
+    return pid, read_fd
+
+
+def notify_ready(write_fd):
+    """워커에서 마스터로 예열 완료 알림 (마스터가 기다리지 않아 파이프가 닫혔으면 무시)"""
+    try:
+        os.write(write_fd, b"1")
+    except OSError:
+        pass
+    finally:
+        os.close(write_fd)
+
+
+def wait_ready(read_fd, timeout_s):
+    """
+    워커의 예열 완료 알림 대기
+
+    Returns:
+        bool: 제한 시간 안에 알림을 받았는지 여부 (워커가 먼저 종료되면 False)
+    """
+    try:
+        readable, _, _ = select.select([read_fd], [], [], timeout_s)
+        return bool(readable) and os.read(read_fd, 1) == b"1"
+    finally:
+        os.close(read_fd)
+
+
+def rolling_restart(app_module, sock, workers, args):
+    """
+    마스터에서 구성 요소를 다시 로드한 뒤 워커를 하나씩 다시 fork
+
+    새 워커가 예열을 마치면 같은 번호의 이전 워커를 종료합니다(처리 중인 요청은 마무리 후 종료).
+    로드에 실패하면 이전 워커를 그대로 두고, 새 워커가 예열에 실패하면 그 워커를 종료하고 중단합니다.
+
+    Args:
+        app_module: app 모듈
+        sock (socket.socket): 공유 리스닝 소켓
+        workers (dict): 워커 pid -> 워커 번호 (갱신됨)
+        args (argparse.Namespace): 실행 인자
+
+    Returns:
+        bool: 모든 워커를 교체했는지 여부
+    """
+    _now_time = datetime.now().__str__()
+    print(f"[{_now_time}] Reloading components for rolling restart...")
+    try:
+        gc.unfreeze()
+        app_module.load_components()
+    except Exception as e:
+        print(f"Error reloading components: {e}. Keeping current workers.")
+        return False
+    finally:
+        gc.collect()
+        gc.freeze()
+
+    for old_pid, worker_id in sorted(workers.items(), key=lambda item: item[1]):
+        new_pid, read_fd = spawn_worker(worker_id, sock, app_module, args)
+        workers[new_pid] = worker_id
+        if not wait_ready(read_fd, args.reload_ready_timeout):
+            print(f"[worker {worker_id}] pid={new_pid} did not become ready; stopping rolling restart.")
+            workers.pop(new_pid, None)
+            _terminate(new_pid)
+            return False
+        workers.pop(old_pid, None)
+        _terminate(old_pid)
+        print(f"[worker {worker_id}] replaced pid={old_pid} with pid={new_pid}")
+    print(f"Rolling restart finished (version {app_module.bundle.version}).")
+    return True
+
+
+def _terminate(pid):
+    """워커에 종료 시그널 전송 (이미 종료되었으면 무시)"""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def main(args):
+    # 마스터에서는 병렬 연산을 하지 않으므로 스레드 풀을 최소화 (fork 이후 OpenMP 상태 문제 방지)
+    torch.set_num_threads(1)
+
+    # 모델/토크나이저/후보/색인/임베딩 모델을 마스터에서 한 번 로드하여 워커들이 공유
+    # (예열은 워커별 스레드 설정이 적용된 뒤 각 워커의 시작 단계에서 수행)
+    import app as app_module
+    source_version = app_module.source_fingerprint(app_module.config)
+    app_module.load_components()
+
+    sock = create_socket(args.host, args.port)
+
+    # 로드된 객체들이 GC 순회로 인해 워커에서 복사되지 않도록 고정
+    gc.collect()
+    gc.freeze()
+
+    workers = {}
+    for worker_id in range(args.workers):
+        pid, read_fd = spawn_worker(worker_id, sock, app_module, args)
+        os.close(read_fd)
+        workers[pid] = worker_id
+    print(f"Started {args.workers} workers on {args.host}:{args.port}: {sorted(workers)}")
+
+    stopping = False
+    reload_requested = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            _terminate(pid)
+
+    def request_reload(signum, frame):
+        nonlocal reload_requested
+        reload_requested = True
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGHUP, request_reload)
+
+    # 워커 감시: 비정상 종료된 워커는 다시 fork, 재로드 요청이나 원본 파일 변경은 롤링 재시작
+    config = app_module.config
+    next_watch = time.monotonic() + config.reload_watch_interval_s
+    pending_version = None
+    while workers:
+        if reload_requested and not stopping:
+            reload_requested = False
+            next_source_version = app_module.source_fingerprint(config)
+            rolling_restart(app_module, sock, workers, args)
+            # 실패해도 같은 파일로 반복하지 않도록 파일이 다시 바뀔 때까지 감시에서 제외
+            source_version, pending_version = next_source_version, None
+
+        if config.reload_watch and not stopping and time.monotonic() >= next_watch:
+            next_watch = time.monotonic() + config.reload_watch_interval_s
+            try:
+                current_version = app_module.source_fingerprint(config)
+            except Exception as e:
+                print(f"Error checking component files: {e}")
+                current_version = source_version
+            # 바뀐 뒤 한 주기 동안 그대로면(복사 완료) 재로드
+            if current_version == source_version:
+                pending_version = None
+            elif current_version == pending_version:
+                reload_requested = True
+            else:
+                pending_version = current_version
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        if pid == 0:
+            time.sleep(0.5)
+            continue
+        worker_id = workers.pop(pid, None)
+        if worker_id is None:
+            continue
+        if not stopping:
+            print(f"[worker {worker_id}] pid={pid} exited with status {status}. Restarting...")
+            time.sleep(1)
+            pid, read_fd = spawn_worker(worker_id, sock, app_module, args)
+            os.close(read_fd)
+            workers[pid] = worker_id
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    from omegaconf import OmegaConf
+
+    config = OmegaConf.load(os.environ.get("APP_CONFIG_FILE", "./config/app-config.yaml"))
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+
+    parser = argparse.ArgumentParser(description="pre-fork 멀티 워커 서빙 스크립트")
+    parser.add_argument("--host", type=str, default=config.host)
+    parser.add_argument("--port", type=int, default=config.port)
+    parser.add_argument("--workers", type=int, default=config.workers, help="워커 프로세스 수")
+    parser.add_argument("--threads-per-worker", dest="threads_per_worker", type=int,
+                        default=config.threads_per_worker,
+                        help="워커당 torch intra-op 스레드 수 (0이면 코어 수 / 워커 수)")
+    parser.add_argument("--interop-threads", dest="interop_threads", type=int, default=config.interop_threads,
+                        help="워커당 torch inter-op 스레드 수")
+    parser.add_argument("--pin-cores", dest="pin_cores", action="store_true", default=config.pin_workers_to_cores,
+                        help="각 워커를 전용 CPU 코어에 고정")
+    parser.add_argument("--log-level", dest="log_level", type=str, default="info")
+    parser.add_argument("--reload-ready-timeout", dest="reload_ready_timeout", type=float, default=600,
+                        help="롤링 재시작에서 새 워커의 예열 완료를 기다리는 최대 시간(초)")
+    args = parser.parse_args(sys.argv[1:])
+
+    args.workers = max(1, args.workers)
+    if args.threads_per_worker <= 0:
+        args.threads_per_worker = max(1, cpu_count // args.workers)
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Serving Start ==========')
+    print(f'WORKERS : {args.workers}, THREADS PER WORKER : {args.threads_per_worker}, '
+          f'INTEROP THREADS : {args.interop_threads}, PIN CORES : {args.pin_cores}, CPU COUNT : {cpu_count}')
+    main(args)
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Serving Finished ==========')
@@ -27,6 +27,7 @@ from torch.utils.tensorboard import SummaryWriter  # 텐서보드 로깅 (학습
 from utils.generators import augment_sentence  # 데이터 증강 유틸리티
 from utils.train_utils import advanced_augment_data, back_translation_augment  # 데이터 증강 유틸리티
 from utils.eval_utils import calc_precision_recall_f05, calc_bleu, calc_gleu  # 평가 메트릭 계산 유틸리티
+from utils.speculative_decoding import supports_speculative, speculative_generate, pad_sequences  # 추측 디코딩 유틸리티
 
 
 def seed_everything(seed):
@@ -297,7 +298,7 @@ class CustomSeq2SeqTrainer(Seq2SeqTrainer):
     """
 
     def __init__(self, *args, calculated_max_length=None, early_stopping_patience=3, early_stopping_threshold=0.001,
-                 **kwargs):
+                 speculative_draft_tokens=0, **kwargs):
         """
         초기화 함수
 
@@ -305,12 +306,14 @@ class CustomSeq2SeqTrainer(Seq2SeqTrainer):
             calculated_max_length (int): 계산된 최대 시퀀스 길이
             early_stopping_patience (int): 개선 없이 기다릴 평가 횟수
             early_stopping_threshold (float): 개선으로 간주할 최소 임계값
+            speculative_draft_tokens (int): greedy 평가 생성에서 추측 디코딩 초안 토큰 수 (0이면 사용 안 함)
             *args, **kwargs: 기본 Seq2SeqTrainer에 전달할 인수
         """
         super().__init__(*args, **kwargs)
         self.calculated_max_length = calculated_max_length
         self.early_stopping_patience = early_stopping_patience
         self.early_stopping_threshold = early_stopping_threshold
+        self.speculative_draft_tokens = speculative_draft_tokens
         # 최상의 메트릭 초기화 (greater_is_better에 따라 초기값 설정)
         self.best_metric = -float('inf') if self.args.greater_is_better else float('inf')
         self.patience_counter = 0  # 개선 없이 지난 평가 횟수
@@ -349,12 +352,24 @@ class CustomSeq2SeqTrainer(Seq2SeqTrainer):
             "top_p": self.args.top_p if hasattr(self.args, 'top_p') else 1.0,  # top-p 샘플링
         }
 
-        # 텍스트 생성
-        generated_tokens = model.generate(
-            inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            **gen_kwargs,
-        )
+        # 텍스트 생성 (greedy 설정이면 입력 복사 기반 추측 디코딩으로 같은 결과를 더 적은 디코더 호출로 생성)
+        if self.speculative_draft_tokens > 0 and supports_speculative(model, gen_kwargs):
+            sequences = speculative_generate(
+                model,
+                inputs["input_ids"],
+                inputs["attention_mask"],
+                max_length=self.calculated_max_length or model.generation_config.max_length,
+                min_length=model.generation_config.min_length,
+                generation_kwargs=gen_kwargs,
+                num_draft_tokens=self.speculative_draft_tokens,
+            )
+            generated_tokens = pad_sequences(sequences, model.config.pad_token_id, inputs["input_ids"].device)
+        else:
+            generated_tokens = model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                **gen_kwargs,
+            )
         labels = inputs["labels"]
         return (None, generated_tokens, labels)
 
@@ -553,6 +568,9 @@ def train(config):
         early_stopping_threshold=config.early_stopping_threshold if hasattr(config,
                                                                             'early_stopping_threshold') else 0.001,
         # 성능 개선으로 간주할 최소 임계값
+        speculative_draft_tokens=config.speculative_draft_tokens if hasattr(config,
+                                                                            'speculative_draft_tokens') else 0,
+        # greedy 평가 생성(generation_num_beams=1)에서 추측 디코딩 초안 토큰 수
     )
 
     # 학습 실행 - 체크포인트에서 이어서 할지 새로 시작할지 결정
@@ -0,0 +1,88 @@
+"""
+후보 문장 임베딩 갱신 스크립트
+
+precompute_embeddings로 만든 precomputed_dir에 후보 문장을 추가하거나 삭제합니다.
+새 문장만 임베딩 모델로 계산하여 길이 순 기본 구간 뒤의 delta 구간 파일에 덧붙이고, 저장된 FAISS 색인에 새 벡터만
+추가합니다(다시 학습하거나 기존 벡터를 다시 추가하지 않음). 삭제는 deleted_ids.npy에 ID로 표시하여 검색 결과에서 제외하며,
+추가·삭제한 후보가 embedding_compact_fraction을 넘거나 --compact를 지정하면 길이 순으로 전체를 다시 씁니다.
+갱신이 끝나면 manifest.json의 버전을 올리고, 서버는 파일 감시(reload_watch) 또는 POST /admin/reload로 새 버전을 로드합니다.
+입력 파일은 후보 데이터 JSON(data[].annotation.cor_sentence), 문장 JSON 리스트 또는 한 줄에 한 문장인 텍스트 파일입니다.
+
+사용법:
+    python update_embeddings.py --add ./data/datasets/new_candidates.json
+    python update_embeddings.py --delete ./removed.txt --config-file ./config/app-config.yaml
+    python update_embeddings.py --compact
+"""
+
+from omegaconf import OmegaConf
+from datetime import datetime
+import argparse
+import json
+import sys
+from utils.embedding_manager import FastEmbeddingManager
+from utils.embedding_store import available_storage, read_manifest
+from utils.model_loader import faiss_index_params
+
+
+def load_sentences(path):
+    """
+    파일에서 후보 문장 로드
+
+    Args:
+        path (str): 후보 데이터 JSON, 문장 JSON 리스트 또는 텍스트 파일 경로
+
+    Returns:
+        list: 문장 리스트
+    """
+    with open(path, 'r') as f:
+        if not path.endswith('.json'):
+            return [line.strip() for line in f if line.strip()]
+        data = json.load(f)
+    if isinstance(data, dict):
+        return [item['annotation']['cor_sentence'] for item in data['data']]
+    return [text for text in data if text]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="후보 문장 임베딩 갱신 스크립트")
+    parser.add_argument('--config-file', type=str, default="./config/app-config.yaml", help="서빙 설정 파일 경로")
+    parser.add_argument('--add', type=str, nargs='+', default=[], help="추가할 문장 파일 경로")
+    parser.add_argument('--delete', type=str, nargs='+', default=[], help="삭제할 문장 파일 경로")
+    parser.add_argument('--compact', action='store_true', help="추가·삭제 후 delta 구간과 삭제 표시를 정리하여 전체를 다시 씀")
+    args = parser.parse_args(sys.argv[1:])
+
+    if not args.add and not args.delete and not args.compact:
+        parser.error("--add, --delete 또는 --compact 중 하나 이상을 지정하세요.")
+
+    config = OmegaConf.load(args.config_file)
+    if not available_storage(config.precomputed_dir):
+        sys.exit(f"No precomputed embeddings in {config.precomputed_dir}; start app.py once or run precompute first.")
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Update Embeddings Start ==========')
+
+    embedding_manager = FastEmbeddingManager(model_name=config.embedding_model,
+                                             precomputed_dir=config.precomputed_dir,
+                                             index_type=config.faiss_index_type,
+                                             index_params=faiss_index_params(config),
+                                             storage=config.embedding_storage, mmap=False,
+                                             compact_fraction=config.embedding_compact_fraction)
+
+    removed = 0
+    if args.delete:
+        removed = embedding_manager.remove_candidates([text for path in args.delete for text in load_sentences(path)])
+    added = 0
+    if args.add:
+        added = embedding_manager.add_candidates([text for path in args.add for text in load_sentences(path)])
+    if args.compact:
+        embedding_manager.compact()
+
+    manifest = read_manifest(config.precomputed_dir) or {}
+    print(f"ADDED : {added}, REMOVED : {removed}, CANDIDATES : {embedding_manager.num_candidates}, "
+          f"APPENDED : {manifest.get('count', 0) - manifest.get('base_count', 0)}, "
+          f"DELETED : {manifest.get('deleted_count', 0)}, "
+          f"VERSION : {manifest.get('version')}, CORPUS HASH : {manifest.get('corpus_hash')}")
+    print(f'SAVE PATH : {config.precomputed_dir}')
+
+    _now_time = datetime.now().__str__()
+    print(f'[{_now_time}] ========== Update Embeddings Finished ==========')
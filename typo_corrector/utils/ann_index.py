@@ -0,0 +1,361 @@
+"""
+후보 문장 임베딩 검색용 FAISS 색인 생성 모듈
+
+후보가 수천 개 수준이면 정확한 내적 색인(flat)으로 충분하지만, 수백만 문장에서는
+근사 최근접 이웃(ANN) 색인으로 검색 비용과 메모리를 줄입니다.
+- flat: 정확한 내적 검색 (IndexFlatIP)
+- ivf_flat: 역색인(IVF) 군집 중 nprobe개만 검색, 벡터는 원본 그대로 보관
+- ivf_pq: IVF + 곱 양자화(PQ)로 벡터를 pq_m바이트 코드로 압축 (메모리 최소, 재현율 손실 가장 큼)
+- hnsw: 계층적 근접 그래프 탐색 (학습 불필요, efSearch로 정확도/속도 조절, 메모리는 flat보다 큼)
+flat, ivf_flat, hnsw는 벡터를 float16 또는 int8 스칼라 양자화로 보관하여 메모리를 1/2, 1/4로 줄일 수 있습니다.
+모든 색인은 정규화된 벡터의 내적(코사인 유사도)을 사용하며, 벡터 순서(ID)는 입력 순서와 같습니다.
+후보는 길이 순으로 저장되므로 길이 구간은 ID 구간이 되며, search_range가 구간 안에서만 검색합니다.
+나중에 추가한 후보는 add_vectors로 기존 ID 뒤에 추가하고(delta 구간), exact_id_search로 길이가 맞는 행만 검색한 뒤
+merge_results로 두 결과를 합치며 삭제 표시한 ID를 제외합니다.
+"""
+
+import math
+
+import numpy as np
+import faiss
+
+from utils.embedding_store import replacing
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# 색인 안의 벡터 형식별 스칼라 양자화 종류 (float32는 양자화 없음)
+_SQ_TYPES = {
+    "float32": None,
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def index_file_name(index_type, storage="float32"):
+    """
+    색인 종류/벡터 저장 형식별 저장 파일 이름 (flat/float32는 기존 파일 이름 유지)
+
+    Example:
+        >>> index_file_name("hnsw")
+        'faiss_index_hnsw.bin'
+        >>> index_file_name("flat", "int8")
+        'faiss_index_flat_int8.bin'
+    """
+    if storage != "float32" and index_type != "ivf_pq":
+        return f"faiss_index_{index_type}_{storage}.bin"
+    return "faiss_index.bin" if index_type == "flat" else f"faiss_index_{index_type}.bin"
+
+
+def default_nlist(num_vectors):
+    """벡터 수에 맞는 IVF 군집 수 (약 4√N, 군집당 학습 벡터가 39개 이상이 되도록 제한)"""
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def _float32_rows(embeddings, index):
+    """선택한 행을 L2 정규화된 float32 배열로 변환 (EmbeddingMatrix는 저장 형식에서 복원)"""
+    if hasattr(embeddings, "to_float32"):
+        rows = embeddings.to_float32(index)
+    else:
+        rows = np.array(embeddings[index], dtype=np.float32)
+    faiss.normalize_L2(rows)
+    return rows
+
+
+def build_ann_index(embeddings, index_type="flat", storage="float32", nlist=0, pq_m=64, pq_nbits=8, hnsw_m=32,
+                    ef_construction=200, train_size=0, batch_size=65536, seed=42):
+    """
+    임베딩으로 FAISS 색인 생성 (학습이 필요한 색인은 학습 후 추가)
+
+    벡터는 batch_size개씩 float32로 변환·정규화하여 추가하므로, mmap으로 읽은 float16/int8 임베딩 전체를
+    float32로 복사하지 않습니다.
+
+    Args:
+        embeddings (np.ndarray | EmbeddingMatrix): 임베딩 배열 (N, d)
+        index_type (str): 색인 종류 (flat, ivf_flat, ivf_pq, hnsw) (기본값: flat)
+        storage (str): 색인 안의 벡터 형식 (float32, float16, int8: 스칼라 양자화) (기본값: float32, ivf_pq는 무시)
+        nlist (int): IVF 군집 수 (기본값: 0, 벡터 수로 자동 결정)
+        pq_m (int): PQ 부분 벡터 수 (d의 약수, 벡터당 코드 바이트 수) (기본값: 64)
+        pq_nbits (int): PQ 부분 벡터당 비트 수 (기본값: 8)
+        hnsw_m (int): HNSW 노드당 이웃 수 (기본값: 32)
+        ef_construction (int): HNSW 구축 탐색 폭 (기본값: 200)
+        train_size (int): 학습에 사용할 최대 벡터 수 (기본값: 0, IVF는 nlist의 64배, 스칼라 양자화는 65536)
+        batch_size (int): 한 번에 변환하여 추가할 벡터 수 (기본값: 65536)
+        seed (int): 학습 표본 추출 시드 (기본값: 42)
+
+    Returns:
+        faiss.Index: 벡터가 추가된 색인
+
+    Raises:
+        ValueError: 알 수 없는 색인 종류/저장 형식이거나 PQ 설정이 차원/벡터 수와 맞지 않는 경우
+    """
+    if storage not in _SQ_TYPES:
+        raise ValueError(f"Unknown vector storage: {storage} (expected one of {tuple(_SQ_TYPES)})")
+    num_vectors, dimension = embeddings.shape
+    qtype = _SQ_TYPES[storage]
+    metric = faiss.METRIC_INNER_PRODUCT
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension) if qtype is None else faiss.IndexScalarQuantizer(dimension, qtype, metric)
+    elif index_type == "hnsw":
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(dimension, hnsw_m, metric)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, qtype, hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = min(nlist, num_vectors) if nlist > 0 else default_nlist(num_vectors)
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat" and qtype is None:
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        elif index_type == "ivf_flat":
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, qtype, metric)
+        else:
+            if dimension % pq_m != 0:
+                raise ValueError(f"pq_m ({pq_m}) must divide the embedding dimension ({dimension}).")
+            if num_vectors < 2 ** pq_nbits:
+                raise ValueError(f"ivf_pq needs at least {2 ** pq_nbits} vectors to train, got {num_vectors}.")
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_nbits, metric)
+        # 양자화기가 색인과 함께 해제되도록 소유권 이전
+        index.own_fields = True
+        quantizer.this.disown()
+    else:
+        raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+
+    if not index.is_trained:
+        train_size = train_size or (index.nlist * 64 if isinstance(index, faiss.IndexIVF) else 65536)
+        rows = slice(None)
+        if num_vectors > train_size:
+            rows = np.sort(np.random.default_rng(seed).choice(num_vectors, train_size, replace=False))
+        index.train(_float32_rows(embeddings, rows))
+
+    for start in range(0, num_vectors, batch_size):
+        index.add(_float32_rows(embeddings, slice(start, start + batch_size)))
+    return index
+
+
+def refill_index(index, embeddings, batch_size=65536):
+    """
+    색인의 벡터를 모두 지우고 다시 추가 (IVF 군집 중심, 스칼라 양자화 범위 등 학습 결과는 유지)
+
+    Args:
+        index (faiss.Index): 학습된 색인 (mmap으로 읽은 읽기 전용 색인은 사용할 수 없음)
+        embeddings (np.ndarray | EmbeddingMatrix): 임베딩 배열 (N, d)
+        batch_size (int): 한 번에 변환하여 추가할 벡터 수 (기본값: 65536)
+
+    Returns:
+        faiss.Index: 같은 색인
+    """
+    index.reset()
+    return add_vectors(index, embeddings, batch_size=batch_size)
+
+
+def add_vectors(index, embeddings, start=0, batch_size=65536):
+    """
+    임베딩의 start번째 행부터 색인에 추가 (새 벡터의 ID는 기존 ntotal부터 이어짐, 기존 벡터와 학습 결과는 그대로)
+
+    Args:
+        index (faiss.Index): 학습된 색인 (mmap으로 읽은 읽기 전용 색인은 사용할 수 없음)
+        embeddings (np.ndarray | EmbeddingMatrix): 임베딩 배열 (N, d)
+        start (int): 추가를 시작할 행 (기본값: 0)
+        batch_size (int): 한 번에 변환하여 추가할 벡터 수 (기본값: 65536)
+
+    Returns:
+        faiss.Index: 같은 색인
+    """
+    for block_start in range(start, len(embeddings), batch_size):
+        index.add(_float32_rows(embeddings, slice(block_start, block_start + batch_size)))
+    return index
+
+
+def write_faiss_index(index, path):
+    """임시 파일에 쓴 뒤 교체 (이 파일을 mmap으로 읽고 있는 프로세스는 이전 색인을 계속 사용)"""
+    with replacing(path) as tmp_path:
+        faiss.write_index(index, tmp_path)
+
+
+def read_faiss_index(path, mmap=True):
+    """
+    저장된 색인 읽기 (가능하면 mmap 입출력 플래그 사용)
+
+    IVF 색인의 역색인 목록은 IO_FLAG_MMAP으로 파일을 직접 매핑하고, 평면 코드 색인(flat, 스칼라 양자화)은
+    FAISS가 IO_FLAG_MMAP_IFC를 지원하는 버전에서만 매핑됩니다. 매핑된 색인은 읽기 전용이며
+    여러 프로세스가 같은 페이지를 공유합니다. mmap으로 읽을 수 없는 색인은 메모리에 읽습니다.
+
+    Args:
+        path (str): 색인 파일 경로
+        mmap (bool): mmap 입출력 플래그 사용 여부 (기본값: True)
+
+    Returns:
+        faiss.Index: 색인
+    """
+    if mmap:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError as e:
+            print(f"Warning: could not memory-map FAISS index ({e}); reading it into memory.")
+    return faiss.read_index(path)
+
+
+def search_parameters(index, selector=None, nprobe=16, ef_search=64, fraction=1.0):
+    """
+    색인 종류에 맞는 검색 파라미터 생성
+
+    선택기가 전체 벡터의 일부(fraction)만 남기면 IVF가 탐색한 군집과 HNSW가 방문한 이웃 중 그 비율만 결과가 될 수 있으므로,
+    nprobe와 efSearch를 1/fraction배로 늘립니다(IVF 군집 수와 전체 벡터 수가 상한).
+
+    Args:
+        index (faiss.Index): 검색할 색인
+        selector (faiss.IDSelector): 검색 대상 ID 선택기 (기본값: None, 전체)
+        nprobe (int): IVF에서 검색할 군집 수 (기본값: 16)
+        ef_search (int): HNSW 탐색 폭 (기본값: 64)
+        fraction (float): 선택기가 남기는 벡터 비율 (기본값: 1.0)
+
+    Returns:
+        faiss.SearchParameters: 검색 파라미터 (선택기가 없고 조정할 값도 없으면 None)
+    """
+    index = faiss.downcast_index(index)
+    scale = 1.0 / min(max(fraction, 1e-9), 1.0)
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=min(index.nlist, math.ceil(nprobe * scale)))
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector,
+                                          efSearch=min(max(index.ntotal, ef_search), math.ceil(ef_search * scale)))
+    if selector is not None:
+        return faiss.SearchParameters(sel=selector)
+    return None
+
+
+def length_offsets(lengths):
+    """
+    길이 순으로 정렬된 후보의 길이별 시작 위치
+
+    Args:
+        lengths (np.ndarray): 길이 순으로 정렬된 후보 문장 길이 배열
+
+    Returns:
+        np.ndarray: offsets[L]이 길이가 L 이상인 첫 후보 위치인 배열 (길이 [a, b] 구간은 offsets[a]:offsets[b + 1])
+    """
+    max_length = int(lengths[-1]) if len(lengths) else 0
+    return np.searchsorted(lengths, np.arange(max_length + 2), side="left")
+
+
+def length_range(offsets, length, tolerance):
+    """길이가 length ± tolerance인 후보의 ID 구간 [start, end)"""
+    max_length = len(offsets) - 1
+    start = offsets[min(max(length - tolerance, 0), max_length)]
+    end = offsets[min(max(length + tolerance + 1, 0), max_length)]
+    return int(start), int(end)
+
+
+def exact_range_search(embeddings, queries, start, end, k, batch_size=65536):
+    """
+    ID 구간 [start, end)의 임베딩과 직접 내적하여 정확한 상위 k개 검색 (구간의 행만 batch_size개씩 읽음)
+
+    Args:
+        embeddings (EmbeddingMatrix | np.ndarray): 색인과 같은 순서의 임베딩
+        queries (np.ndarray): 정규화된 쿼리 배열 (N, d)
+        start (int): 구간 시작 ID
+        end (int): 구간 끝 ID (포함하지 않음)
+        k (int): 반환할 결과 수 (구간 크기 이하)
+        batch_size (int): 한 번에 읽을 행 수 (기본값: 65536)
+
+    Returns:
+        tuple: 유사도 내림차순의 (유사도 배열 (N, k), ID 배열 (N, k))
+    """
+    similarities = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    indices = np.full((len(queries), k), -1, dtype=np.int64)
+    for block_start in range(start, end, batch_size):
+        block_end = min(block_start + batch_size, end)
+        scores = queries @ _float32_rows(embeddings, slice(block_start, block_end)).T
+        merged_similarities = np.hstack([similarities, scores])
+        merged_indices = np.hstack([indices, np.broadcast_to(np.arange(block_start, block_end), scores.shape)])
+        top = np.argpartition(-merged_similarities, k - 1, axis=1)[:, :k]
+        similarities = np.take_along_axis(merged_similarities, top, axis=1)
+        indices = np.take_along_axis(merged_indices, top, axis=1)
+    order = np.argsort(-similarities, axis=1)
+    return np.take_along_axis(similarities, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def exact_id_search(embeddings, queries, rows, k):
+    """
+    선택한 행의 임베딩과 직접 내적하여 정확한 상위 k개 검색 (delta 구간처럼 작은 행 집합용)
+
+    Args:
+        embeddings (EmbeddingMatrix | np.ndarray): 임베딩
+        queries (np.ndarray): 정규화된 쿼리 배열 (N, d)
+        rows (np.ndarray): 검색할 행 번호 배열
+        k (int): 반환할 결과 수
+
+    Returns:
+        tuple: 유사도 내림차순의 (유사도 배열 (N, min(k, 행 수)), 행 번호 배열 (N, min(k, 행 수)))
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = queries @ _float32_rows(embeddings, rows).T
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :min(k, len(rows))]
+    return np.take_along_axis(scores, order, axis=1), rows[order]
+
+
+def merge_results(results, k, exclude=None):
+    """
+    여러 검색 결과를 합쳐 쿼리별 상위 k개 선택 (-1과 제외할 ID는 버림)
+
+    Args:
+        results (list): (유사도 배열 (N, k_i), ID 배열 (N, k_i)) 쌍의 리스트
+        k (int): 반환할 결과 수
+        exclude (np.ndarray): 제외할 ID 배열 (삭제 표시한 후보) (기본값: None)
+
+    Returns:
+        tuple: 유사도 내림차순의 (유사도 배열 (N, k), ID 배열 (N, k)) (모자란 자리는 ID -1)
+    """
+    similarities = np.hstack([np.asarray(sims, dtype=np.float32) for sims, _ in results])
+    indices = np.hstack([np.asarray(ids, dtype=np.int64) for _, ids in results])
+    valid = indices >= 0
+    if exclude is not None and len(exclude):
+        valid &= ~np.isin(indices, exclude)
+    similarities = np.where(valid, similarities, -np.inf)
+    order = np.argsort(-similarities, axis=1, kind="stable")[:, :k]
+    similarities = np.take_along_axis(similarities, order, axis=1)
+    indices = np.where(np.isfinite(similarities), np.take_along_axis(indices, order, axis=1), -1)
+    return similarities, indices
+
+
+def search_range(index, embeddings, queries, start, end, k, nprobe=16, ef_search=64, exact_window_size=0):
+    """
+    ID 구간 [start, end) 안에서 쿼리별 상위 k개 검색
+
+    근사 색인(IVF, HNSW)에 구간 선택기만 적용하면 탐색한 군집/이웃 대부분이 구간 밖이어서 결과가 k개보다 적거나 비므로,
+    구간이 exact_window_size 이하이면 구간의 임베딩과 직접 내적하여 정확히 검색하고(구간의 행만 읽으므로 flat보다도 빠름),
+    더 크면 구간 비율만큼 nprobe/efSearch를 늘려 색인으로 검색한 뒤 결과가 모자란 쿼리만 정확히 다시 검색합니다.
+
+    Args:
+        index (faiss.Index): 검색할 색인
+        embeddings (EmbeddingMatrix | np.ndarray): 색인과 같은 순서의 임베딩
+        queries (np.ndarray): 정규화된 쿼리 배열 (N, d)
+        start (int): 구간 시작 ID
+        end (int): 구간 끝 ID (포함하지 않음, start보다 커야 함)
+        k (int): 반환할 결과 수
+        nprobe (int): IVF에서 검색할 군집 수 (기본값: 16)
+        ef_search (int): HNSW 탐색 폭 (기본값: 64)
+        exact_window_size (int): 정확히 검색할 최대 구간 크기 (기본값: 0, 항상 색인 사용)
+
+    Returns:
+        tuple: (유사도 배열 (N, min(k, 구간 크기)), ID 배열 (N, min(k, 구간 크기)))
+    """
+    k = min(k, end - start)
+    if end - start <= exact_window_size:
+        return exact_range_search(embeddings, queries, start, end, k)
+
+    # 선택기는 검색이 끝날 때까지 파이썬 쪽 참조를 유지해야 함
+    selector = faiss.IDSelectorRange(start, end)
+    params = search_parameters(index, selector, nprobe=nprobe, ef_search=ef_search,
+                               fraction=(end - start) / max(index.ntotal, 1))
+    similarities, indices = index.search(queries, k, params=params)
+    short = np.flatnonzero((indices < 0).any(axis=1))
+    if len(short):
+        similarities[short], indices[short] = exact_range_search(embeddings, queries[short], start, end, k)
+    return similarities, indices
+
+
+def index_memory_bytes(index):
+    """색인 직렬화 크기(바이트), 메모리 사용량 근사값"""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,382 @@
+"""
+동시 요청 마이크로 배칭을 위한 모듈
+
+짧은 시간 창 안에 들어온 요청들을 모아 하나의 배치로 처리하여,
+단일 문장 generate 호출이 반복되는 비효율을 줄입니다.
+배치 처리는 고정된 슬롯 수를 가진 전용 추론 스레드 풀에서 실행되어 이벤트 루프를 막지 않으며,
+대기열이 가득 차거나 대기 시간이 임계값을 넘으면 요청을 즉시 거절합니다.
+요청별 마감 시각(Deadline)을 받아, 배치의 모든 요청이 만료되거나 취소되면 실행 중인 배치도 중단하도록 알립니다.
+요청은 우선순위 차선(Lane)별 대기열에 들어가며, 스케줄러는 가중치에 따라 차선을 번갈아 골라 배치를 구성하고
+차선별 예약 슬롯을 지켜 대량 요청이 대화형 요청의 추론 슬롯을 모두 차지하지 못하게 합니다.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import BATCH_SIZE, QUEUE_WAIT, LANE_LATENCY
+from utils.deadline import Deadline, LatestDeadline, DeadlineExceededError
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차 요청을 받을 수 없을 때 발생하는 예외 (HTTP 429)"""
+
+
+class QueueTimeoutError(Exception):
+    """대기열 대기 시간이 임계값을 넘었을 때 발생하는 예외 (HTTP 503)"""
+
+
+class Lane:
+    """
+    우선순위 차선 하나의 대기열 설정과 통계
+
+    Example:
+        >>> lanes = [Lane("interactive", weight=4, reserved_slots=1), Lane("bulk", weight=1, max_queue_size=256)]
+    """
+
+    def __init__(self, name, weight=1, reserved_slots=0, max_queue_size=64, max_queue_wait_ms=2000):
+        """
+        Args:
+            name (str): 차선 이름
+            weight (int): 여러 차선에 요청이 있을 때 배치를 꺼내는 비율 가중치 (기본값: 1)
+            reserved_slots (int): 다른 차선이 사용할 수 없는 이 차선 전용 추론 슬롯 수 (기본값: 0)
+            max_queue_size (int): 대기열에 쌓일 수 있는 최대 요청 수 (기본값: 64)
+            max_queue_wait_ms (float): 요청이 대기열에서 기다릴 수 있는 최대 시간(ms), 0이면 제한 없음 (기본값: 2000)
+        """
+        self.name = name
+        self.weight = max(1, int(weight))
+        self.reserved_slots = max(0, int(reserved_slots))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.max_queue_wait = max_queue_wait_ms / 1000.0 if max_queue_wait_ms else None
+        self.queue = None
+        self.max_slots = None  # 배처가 다른 차선의 예약 슬롯을 빼고 계산
+        self.busy = 0
+        self.credit = 0  # 가중치 라운드 로빈 누적값
+
+        # 통계
+        self.processed_requests = 0
+        self.processed_batches = 0
+        self.rejected_queue_full = 0
+        self.rejected_queue_timeout = 0
+        self.expired_requests = 0
+        self.avg_queue_wait = 0.0  # 대기열 대기 시간 지수 이동 평균(초)
+
+    def stats(self):
+        """
+        차선 대기열 및 처리 통계 반환
+
+        Returns:
+            dict: 대기열 깊이, 사용 중인 슬롯 수, 처리/거절 건수, 평균 대기 시간(ms) 등
+        """
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "weight": self.weight,
+            "busy_slots": self.busy,
+            "max_slots": self.max_slots,
+            "processed_requests": self.processed_requests,
+            "processed_batches": self.processed_batches,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_queue_timeout": self.rejected_queue_timeout,
+            "expired_requests": self.expired_requests,
+            "avg_queue_wait_ms": round(self.avg_queue_wait * 1000.0, 3),
+        }
+
+
+class DynamicBatcher:
+    """
+    요청을 모아 배치 단위로 처리하는 클래스
+
+    첫 요청이 도착한 시점부터 max_wait_ms 동안 또는 max_batch_size개가 모일 때까지
+    같은 차선의 요청을 모은 뒤, 추론 스레드 풀에서 process_fn을 한 번 호출하여 결과를 각 요청자에게 돌려줍니다.
+    동시에 실행되는 배치 수는 num_workers개로 제한되며, 여러 차선에 요청이 있으면
+    가중치 라운드 로빈으로 다음 배치를 꺼낼 차선을 고릅니다.
+    """
+
+    def __init__(self, process_fn, max_batch_size=8, max_wait_ms=10, num_workers=1, max_queue_size=64,
+                 max_queue_wait_ms=2000, lanes=None):
+        """
+        배처 초기화
+
+        Args:
+            process_fn (callable): 입력 리스트와 배치 마감 시각(Deadline)을 받아 같은 길이의 결과 리스트를 반환하는 함수
+            max_batch_size (int): 한 배치의 최대 요청 수 (기본값: 8)
+            max_wait_ms (float): 첫 요청 이후 추가 요청을 기다리는 최대 시간(ms) (기본값: 10)
+            num_workers (int): 동시에 실행할 수 있는 배치 수 (추론 슬롯 수) (기본값: 1)
+            max_queue_size (int): lanes가 없을 때 기본 차선의 최대 대기 요청 수 (기본값: 64)
+            max_queue_wait_ms (float): lanes가 없을 때 기본 차선의 최대 대기 시간(ms) (기본값: 2000)
+            lanes (list): 우선순위 차선(Lane) 리스트, 첫 번째가 기본 차선 (기본값: None, "interactive" 차선 하나)
+        """
+        self.process_fn = process_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.num_workers = max(1, int(num_workers))
+        self.lanes = {}
+        for lane in lanes or [Lane("interactive", max_queue_size=max_queue_size,
+                                   max_queue_wait_ms=max_queue_wait_ms)]:
+            self.lanes[lane.name] = lane
+        self.default_lane = next(iter(self.lanes))
+
+        # 다른 차선의 예약 슬롯을 뺀 나머지가 차선별 최대 사용 슬롯
+        # (모든 차선이 진행할 수 있도록 최소 1개이며, 이때는 다른 차선의 예약을 지킬 수 없으므로 경고)
+        total_reserved = sum(lane.reserved_slots for lane in self.lanes.values())
+        for lane in self.lanes.values():
+            available = self.num_workers - (total_reserved - lane.reserved_slots)
+            lane.max_slots = max(1, available)
+            if available < 1:
+                print(f"Warning: {self.num_workers} inference workers cannot honour the {total_reserved} slot(s) "
+                      f"reserved for other lanes; lane '{lane.name}' may use a reserved slot. "
+                      f"Set inference_workers to at least {total_reserved - lane.reserved_slots + 1}.")
+
+        self._task = None
+        self._executor = None
+        self._wakeup = None
+        self._busy = 0
+        self._inflight = set()
+
+        # 통계
+        self.abandoned_batches = 0
+
+    async def start(self):
+        """배치 처리 루프 시작"""
+        if self._task is None:
+            for lane in self.lanes.values():
+                lane.queue = asyncio.Queue(maxsize=lane.max_queue_size)
+            self._wakeup = asyncio.Event()
+            self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="inference")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """배치 처리 루프 종료 (대기 중인 요청은 취소)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for lane in self.lanes.values():
+            while lane.queue is not None and not lane.queue.empty():
+                _, future, _, _ = lane.queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+
+        # 실행 중인 배치가 끝날 때까지 대기
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self):
+        """
+        대기열 및 처리 통계 반환 (전체 합계와 차선별 통계)
+
+        Returns:
+            dict: 대기열 깊이, 실행 중인 배치 수, 처리/거절 건수, 차선별 통계 등
+        """
+        lanes = {name: lane.stats() for name, lane in self.lanes.items()}
+
+        def total(key):
+            return sum(lane[key] for lane in lanes.values())
+
+        processed = total("processed_requests")
+        return {
+            "queue_depth": total("queue_depth"),
+            "max_queue_size": total("max_queue_size"),
+            "inflight_batches": len(self._inflight),
+            "num_workers": self.num_workers,
+            "processed_requests": processed,
+            "processed_batches": total("processed_batches"),
+            "rejected_queue_full": total("rejected_queue_full"),
+            "rejected_queue_timeout": total("rejected_queue_timeout"),
+            "expired_requests": total("expired_requests"),
+            "abandoned_batches": self.abandoned_batches,
+            "avg_queue_wait_ms": round(sum(lane["avg_queue_wait_ms"] * lane["processed_requests"]
+                                           for lane in lanes.values()) / processed, 3) if processed else 0.0,
+            "lanes": lanes,
+        }
+
+    async def submit(self, item, deadline=None, lane=None):
+        """
+        요청 하나를 차선 대기열에 넣고 배치 처리 결과를 기다림
+
+        호출자가 취소하면(시간 초과, 연결 종료) 대기열에서는 건너뛰고, 이미 실행 중인 배치는
+        남은 요청이 없을 때 중단되도록 알립니다.
+
+        Args:
+            item: process_fn에 전달될 입력 하나
+            deadline (Deadline): 요청 마감 시각 (기본값: None, 시간 제한 없음)
+            lane (str): 차선 이름 (기본값: None, 기본 차선)
+
+        Returns:
+            process_fn이 해당 입력에 대해 반환한 결과
+
+        Raises:
+            QueueFullError: 차선 대기열이 가득 찬 경우
+            QueueTimeoutError: 측정된 대기 시간이 임계값을 넘은 경우
+        """
+        if self._task is None:
+            raise RuntimeError("DynamicBatcher is not started.")
+        lane = self.lanes[lane or self.default_lane]
+
+        # 최근 대기 시간이 이미 임계값을 넘었으면 줄을 세우지 않고 바로 거절
+        if lane.max_queue_wait is not None and not lane.queue.empty() and lane.avg_queue_wait > lane.max_queue_wait:
+            lane.rejected_queue_timeout += 1
+            raise QueueTimeoutError(f"Queue wait {lane.avg_queue_wait * 1000.0:.0f}ms exceeds threshold.")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            lane.queue.put_nowait((item, future, time.monotonic(), deadline or Deadline()))
+        except asyncio.QueueFull:
+            lane.rejected_queue_full += 1
+            raise QueueFullError(f"Queue '{lane.name}' is full ({lane.max_queue_size} requests).")
+        self._wakeup.set()
+        return await future
+
+    def _next_lane(self):
+        """
+        다음 배치를 꺼낼 차선 선택 (가중치 라운드 로빈)
+
+        요청이 있고 사용 가능한 슬롯이 남은 차선마다 가중치만큼 누적값을 더한 뒤,
+        누적값이 가장 큰 차선을 고르고 그 차선의 누적값에서 후보 가중치 합을 뺍니다.
+
+        Returns:
+            Lane: 선택된 차선 또는 None (꺼낼 수 있는 차선이 없는 경우)
+        """
+        if self._busy >= self.num_workers:
+            return None
+        ready = [lane for lane in self.lanes.values() if not lane.queue.empty() and lane.busy < lane.max_slots]
+        if not ready:
+            return None
+        for lane in ready:
+            lane.credit += lane.weight
+        chosen = max(ready, key=lambda lane: lane.credit)
+        chosen.credit -= sum(lane.weight for lane in ready)
+        return chosen
+
+    def _acquire(self, lane):
+        """차선의 추론 슬롯 사용 시작"""
+        self._busy += 1
+        lane.busy += 1
+
+    def _release(self, lane):
+        """차선의 추론 슬롯 반환 후 스케줄러 깨움"""
+        self._busy -= 1
+        lane.busy -= 1
+        self._wakeup.set()
+
+    async def _collect_batch(self, lane, first):
+        """첫 요청 이후 시간 창 안에 같은 차선에 도착한 요청들을 모아 배치 구성"""
+        loop = asyncio.get_running_loop()
+        batch = [first]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                # 시간 창이 끝나도 이미 큐에 있는 요청은 함께 처리
+                if lane.queue.empty():
+                    break
+                batch.append(lane.queue.get_nowait())
+                continue
+            try:
+                batch.append(await asyncio.wait_for(lane.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _admit(self, lane, batch):
+        """대기 시간을 기록하고, 취소되었거나 마감 시각이 지났거나 너무 오래 기다린 요청을 배치에서 제외"""
+        now = time.monotonic()
+        admitted = []
+        for item, future, enqueued_at, deadline in batch:
+            # 이미 취소된 요청(클라이언트 연결 종료 등)은 제외
+            if future.done():
+                continue
+            if deadline.expired():
+                lane.expired_requests += 1
+                future.set_exception(DeadlineExceededError("Request deadline passed while waiting in queue."))
+                continue
+            wait = now - enqueued_at
+            QUEUE_WAIT.observe(wait, lane=lane.name)
+            lane.avg_queue_wait = 0.9 * lane.avg_queue_wait + 0.1 * wait
+            if lane.max_queue_wait is not None and wait > lane.max_queue_wait:
+                lane.rejected_queue_timeout += 1
+                future.set_exception(QueueTimeoutError(f"Request waited {wait * 1000.0:.0f}ms in queue."))
+                continue
+            admitted.append((item, future, enqueued_at, deadline))
+        return admitted
+
+    def _batch_deadline(self, batch):
+        """
+        배치 마감 시각 구성
+
+        가장 늦은 요청 마감 시각을 따르며(요청 마감 시각이 연장되면 함께 연장),
+        결과를 기다리는 요청이 모두 사라지면 즉시 취소됩니다.
+        """
+        batch_deadline = LatestDeadline([deadline for _, _, _, deadline in batch])
+        futures = [future for _, future, _, _ in batch]
+
+        def on_done(_):
+            if not batch_deadline.cancelled and all(future.done() for future in futures):
+                batch_deadline.cancel()
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        return batch_deadline
+
+    async def _process(self, lane, batch):
+        """추론 스레드 풀에서 배치를 처리하고 결과를 분배"""
+        try:
+            items = [item for item, _, _, _ in batch]
+            deadline = self._batch_deadline(batch)
+            BATCH_SIZE.observe(len(items), kind=lane.name)
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._executor, self.process_fn, items,
+                                                                           deadline)
+            except Exception as e:
+                if deadline.cancelled:
+                    self.abandoned_batches += 1
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            lane.processed_requests += len(batch)
+            lane.processed_batches += 1
+            now = time.monotonic()
+            for (_, future, enqueued_at, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+                    LANE_LATENCY.observe(now - enqueued_at, lane=lane.name)
+        finally:
+            self._release(lane)
+
+    async def _run(self):
+        """배치 처리 루프"""
+        while True:
+            # 요청이 있고 슬롯이 남은 차선이 생길 때까지 대기
+            # (요청이 없는 동안 슬롯을 잡고 있지 않으므로 다른 차선이 바로 슬롯을 쓸 수 있음)
+            lane = self._next_lane()
+            if lane is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            first = lane.queue.get_nowait()
+            self._acquire(lane)
+            try:
+                batch = self._admit(lane, await self._collect_batch(lane, first))
+            except BaseException:
+                if not first[1].done():
+                    first[1].cancel()
+                self._release(lane)
+                raise
+            if not batch:
+                self._release(lane)
+                continue
+
+            task = asyncio.create_task(self._process(lane, batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
@@ -0,0 +1,377 @@
+"""
+교정 결과 캐시를 관리하는 모듈
+
+1단계는 프로세스 내부의 TTL LRU 캐시, 2단계는 여러 uvicorn 워커가 공유하는 캐시입니다.
+2단계 백엔드는 같은 get/set 인터페이스를 가진 객체로 교체할 수 있으며,
+Redis 프로토콜 백엔드와 로컬 환경용 SQLite 백엔드를 제공합니다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils.text_utils import normalize_text
+
+
+def compute_fingerprint(*parts):
+    """
+    모델/후보 색인 버전을 구분하기 위한 지문 계산
+
+    Args:
+        *parts: 지문에 포함할 값들 (모델 경로, 파일 수정 시각, 후보 수 등)
+
+    Returns:
+        str: 16자리 16진수 지문
+    """
+    payload = json.dumps([str(part) for part in parts], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def path_fingerprint(path):
+    """
+    파일 또는 디렉토리의 크기와 수정 시각으로 지문 재료 생성
+
+    Args:
+        path (str): 파일 또는 디렉토리 경로
+
+    Returns:
+        list: (상대 경로, 크기, 수정 시각) 리스트
+    """
+    if not path or not os.path.exists(path):
+        return []
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [(os.path.basename(path), stat.st_size, int(stat.st_mtime))]
+
+    entries = []
+    for name in sorted(os.listdir(path)):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path):
+            stat = os.stat(file_path)
+            entries.append((name, stat.st_size, int(stat.st_mtime)))
+    return entries
+
+
+def make_cache_key(text, params, fingerprint):
+    """
+    정규화된 입력 문장, 생성 파라미터, 모델 지문으로 캐시 키 생성
+
+    Args:
+        text (str): 입력 문장
+        params (dict): 생성 및 후보 검색 파라미터
+        fingerprint (str): 모델/후보 색인 지문
+
+    Returns:
+        str: 캐시 키
+    """
+    payload = json.dumps([normalize_text(text), params, fingerprint], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    크기 제한과 TTL을 가진 스레드 안전 LRU 캐시
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=3600):
+        """
+        Args:
+            max_size (int): 최대 항목 수 (기본값: 10000)
+            ttl_seconds (float): 항목 유효 시간(초), None이면 만료 없음 (기본값: 3600)
+        """
+        self.max_size = max(1, int(max_size))
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()  # key -> (value, 만료 시각(time.time 기준))
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """키에 해당하는 값을 반환 (없거나 만료되면 None)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        """값을 저장하고, 크기를 넘으면 가장 오래 사용되지 않은 항목 제거"""
+        if expires_at is None and self.ttl_seconds:
+            expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """만료되지 않은 (키, 값, 만료 시각) 리스트 반환 (오래된 순)"""
+        now = time.time()
+        with self._lock:
+            return [(key, value, expires_at) for key, (value, expires_at) in self._data.items()
+                    if expires_at is None or expires_at >= now]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """
+    여러 워커 프로세스가 공유하는 로컬 2단계 캐시 백엔드
+
+    Redis가 없는 환경에서 같은 호스트의 워커끼리 캐시를 공유하기 위한 대체 구현입니다.
+    /dev/shm 아래 경로를 사용하면 공유 메모리에 저장됩니다.
+    """
+
+    def __init__(self, path, ttl_seconds=3600):
+        """
+        Args:
+            path (str): SQLite 파일 경로
+            ttl_seconds (float): 항목 유효 시간(초) (기본값: 3600)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        # fork된 워커가 마스터의 SQLite 연결을 그대로 쓰지 않도록 초기화
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_connections)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+        conn.commit()
+
+    def _reset_connections(self):
+        self._local = threading.local()
+
+    def _connect(self):
+        """스레드별 연결 반환"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        self._connect().execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                                (key, json.dumps(value, ensure_ascii=False), expires_at))
+
+    def purge_expired(self):
+        """만료된 항목 삭제"""
+        self._connect().execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+
+
+class RedisCacheBackend:
+    """
+    Redis 프로토콜(Redis, KeyDB, Dragonfly 등)을 사용하는 2단계 캐시 백엔드
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", ttl_seconds=3600, prefix="typo_corrector:"):
+        """
+        Args:
+            url (str): Redis 접속 URL
+            ttl_seconds (float): 항목 유효 시간(초) (기본값: 3600)
+            prefix (str): 키 접두사
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisCacheBackend requires the 'redis' package: pip install redis") from e
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        self.client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=ttl)
+
+
+def create_cache_backend(backend_type, path=None, url=None, ttl_seconds=3600):
+    """
+    설정값에 따라 2단계 캐시 백엔드 생성
+
+    Args:
+        backend_type (str): "none", "sqlite", "redis" 중 하나
+        path (str): SQLite 파일 경로
+        url (str): Redis 접속 URL
+        ttl_seconds (float): 항목 유효 시간(초)
+
+    Returns:
+        백엔드 객체 또는 None
+    """
+    if not backend_type or backend_type == "none":
+        return None
+    if backend_type == "sqlite":
+        return SQLiteCacheBackend(path, ttl_seconds=ttl_seconds)
+    if backend_type == "redis":
+        return RedisCacheBackend(url, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown cache backend: {backend_type}")
+
+
+class CorrectionCache:
+    """
+    교정 결과 2단계 캐시
+
+    1단계(프로세스 내부 LRU)를 먼저 조회하고, 없으면 2단계(공유 백엔드)를 조회합니다.
+    2단계에서 찾은 값은 1단계로 다시 올립니다.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=3600, backend=None, fingerprint=""):
+        """
+        Args:
+            max_size (int): 1단계 캐시 최대 항목 수 (기본값: 10000)
+            ttl_seconds (float): 항목 유효 시간(초) (기본값: 3600)
+            backend: 2단계 캐시 백엔드 (get/set 메서드 필요, 기본값: None)
+            fingerprint (str): 모델/후보 색인 지문 (스냅샷 호환성 확인용)
+        """
+        self.local = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.backend = backend
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.backend_errors = 0
+
+    def get(self, key):
+        """
+        캐시 조회
+
+        Args:
+            key (str): make_cache_key로 만든 키
+
+        Returns:
+            캐시된 값 또는 None
+        """
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception:
+                # 공유 캐시 장애는 캐시 미스로 처리
+                self.backend_errors += 1
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """양쪽 단계에 값 저장"""
+        self.local.set(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value)
+            except Exception:
+                self.backend_errors += 1
+
+    def stats(self):
+        """
+        캐시 통계 반환
+
+        Returns:
+            dict: 적중/미스/제거 건수 등
+        """
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self.local),
+            "max_size": self.local.max_size,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "backend_errors": self.backend_errors,
+        }
+
+    def save_snapshot(self, path):
+        """
+        1단계 캐시 내용을 파일로 저장 (재시작 시 캐시 예열용)
+
+        Args:
+            path (str): 스냅샷 파일 경로
+        """
+        if not path:
+            return
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        snapshot = {
+            "fingerprint": self.fingerprint,
+            "entries": [[key, value, expires_at] for key, value, expires_at in self.local.items()],
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        print(f"Saved {len(snapshot['entries'])} cache entries to {path}")
+
+    def load_snapshot(self, path):
+        """
+        저장된 스냅샷으로 1단계 캐시 예열
+
+        지문이 다르거나(모델/후보 색인 변경) 만료된 항목은 불러오지 않습니다.
+
+        Args:
+            path (str): 스냅샷 파일 경로
+
+        Returns:
+            int: 불러온 항목 수
+        """
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading cache snapshot: {e}")
+            return 0
+
+        if snapshot.get("fingerprint") != self.fingerprint:
+            print("Cache snapshot fingerprint mismatch. Skipping.")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        for key, value, expires_at in snapshot.get("entries", []):
+            if expires_at is not None and expires_at < now:
+                continue
+            self.local.set(key, value, expires_at=expires_at)
+            loaded += 1
+        print(f"Loaded {loaded} cache entries from {path}")
+        return loaded
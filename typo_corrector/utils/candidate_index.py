@@ -0,0 +1,83 @@
+"""
+정답 후보 문장 집합에 대한 O(1) 조회 색인 모듈
+
+dataset_candidate.json의 cor_sentence를 정규화하여 해시 색인으로 보관하고,
+입력이나 모델 예측이 이미 알려진 정답 문장인지 즉시 확인할 수 있도록 합니다.
+후보가 매우 많은 경우 문자열 집합 대신 Bloom 필터를 사용하여 메모리를 줄일 수 있습니다.
+"""
+
+import math
+import hashlib
+
+from utils.text_utils import normalize_text
+
+
+class BloomFilter:
+    """
+    메모리 효율적인 확률적 집합
+
+    포함되지 않은 문장을 포함되었다고 잘못 판단할 확률(false positive)이 있지만,
+    포함된 문장을 놓치는 경우는 없습니다.
+    """
+
+    def __init__(self, capacity, false_positive_rate=0.001):
+        """
+        Args:
+            capacity (int): 예상 항목 수
+            false_positive_rate (float): 목표 오탐률 (기본값: 0.001)
+        """
+        capacity = max(1, int(capacity))
+        self.num_bits = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, text):
+        """이중 해싱으로 비트 위치 계산"""
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, text):
+        for pos in self._positions(text):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, text):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(text))
+
+
+class CandidateIndex:
+    """
+    정규화된 정답 후보 문장 색인
+    """
+
+    def __init__(self, candidates, use_bloom=False, false_positive_rate=0.001):
+        """
+        Args:
+            candidates (list): 정답 후보 문장 리스트
+            use_bloom (bool): 문자열 집합 대신 Bloom 필터 사용 여부 (기본값: False)
+            false_positive_rate (float): Bloom 필터 목표 오탐률 (기본값: 0.001)
+        """
+        self.use_bloom = use_bloom
+        self.size = len(candidates)
+        if use_bloom:
+            self._members = BloomFilter(self.size, false_positive_rate)
+            for candidate in candidates:
+                self._members.add(normalize_text(candidate))
+        else:
+            self._members = {normalize_text(candidate) for candidate in candidates}
+
+    def __contains__(self, text):
+        """
+        문장이 알려진 정답 문장인지 확인
+
+        Args:
+            text (str): 확인할 문장
+
+        Returns:
+            bool: 정규화된 문장이 후보 집합에 있으면 True
+        """
+        return normalize_text(text) in self._members
+
+    def __len__(self):
+        return self.size
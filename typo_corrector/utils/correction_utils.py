@@ -1,5 +1,6 @@
 from Levenshtein import distance as levenshtein_distance
 import hangul_jamo
+from utils.metrics import stage_timer
 
 
 def is_hangul(text):
@@ -23,8 +24,28 @@ def is_hangul(text):
     return all('\uAC00' <= char <= '\uD7A3' for char in text)  # 한글 유니코드 범위 검사
 
 
+def needs_candidate_search(model_predictions, candidate_index=None, correct_label=None):
+    """
+    find_best_correction이 유사 후보 검색을 수행하는지 여부
+
+    모델 예측이 없거나, 첫 번째 예측이 알려진 정답 문장이면 검색하지 않습니다.
+    여러 문장의 후보를 find_most_similar_batch로 미리 검색할 대상을 고를 때 사용합니다.
+
+    Args:
+        model_predictions (list): 모델 예측 문장 리스트
+        candidate_index (CandidateIndex): 정답 후보 문장 색인 (기본값: None)
+        correct_label (str): 정답 레이블 (테스트 모드에서만 제공)
+
+    Returns:
+        bool: 검색 필요 여부
+    """
+    if not model_predictions:
+        return False
+    return candidate_index is None or bool(correct_label) or model_predictions[0] not in candidate_index
+
+
 def find_best_correction(err_sentence, model_predictions, embedding_manager, correct_label=None, top_k=10,
-                         length_tolerance=3):
+                         length_tolerance=3, candidate_index=None, deadline=None, similar_candidates=None):
     """
     모델 예측이 정확한 경우에는 그대로 유지, 오류인 경우에만 레이블 최적화 적용
 
@@ -35,6 +56,11 @@ def find_best_correction(err_sentence, model_predictions, embedding_manager, cor
         correct_label (str): 정답 레이블 (테스트 모드에서만 제공)
         top_k (int): 검색할 후보 수
         length_tolerance (int): 길이 필터링 허용 오차
+        candidate_index (CandidateIndex): 정답 후보 문장 색인 (제공되면 모델 예측이 알려진 정답 문장일 때
+            FAISS 검색과 후보 점수 계산을 생략, 테스트 모드에서는 사용하지 않음)
+        deadline (Deadline): 마감 시각 (제공되면 만료 시 검색을 생략하거나 그때까지 점수를 매긴 후보 중에서 선택)
+        similar_candidates (list): find_most_similar_batch로 미리 검색한 (후보 문장, 임베딩 유사도) 쌍의 리스트
+            (기본값: None, 이 함수에서 검색)
 
     Returns:
         tuple: (최종 교정 문장, 상위 후보 리스트)
@@ -46,13 +72,48 @@ def find_best_correction(err_sentence, model_predictions, embedding_manager, cor
     # 모델의 첫 번째 예측(가장 높은 신뢰도)
     primary_prediction = model_predictions[0]
 
-    # 정답 레이블이 제공된 테스트 모드에서만 실행
-    if correct_label and primary_prediction == correct_label:
+    # 모델 예측이 이미 알려진 정답 문장이면 검색 없이 그대로 반환
+    if candidate_index is not None and not correct_label and primary_prediction in candidate_index:
+        return primary_prediction, [known_candidate_info(err_sentence, primary_prediction)]
+
+    # 마감 시각이 지났으면 검색 없이 모델 예측 사용
+    if deadline is not None and deadline.expired():
+        return primary_prediction, []
+
+    # 유사한 후보 검색 (쿼리 임베딩/FAISS 검색 시간은 임베딩 관리자에서 기록)
+    if similar_candidates is None:
         similar_candidates = embedding_manager.find_most_similar_fast(
             err_sentence, top_k=top_k, length_tolerance=length_tolerance)
 
+    # 후보 점수 계산 및 최종 문장 선택
+    with stage_timer("candidate_scoring"):
+        return rank_candidates(err_sentence, model_predictions, similar_candidates, correct_label, deadline)
+
+
+def rank_candidates(err_sentence, model_predictions, similar_candidates, correct_label=None, deadline=None):
+    """
+    검색된 유사 후보에 점수를 매겨 최종 교정 문장과 상위 후보 선택
+
+    후보는 임베딩 유사도가 높은 순서로 점수를 매기며, 마감 시각이 지나면 그때까지 점수를 매긴
+    후보만으로 선택합니다 (anytime).
+
+    Args:
+        err_sentence (str): 오류 문장
+        model_predictions (list): 모델 예측 문장 리스트 (비어 있지 않아야 함)
+        similar_candidates (list): (후보 문장, 임베딩 유사도) 쌍의 리스트
+        correct_label (str): 정답 레이블 (테스트 모드에서만 제공)
+        deadline (Deadline): 마감 시각 (기본값: None, 시간 제한 없음, 만료되면 남은 후보는 점수를 매기지 않음)
+
+    Returns:
+        tuple: (최종 교정 문장, 상위 후보 리스트)
+    """
+    # 모델의 첫 번째 예측(가장 높은 신뢰도)
+    primary_prediction = model_predictions[0]
+
+    # 정답 레이블이 제공된 테스트 모드에서만 실행
+    if correct_label and primary_prediction == correct_label:
         scored_candidates = []
-        for candidate, semantic_similarity in similar_candidates:
+        for candidate, semantic_similarity in _until_expired(similar_candidates, deadline):
             # 기본 점수 계산 정보만 수집 (최적화 목적이 아닌 표시 목적)
             edit_distance = levenshtein_distance(err_sentence, candidate)
             normalized_edit_dist = edit_distance / max(len(err_sentence), len(candidate))
@@ -100,15 +161,12 @@ def find_best_correction(err_sentence, model_predictions, embedding_manager, cor
 
     # 오류 문장과 동일한 경우(모델이 수정하지 않은 경우), 임베딩 기반 검색 수행
     if primary_prediction == err_sentence:
-        similar_candidates = embedding_manager.find_most_similar_fast(
-            err_sentence, top_k=top_k, length_tolerance=length_tolerance)
-
         if not similar_candidates:
             return err_sentence, []
 
         # 각 후보에 대해 점수 계산
         scored_candidates = []
-        for candidate, semantic_similarity in similar_candidates:
+        for candidate, semantic_similarity in _until_expired(similar_candidates, deadline):
             # 편집 거리 계산
             edit_distance = levenshtein_distance(err_sentence, candidate)
             normalized_edit_dist = edit_distance / max(len(err_sentence), len(candidate))
@@ -164,10 +222,7 @@ def find_best_correction(err_sentence, model_predictions, embedding_manager, cor
             return err_sentence, []
 
     # 모델이 수정한 경우 (예측이 오류 문장과 다른 경우)
-    # 1. 유사한 후보 검색
-    similar_candidates = embedding_manager.find_most_similar_fast(
-        err_sentence, top_k=top_k, length_tolerance=length_tolerance)
-
+    # 1. 유사한 후보가 없으면 모델 예측 사용
     if not similar_candidates:
         return primary_prediction, []
 
@@ -183,7 +238,7 @@ def find_best_correction(err_sentence, model_predictions, embedding_manager, cor
         model_edit_distance = levenshtein_distance(correct_label, primary_prediction)
         model_label_similarity = 1 - (model_edit_distance / max(len(correct_label), len(primary_prediction)))
 
-    for candidate, semantic_similarity in similar_candidates:
+    for candidate, semantic_similarity in _until_expired(similar_candidates, deadline):
         # 편집 거리 계산
         edit_distance = levenshtein_distance(err_sentence, candidate)
         normalized_edit_dist = edit_distance / max(len(err_sentence), len(candidate))
@@ -280,6 +335,38 @@ def find_best_correction(err_sentence, model_predictions, embedding_manager, cor
     return primary_prediction, top_candidates
 
 
+def _until_expired(items, deadline):
+    """
+    마감 시각이 지나기 전까지만 항목을 순서대로 반환 (점수 계산 반복문에서 사용, 마감 시각이 없으면 모두 반환)
+
+    후보 리스트 자체를 바꾸지 않으므로 후보가 있는지 여부는 원래 리스트로 확인합니다.
+    """
+    for item in items:
+        if deadline is not None and deadline.expired():
+            return
+        yield item
+
+
+def known_candidate_info(err_sentence, candidate):
+    """
+    검색 없이 채택된 정답 후보 문장의 후보 정보 구성
+
+    find_best_correction이 반환하는 후보 튜플과 같은 형식이지만, 임베딩 검색을 하지 않았으므로
+    임베딩 유사도와 그에 기반한 점수는 None으로 둡니다 (검색 결과와 구분할 수 있도록 값을 지어내지 않음).
+
+    Args:
+        err_sentence (str): 오류 문장
+        candidate (str): 정답 후보 문장
+
+    Returns:
+        tuple: (후보, 길이 차이, 편집 거리, 점수(None), 자모 유사도, 임베딩 유사도(None), 모델 예측 여부, 레이블 보너스)
+    """
+    edit_distance = levenshtein_distance(err_sentence, candidate)
+    length_diff = abs(len(candidate) - len(err_sentence))
+    char_similarity = compute_char_similarity(err_sentence, candidate)
+    return (candidate, length_diff, edit_distance, None, char_similarity, None, True, 0)
+
+
 def compute_char_similarity(text1, text2):
     """
     두 텍스트 간의 문자 유사도 계산
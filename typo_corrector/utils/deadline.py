@@ -0,0 +1,92 @@
+"""
+요청 마감 시각(deadline) 관리를 위한 모듈
+
+요청마다 마감 시각을 두고, 추론 스레드에서 generate의 중단 조건과 후보 점수 계산의 조기 종료에 사용합니다.
+마감 시각이 지나거나 결과를 기다리는 요청이 모두 사라지면(cancel) 만료된 것으로 봅니다.
+"""
+
+import time
+import threading
+
+
+class DeadlineExceededError(Exception):
+    """마감 시각이 지나 처리를 중단했을 때 발생하는 예외 (HTTP 504)"""
+
+
+class Deadline:
+    """
+    스레드 간에 공유되는 마감 시각
+
+    Example:
+        >>> deadline = Deadline.from_timeout_ms(500)
+        >>> deadline.expired()
+        False
+    """
+
+    def __init__(self, expires_at=None):
+        """
+        Args:
+            expires_at (float): time.monotonic() 기준 마감 시각 (None이면 시간 제한 없음)
+        """
+        self.expires_at = expires_at
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_timeout_ms(cls, timeout_ms):
+        """지금부터 timeout_ms 뒤를 마감 시각으로 하는 Deadline 생성 (0 이하면 시간 제한 없음)"""
+        if not timeout_ms or timeout_ms <= 0:
+            return cls()
+        return cls(time.monotonic() + timeout_ms / 1000.0)
+
+    def remaining(self):
+        """남은 시간(초), 시간 제한이 없으면 None"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def cancel(self):
+        """결과가 더 이상 필요 없음을 표시 (이후 expired()는 항상 True)"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def expired(self):
+        """취소되었거나 마감 시각이 지났는지 확인"""
+        if self._cancelled.is_set():
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+class LatestDeadline(Deadline):
+    """
+    여러 마감 시각 중 가장 늦은 것을 따르는 마감 시각
+
+    구성 마감 시각을 나중에 추가할 수 있으며, 만료 여부는 확인할 때마다 현재 구성으로 계산합니다.
+    하나라도 시간 제한이 없으면 시간 제한이 없습니다.
+
+    Example:
+        >>> deadline = LatestDeadline([Deadline.from_timeout_ms(100)])
+        >>> deadline.add(Deadline.from_timeout_ms(500))
+    """
+
+    def __init__(self, deadlines=()):
+        """
+        Args:
+            deadlines (list): 구성 마감 시각 리스트
+        """
+        # 추론 스레드가 읽는 동안 교체될 수 있으므로 튜플로 보관
+        self.deadlines = tuple(deadlines)
+        self._cancelled = threading.Event()
+
+    @property
+    def expires_at(self):
+        expires = [deadline.expires_at for deadline in self.deadlines]
+        if not expires or None in expires:
+            return None
+        return max(expires)
+
+    def add(self, deadline):
+        """구성 마감 시각 추가 (더 늦으면 마감 시각이 연장됨)"""
+        self.deadlines = self.deadlines + (deadline,)
@@ -5,6 +5,16 @@ from sklearn.metrics.pairwise import cosine_similarity
 import faiss
 from langchain.embeddings import HuggingFaceEmbeddings
 from sentence_transformers import SentenceTransformer
+from utils.metrics import stage_timer
+from utils.ann_index import (build_ann_index, refill_index, add_vectors, search_parameters, search_range,
+                             exact_id_search, merge_results, length_offsets, length_range, index_file_name,
+                             read_faiss_index, write_faiss_index, INDEX_TYPES)
+from utils.embedding_store import (save_embeddings, write_embeddings, load_embeddings, available_storage,
+                                   storage_file_names, content_hash, read_manifest, write_manifest, check_manifest,
+                                   save_deleted_ids, load_deleted_ids, replacing, EmbeddingMatrix,
+                                   EmbeddingManifestError, STORAGE_TYPES, DELTA_SEGMENT, DELETED_IDS_FILE)
+
+DELTA_CANDIDATES_FILE = 'delta_candidates.json'
 
 
 class FastEmbeddingManager:
@@ -12,22 +22,59 @@ class FastEmbeddingManager:
     문장 임베딩을 관리하는 클래스
 
     미리 계산된 임베딩과 FAISS 색인을 사용하여 빠른 유사도 검색을 지원합니다.
+    후보 문장은 길이 순으로 정렬하여 보관하므로, 길이 허용 오차 안의 후보는 색인의 연속 구간이 되고
+    길이별 시작 위치(length_offsets)로 그 구간을 바로 찾아 구간 안에서만 검색합니다.
+    구간이 exact_window_size 이하이면 색인 대신 구간의 임베딩으로 정확히 검색합니다 (search_range 참고).
+    후보가 많으면 index_type으로 근사 최근접 이웃 색인(IVF, HNSW)을 사용할 수 있습니다 (utils/ann_index.py).
+    임베딩과 색인은 mmap으로 읽으며, storage로 float16/int8 압축 형식을 사용할 수 있습니다 (utils/embedding_store.py).
+    매니페스트로 임베딩 모델/차원이 다른 디렉토리는 로드를 거부합니다.
+    add_candidates로 추가한 후보는 기본 구간 뒤의 delta 구간에 덧붙이고 색인에도 이어지는 ID로 추가하며,
+    remove_candidates는 ID에 삭제 표시만 합니다. 추가·삭제가 compact_fraction을 넘으면 compact로 전체를 다시 씁니다.
     """
 
-    def __init__(self, model_name="BAAI/bge-m3", precomputed_dir=None):
+    def __init__(self, model_name="BAAI/bge-m3", precomputed_dir=None, index_type="flat", index_params=None,
+                 nprobe=16, ef_search=64, storage="float32", mmap=True, exact_window_size=50000, compact_fraction=0.1):
         """
         임베딩 관리자 초기화
 
         Args:
             model_name (str): 사용할 HuggingFace 모델 이름 (기본값: BAAI/bge-m3)
             precomputed_dir (str): 미리 계산된 임베딩 디렉토리 (None이면 실시간 계산)
+            index_type (str): FAISS 색인 종류 (flat, ivf_flat, ivf_pq, hnsw) (기본값: flat)
+            index_params (dict): 색인 생성 파라미터 (nlist, pq_m, pq_nbits, hnsw_m, ef_construction 등,
+                                 build_ann_index 참고) (기본값: None)
+            nprobe (int): IVF 색인에서 검색할 군집 수 (기본값: 16)
+            ef_search (int): HNSW 색인 탐색 폭 (기본값: 64)
+            storage (str): 임베딩 파일과 색인의 벡터 형식 (float32, float16, int8) (기본값: float32)
+            mmap (bool): 임베딩 파일과 색인을 mmap으로 읽을지 여부 (기본값: True)
+            exact_window_size (int): 길이 구간 후보가 이 수 이하이면 구간의 임베딩으로 정확히 검색 (기본값: 50000)
+            compact_fraction (float): delta 구간과 삭제 표시 수가 기본 구간의 이 비율을 넘으면 압축 (기본값: 0.1)
         """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown embedding storage: {storage} (expected one of {STORAGE_TYPES})")
         self.model_name = model_name
         self.precomputed_dir = precomputed_dir
+        self.index_type = index_type
+        self.index_params = dict(index_params or {})
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.storage = storage
+        self.mmap = mmap
+        self.exact_window_size = exact_window_size
+        self.compact_fraction = compact_fraction
         self.embedding_cache = {}
-        self.candidates = None
-        self.candidate_embeddings = None
+        self.candidates = None  # ID 순서의 후보 문장 (기본 구간 뒤에 delta 구간, 삭제 표시한 후보 포함)
+        self.base_count = 0  # 길이 순으로 정렬된 기본 구간의 후보 수
+        self.candidate_embeddings = None  # 기본 구간의 임베딩
+        self.delta_embeddings = None  # 추가한 순서의 delta 구간 임베딩 (ID는 base_count부터)
+        self.delta_order = None  # delta 구간 행의 길이 순 정렬 순서
+        self.delta_offsets = None  # delta_order 기준 길이별 시작 위치
+        self.deleted_ids = np.empty(0, dtype=np.int64)  # 삭제 표시한 후보 ID (정렬)
         self.faiss_index = None
+        self.length_offsets = None  # 길이 L인 후보가 시작하는 위치 (길이 순 정렬 기준)
+        self.stored_sorted = True  # 저장된 기본 구간이 길이 순인지 여부 (이전 형식은 갱신 전에 다시 씀)
         self.model = None
 
         # 미리 계산된 임베딩이 있으면 로드
@@ -48,47 +95,160 @@ class FastEmbeddingManager:
                 print(f"SentenceTransformer model loaded successfully.")
 
     def _load_precomputed_embeddings(self):
-        """미리 계산된 임베딩 로드"""
+        """
+        미리 계산된 임베딩 로드
+
+        Raises:
+            EmbeddingManifestError: 매니페스트의 임베딩 모델/차원 또는 후보 목록이 맞지 않는 경우
+        """
         try:
-            # 후보 문장과 매핑 로드
+            # 후보 문장과 매핑 로드 (기본 구간 뒤에 추가한 delta 구간)
             with open(os.path.join(self.precomputed_dir, 'candidates.json'), 'r') as f:
                 self.candidates = json.load(f)
-
-            # 임베딩 로드
-            self.candidate_embeddings = np.load(os.path.join(self.precomputed_dir, 'embeddings.npy'))
-
-            # FAISS 색인 로드 또는 생성
-            index_path = os.path.join(self.precomputed_dir, 'faiss_index.bin')
-            if os.path.exists(index_path):
-                self.faiss_index = faiss.read_index(index_path)
+            self.base_count = len(self.candidates)
+            delta_candidates = []
+            delta_path = os.path.join(self.precomputed_dir, DELTA_CANDIDATES_FILE)
+            if os.path.exists(delta_path):
+                with open(delta_path, 'r') as f:
+                    delta_candidates = json.load(f)
+
+            # 임베딩 로드 (mmap이면 시작할 때 파일 전체를 읽지 않고 필요한 페이지만 읽음)
+            manifest = read_manifest(self.precomputed_dir)
+            self.candidate_embeddings = self._load_vectors(manifest)
+            self._set_delta(delta_candidates, self._load_vectors(manifest, DELTA_SEGMENT) if delta_candidates
+                            else self._empty_delta())
+            self.deleted_ids = load_deleted_ids(self.precomputed_dir)
+            if len(self.delta_embeddings) != len(delta_candidates):
+                raise EmbeddingManifestError(f"Appended embeddings ({len(self.delta_embeddings)}) do not match "
+                                             f"appended candidates ({len(delta_candidates)}).")
+
+            # 다른 모델/차원으로 만들었거나 후보 목록과 맞지 않는 임베딩은 로드하지 않음 (매니페스트 이전 디렉토리는 확인 생략)
+            if manifest is not None:
+                check_manifest(manifest, self.model_name, self.candidate_embeddings.shape[1], self.candidates,
+                               self.base_count, len(self.deleted_ids))
+
+            # 길이 순으로 저장되지 않은 이전 형식이면 메모리에서 정렬하고 색인을 다시 구축
+            if not self._sort_by_length():
+                self._build_faiss_index(save=False)
             else:
-                self._build_faiss_index()
+                # FAISS 색인 로드 또는 생성 (색인 종류/벡터 형식별로 다른 파일에 저장)
+                index_path = os.path.join(self.precomputed_dir, index_file_name(self.index_type, self.storage))
+                if os.path.exists(index_path):
+                    self.faiss_index = read_faiss_index(index_path, mmap=self.mmap)
+                if (self.faiss_index is None or self.faiss_index.ntotal != len(self.candidates)
+                        or self.faiss_index.d != self.candidate_embeddings.shape[1]):
+                    self._build_faiss_index()
 
             print(f"Loaded precomputed embeddings for {len(self.candidates)} candidates.")
         except Exception as e:
             print(f"Error loading precomputed embeddings: {e}")
-            print("Will compute embeddings on-the-fly.")
             self.candidates = None
             self.candidate_embeddings = None
+            self.delta_embeddings = None
+            self.deleted_ids = np.empty(0, dtype=np.int64)
             self.faiss_index = None
+            self.length_offsets = None
+            # 맞지 않는 임베딩은 실시간 계산으로 대체하지 않고 로드 실패로 처리
+            if isinstance(e, EmbeddingManifestError):
+                raise
+            print("Will compute embeddings on-the-fly.")
+
+    def _load_vectors(self, manifest=None, segment=""):
+        """
+        설정한 형식의 임베딩 로드 (없으면 저장된 다른 형식을 변환하여 저장한 뒤 로드)
+
+        Args:
+            manifest (dict): 매니페스트 (있으면 매니페스트에 기록된 형식을 변환 원본으로 사용)
+            segment (str): 임베딩 구간 (기본값: "", 기본 구간, delta 구간은 기본 구간을 먼저 로드해야 함)
+
+        Returns:
+            EmbeddingMatrix: 임베딩 행렬
+        """
+        stored = available_storage(self.precomputed_dir, segment)
+        if not stored:
+            raise FileNotFoundError(f"No precomputed {segment or 'base'} embeddings in {self.precomputed_dir}")
+        if self.storage not in stored:
+            source_storage = manifest["storage"] if manifest and manifest["storage"] in stored else stored[0]
+            print(f"Converting {source_storage} {segment or 'base'} embeddings to {self.storage}...")
+            source = load_embeddings(self.precomputed_dir, source_storage, mmap=True, segment=segment)
+            # delta 구간은 기본 구간의 int8 스케일로 변환 (압축할 때 두 구간의 행을 그대로 이어 붙임)
+            scale = self.candidate_embeddings.scale if segment else None
+            save_embeddings(self.precomputed_dir, source.to_float32(), self.storage, segment, scale)
+        return load_embeddings(self.precomputed_dir, self.storage, mmap=self.mmap, segment=segment)
+
+    def _empty_delta(self):
+        """기본 구간과 같은 형식의 빈 delta 구간 임베딩"""
+        vectors = self.candidate_embeddings.vectors
+        return EmbeddingMatrix(np.empty((0, vectors.shape[1]), dtype=vectors.dtype), self.candidate_embeddings.scale)
+
+    def _set_delta(self, delta_candidates, delta_embeddings):
+        """
+        delta 구간 설정 (ID 순서 후보 목록을 기본 구간 뒤에 이어 붙이고 길이별 검색 위치 계산)
+
+        Args:
+            delta_candidates (list): 추가한 순서의 delta 구간 후보 문장 리스트
+            delta_embeddings (EmbeddingMatrix): 같은 순서의 임베딩 행렬
+        """
+        self.candidates = self.candidates[:self.base_count] + list(delta_candidates)
+        self.delta_embeddings = delta_embeddings
+        lengths = np.array([len(cand) for cand in delta_candidates], dtype=np.int64)
+        self.delta_order = np.argsort(lengths, kind="stable")
+        self.delta_offsets = length_offsets(lengths[self.delta_order])
+
+    @property
+    def num_candidates(self):
+        """삭제 표시하지 않은 후보 수"""
+        return len(self.candidates or []) - len(self.deleted_ids)
+
+    def _sort_by_length(self):
+        """
+        기본 구간의 후보 문장과 임베딩을 길이 순으로 정렬하고 길이별 시작 위치 계산
+
+        Returns:
+            bool: 이미 길이 순으로 정렬되어 있었는지 여부 (False면 순서가 바뀌어 색인을 다시 구축해야 함)
+        """
+        base = self.candidates[:self.base_count]
+        lengths = np.array([len(cand) for cand in base], dtype=np.int64)
+        already_sorted = bool(np.all(lengths[:-1] <= lengths[1:]))
+        if not already_sorted:
+            order = np.argsort(lengths, kind="stable")
+            self.candidates = [base[i] for i in order] + self.candidates[self.base_count:]
+            self.candidate_embeddings = self.candidate_embeddings[order]
+            lengths = lengths[order]
+
+        # length_offsets[L]: 길이가 L 이상인 첫 후보 위치 (길이 [a, b] 구간은 offsets[a]:offsets[b + 1])
+        self.length_offsets = length_offsets(lengths)
+        self.stored_sorted = already_sorted
+        return already_sorted
+
+    def _length_range(self, length, tolerance):
+        """길이가 length ± tolerance인 후보의 색인 구간 [start, end)"""
+        return length_range(self.length_offsets, length, tolerance)
+
+    def _build_faiss_index(self, save=True):
+        """
+        FAISS 색인 구축 (정규화된 임베딩은 색인에만 보관)
+
+        학습이 필요한 색인(IVF)은 후보 임베딩 표본으로 학습한 뒤 추가하므로, 후보가 많으면 시간이 걸립니다.
 
-    def _build_faiss_index(self):
-        """FAISS 색인 구축"""
+        Args:
+            save (bool): precomputed_dir에 색인 저장 여부 (기본값: True)
+        """
         if self.candidate_embeddings is None:
             return
 
-        print("Building FAISS index...")
-        dimension = self.candidate_embeddings.shape[1]
-        normalized_embeddings = self.candidate_embeddings.copy()
-        faiss.normalize_L2(normalized_embeddings)
+        print(f"Building FAISS index ({self.index_type}, {self.storage})...")
 
-        # 내적(코사인 유사도 계산용) 색인 생성
-        self.faiss_index = faiss.IndexFlatIP(dimension)
-        self.faiss_index.add(normalized_embeddings)
+        # 내적(코사인 유사도 계산용) 색인 생성 (벡터는 나누어 정규화하며 추가, delta 구간은 기본 구간 뒤의 ID로 추가)
+        self.faiss_index = build_ann_index(self.candidate_embeddings, self.index_type, storage=self.storage,
+                                           **self.index_params)
+        if self.delta_embeddings is not None and len(self.delta_embeddings):
+            add_vectors(self.faiss_index, self.delta_embeddings)
 
         # 색인 저장
-        if self.precomputed_dir:
-            faiss.write_index(self.faiss_index, os.path.join(self.precomputed_dir, 'faiss_index.bin'))
+        if save and self.precomputed_dir:
+            write_faiss_index(self.faiss_index,
+                              os.path.join(self.precomputed_dir, index_file_name(self.index_type, self.storage)))
 
         print("FAISS index built successfully.")
 
@@ -96,15 +256,19 @@ class FastEmbeddingManager:
         """
         후보 문장들의 임베딩을 미리 계산하고 저장
 
+        후보 문장은 길이 순으로 정렬하여 계산하고, 임베딩은 정규화하여 storage 형식으로 저장합니다.
+        출력 디렉토리의 다른 형식 파일은 삭제하고 매니페스트 버전을 올립니다.
+
         Args:
             candidates (list): 후보 문장 리스트
             output_dir (str): 출력 디렉토리
 
         Returns:
-            np.ndarray: 임베딩 배열
+            np.ndarray: 길이 순으로 정렬된 후보 문장의 임베딩 배열
         """
         self._load_model()
         print(f"Precomputing embeddings for {len(candidates)} candidates...")
+        candidates = sorted(candidates, key=len)
 
         # 임베딩 계산
         if hasattr(self.model, 'embed_documents'):
@@ -115,17 +279,216 @@ class FastEmbeddingManager:
         # 저장
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
-            np.save(os.path.join(output_dir, 'embeddings.npy'), embeddings)
-            with open(os.path.join(output_dir, 'candidates.json'), 'w') as f:
-                json.dump(candidates, f)
+            save_embeddings(output_dir, embeddings, self.storage)
+            self._write_candidates(output_dir, candidates)
+            self._remove_stale_files(output_dir)
 
-            # FAISS 색인 구축 및 저장
+            # FAISS 색인 구축 및 저장 (계산한 float32 배열 대신 저장한 파일을 mmap으로 사용)
             self.candidates = candidates
-            self.candidate_embeddings = embeddings
+            self.base_count = len(candidates)
+            self.candidate_embeddings = load_embeddings(output_dir, self.storage, mmap=self.mmap)
+            self._set_delta([], self._empty_delta())
+            self.deleted_ids = np.empty(0, dtype=np.int64)
+            self._sort_by_length()
             self._build_faiss_index()
+            write_manifest(output_dir, self.model_name, embeddings.shape[1], self.storage, candidates)
 
         return embeddings
 
+    def add_candidates(self, texts):
+        """
+        새 후보 문장만 임베딩하여 delta 구간에 덧붙이고 색인에 추가
+
+        내용 해시로 이미 있는 문장을 제외하고 새 문장만 인코더로 계산합니다. 기본 구간은 그대로 두므로
+        길이 순 ID가 바뀌지 않고, 새 문장은 delta 구간 파일(delta_embeddings*.npy, delta_candidates.json)에 덧붙이며
+        저장된 색인을 읽어 이어지는 ID로 add합니다(다시 학습하거나 기존 벡터를 다시 추가하지 않음).
+        쓰기 비용은 delta 구간 크기에 비례하고, 색인 파일만 직렬화하여 다시 씁니다.
+        delta 구간이 커지면 compact_fraction에 따라 압축합니다.
+
+        Args:
+            texts (list): 추가할 후보 문장 리스트
+
+        Returns:
+            int: 새로 추가한 문장 수
+
+        Raises:
+            EmbeddingManifestError: 새 임베딩의 차원이 저장된 임베딩과 다른 경우
+        """
+        self._require_precomputed()
+        existing = {content_hash(cand) for cand in self._live_candidates()}
+        new_texts = [text for text in dict.fromkeys(texts) if text and content_hash(text) not in existing]
+        if not new_texts:
+            return 0
+
+        print(f"Embedding {len(new_texts)} new candidates...")
+        new_embeddings = np.asarray(self.embed_texts(new_texts, use_cache=False), dtype=np.float32)
+        if new_embeddings.shape[1] != self.candidate_embeddings.shape[1]:
+            raise EmbeddingManifestError(f"Embedding dimension mismatch: {self.model_name} returns "
+                                         f"{new_embeddings.shape[1]}, stored {self.candidate_embeddings.shape[1]}.")
+
+        # delta 구간 파일에 새 행을 덧붙여 저장 (int8은 기본 구간의 스케일로 변환)
+        directory = self.precomputed_dir
+        previous_total = len(self.candidates)
+        delta_candidates = self.candidates[self.base_count:] + new_texts
+        write_embeddings(directory, self.delta_embeddings.append(new_embeddings), DELTA_SEGMENT)
+        self._write_candidates(directory, delta_candidates, DELTA_CANDIDATES_FILE)
+        self._remove_stale_files(directory, keep_delta=True)
+        self._set_delta(delta_candidates, load_embeddings(directory, self.storage, mmap=self.mmap,
+                                                          segment=DELTA_SEGMENT))
+
+        # 저장된 색인에 새 벡터만 추가 (mmap으로 읽은 색인은 읽기 전용이므로 메모리에 읽어 추가한 뒤 다시 읽음)
+        index_path = os.path.join(directory, index_file_name(self.index_type, self.storage))
+        index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+        if index is not None and index.ntotal == previous_total:
+            print(f"Adding {len(new_texts)} vectors to FAISS index ({self.index_type}, {self.storage})...")
+            write_faiss_index(add_vectors(index, self.delta_embeddings, start=previous_total - self.base_count),
+                              index_path)
+            self.faiss_index = read_faiss_index(index_path, mmap=self.mmap)
+        else:
+            self._build_faiss_index()
+
+        manifest = self._write_manifest()
+        print(f"Appended {len(new_texts)} candidates (version {manifest['version']}).")
+        self._compact_if_needed()
+        return len(new_texts)
+
+    def remove_candidates(self, texts):
+        """
+        후보 문장에 삭제 표시 (임베딩과 색인은 그대로 두고 검색 결과에서 제외)
+
+        삭제한 ID는 deleted_ids.npy에 기록하며, 압축할 때 임베딩과 색인에서 지웁니다.
+
+        Args:
+            texts (list): 삭제할 후보 문장 리스트
+
+        Returns:
+            int: 삭제한 문장 수
+        """
+        self._require_precomputed()
+        targets = {content_hash(text) for text in texts}
+        deleted = set(self.deleted_ids.tolist())
+        ids = [i for i, cand in enumerate(self.candidates) if i not in deleted and content_hash(cand) in targets]
+        if ids:
+            self.deleted_ids = np.array(sorted(deleted.union(ids)), dtype=np.int64)
+            save_deleted_ids(self.precomputed_dir, self.deleted_ids)
+            manifest = self._write_manifest()
+            print(f"Marked {len(ids)} candidates as deleted (version {manifest['version']}).")
+            self._compact_if_needed()
+        return len(ids)
+
+    def compact(self):
+        """
+        삭제 표시한 후보를 지우고 delta 구간을 기본 구간에 합쳐 길이 순으로 다시 씀 (전체 후보 수에 비례)
+
+        Returns:
+            int: 압축 후 후보 수
+        """
+        self._require_precomputed()
+        live = np.setdiff1d(np.arange(len(self.candidates), dtype=np.int64), self.deleted_ids)
+        base_ids = live[live < self.base_count]
+        delta_ids = live[live >= self.base_count] - self.base_count
+        candidates = [self.candidates[i] for i in live]
+        embeddings = EmbeddingMatrix(np.concatenate([self.candidate_embeddings[base_ids].vectors,
+                                                     self.delta_embeddings[delta_ids].vectors]),
+                                     self.candidate_embeddings.scale)
+        order = np.argsort([len(cand) for cand in candidates], kind="stable")
+        self._commit([candidates[i] for i in order], embeddings[order])
+        return len(candidates)
+
+    def _compact_if_needed(self):
+        """delta 구간과 삭제 표시 수가 기본 구간의 compact_fraction을 넘으면 압축"""
+        pending = len(self.candidates) - self.base_count + len(self.deleted_ids)
+        if pending > self.compact_fraction * max(self.base_count, 1):
+            print(f"Compacting embeddings ({pending} appended or deleted candidates)...")
+            self.compact()
+
+    def _live_candidates(self):
+        """삭제 표시하지 않은 후보 문장 리스트"""
+        deleted = set(self.deleted_ids.tolist())
+        return [cand for i, cand in enumerate(self.candidates) if i not in deleted]
+
+    def _require_precomputed(self):
+        """
+        후보 추가·삭제는 precomputed_dir에 저장된 임베딩이 있어야 함
+
+        길이 순으로 저장되지 않은 이전 형식이면 저장된 ID와 메모리의 ID가 다르므로 먼저 길이 순으로 다시 씁니다.
+        """
+        if not self.precomputed_dir or self.candidate_embeddings is None:
+            raise RuntimeError("Candidate updates need precomputed embeddings; run precompute_embeddings first.")
+        if not self.stored_sorted:
+            print("Rewriting embeddings in length order before updating...")
+            self._commit(self.candidates, self.candidate_embeddings)
+
+    def _write_manifest(self):
+        """현재 구간 크기와 삭제 표시 수로 매니페스트 저장 (버전 증가)"""
+        return write_manifest(self.precomputed_dir, self.model_name, self.candidate_embeddings.shape[1], self.storage,
+                              self.candidates, self.base_count, len(self.deleted_ids))
+
+    def _commit(self, candidates, embeddings):
+        """
+        후보 목록과 임베딩을 기본 구간으로 다시 쓰고 색인을 다시 채운 뒤 매니페스트 버전 증가 (전체 후보 수에 비례)
+
+        delta 구간과 삭제 표시 파일은 지웁니다. 파일은 임시 파일에 쓴 뒤 교체하므로 이전 파일을 mmap으로 사용 중인
+        서버 프로세스에는 영향이 없고, 매니페스트를 마지막에 쓰므로 갱신 도중의 디렉토리는 로드할 때
+        코퍼스 해시 불일치로 거부됩니다.
+
+        Args:
+            candidates (list): 길이 순으로 정렬된 후보 문장 리스트
+            embeddings (EmbeddingMatrix): 후보 순서와 같은 순서의 임베딩 행렬
+        """
+        directory = self.precomputed_dir
+        write_embeddings(directory, embeddings)
+        self._write_candidates(directory, candidates)
+        self._remove_stale_files(directory)
+
+        self.candidates = candidates
+        self.base_count = len(candidates)
+        self.candidate_embeddings = load_embeddings(directory, self.storage, mmap=self.mmap)
+        self._set_delta([], self._empty_delta())
+        self.deleted_ids = np.empty(0, dtype=np.int64)
+        self._sort_by_length()
+
+        # 저장된 색인이 있으면 학습 결과를 유지하고 벡터만 다시 채움 (mmap으로 읽은 색인은 읽기 전용이므로 다시 읽음)
+        index_path = os.path.join(directory, index_file_name(self.index_type, self.storage))
+        if os.path.exists(index_path):
+            print(f"Refilling FAISS index ({self.index_type}, {self.storage})...")
+            index = refill_index(faiss.read_index(index_path), self.candidate_embeddings)
+            write_faiss_index(index, index_path)
+            self.faiss_index = read_faiss_index(index_path, mmap=self.mmap)
+        else:
+            self._build_faiss_index()
+
+        manifest = self._write_manifest()
+        print(f"Updated embeddings to version {manifest['version']} ({manifest['count']} candidates).")
+
+    @staticmethod
+    def _write_candidates(directory, candidates, name='candidates.json'):
+        """후보 문장 목록을 임시 파일에 쓴 뒤 교체"""
+        path = os.path.join(directory, name)
+        with replacing(path) as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(candidates, f)
+
+    def _remove_stale_files(self, directory, keep_delta=False):
+        """
+        후보 목록이 바뀌어 맞지 않게 된 다른 형식의 임베딩 파일과 다른 종류의 색인 파일 삭제
+
+        Args:
+            directory (str): 임베딩 디렉토리
+            keep_delta (bool): 현재 형식의 delta 구간과 삭제 표시 파일 유지 여부 (기본값: False, 전체를 다시 쓴 경우)
+        """
+        keep = set(storage_file_names(self.storage)) | {index_file_name(self.index_type, self.storage)}
+        if keep_delta:
+            keep |= set(storage_file_names(self.storage, DELTA_SEGMENT)) | {DELTA_CANDIDATES_FILE, DELETED_IDS_FILE}
+        stale = [name for storage in STORAGE_TYPES for segment in ("", DELTA_SEGMENT)
+                 for name in storage_file_names(storage, segment)]
+        stale += [DELTA_CANDIDATES_FILE, DELETED_IDS_FILE]
+        stale += [name for name in os.listdir(directory) if name.startswith("faiss_index") and name.endswith(".bin")]
+        for name in set(stale) - keep:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
     def embed_texts(self, texts, use_cache=True):
         """
         주어진 텍스트 리스트를 임베딩으로 변환
@@ -143,8 +506,8 @@ class FastEmbeddingManager:
             return np.array([])
 
         if use_cache:
-            # 캐시에 없는 텍스트만 새로 임베딩
-            new_texts = [text for text in texts if text not in self.embedding_cache]
+            # 캐시에 없는 텍스트만 새로 임베딩 (중복 제거)
+            new_texts = list(dict.fromkeys(text for text in texts if text not in self.embedding_cache))
             if new_texts:
                 if hasattr(self.model, 'embed_documents'):
                     new_embeddings = np.array(self.model.embed_documents(new_texts))
@@ -174,50 +537,84 @@ class FastEmbeddingManager:
         Returns:
             list: (후보 텍스트, 유사도 점수) 쌍의 리스트
         """
-        if self.faiss_index is None or self.candidates is None:
-            # 미리 계산된 임베딩이 없으면 일반 방식 사용
-            # candidates가 None인지 확인
-            if not hasattr(self, 'candidates') or self.candidates is None:
-                print("Warning: No candidates available. Loading all candidates from dataset.")
-                return []
-            return self.find_most_similar(query_text, self.candidates, top_k)
-
-        # 길이 기반 필터링 (선택적)
-        if length_tolerance > 0:
-            filtered_indices = [i for i, cand in enumerate(self.candidates)
-                                if abs(len(cand) - len(query_text)) <= length_tolerance]
+        return self.find_most_similar_batch([query_text], top_k=top_k, length_tolerance=length_tolerance)[0]
 
-            if not filtered_indices:  # 필터링 결과가 없으면 모든 후보 사용
-                filtered_indices = list(range(len(self.candidates)))
-
-            # 필터링된 후보만 검색하기 위한 임시 색인 생성
-            filtered_embeddings = self.candidate_embeddings[filtered_indices]
+    def find_most_similar_batch(self, queries, top_k=10, length_tolerance=3):
+        """
+        여러 쿼리 텍스트와 가장 유사한 후보를 한 번에 찾기
 
-            dimension = filtered_embeddings.shape[1]
-            temp_index = faiss.IndexFlatIP(dimension)
-            normalized_embeddings = filtered_embeddings.copy()
-            faiss.normalize_L2(normalized_embeddings)
-            temp_index.add(normalized_embeddings)
+        모든 쿼리를 한 번의 인코더 호출로 임베딩하고, 길이 구간이 같은 쿼리끼리 묶어
+        구간마다 한 번의 다중 행 FAISS 검색을 수행합니다.
+        (FAISS 선택기는 검색 호출 전체에 적용되므로 구간이 다른 쿼리는 같은 호출로 검색할 수 없음)
 
-            # 쿼리 임베딩 계산
-            query_embedding = self.embed_texts([query_text])[0].reshape(1, -1)
-            faiss.normalize_L2(query_embedding)
+        Args:
+            queries (list): 쿼리 텍스트 리스트
+            top_k (int): 쿼리별로 반환할 상위 유사 텍스트 수
+            length_tolerance (int): 길이 필터링 허용 오차
 
-            # 유사도 검색
-            similarities, indices = temp_index.search(query_embedding, min(top_k, len(filtered_indices)))
+        Returns:
+            list: 쿼리 순서와 같은 순서의 (후보 텍스트, 유사도 점수) 쌍 리스트의 리스트
 
-            # 실제 후보 인덱스로 변환
-            results = [(self.candidates[filtered_indices[idx]], float(similarities[0][i]))
-                       for i, idx in enumerate(indices[0]) if idx < len(filtered_indices)]
-        else:
-            # 전체 색인에서 검색
-            query_embedding = self.embed_texts([query_text])[0].reshape(1, -1)
-            faiss.normalize_L2(query_embedding)
+        Example:
+            >>> manager.find_most_similar_batch(["안녕하세요 반갑슴니다", "오늘 날씨가 좋내요"], top_k=5)
+            [[('안녕하세요 반갑습니다', 0.97), ...], [('오늘 날씨가 좋네요', 0.98), ...]]
+        """
+        queries = list(queries)
+        if not queries:
+            return []
 
-            similarities, indices = self.faiss_index.search(query_embedding, top_k)
-            results = [(self.candidates[idx], float(similarities[0][i]))
-                       for i, idx in enumerate(indices[0]) if idx < len(self.candidates)]
+        if self.faiss_index is None or self.candidates is None:
+            # 미리 계산된 임베딩이 없으면 일반 방식 사용
+            # candidates가 None인지 확인
+            if not hasattr(self, 'candidates') or self.candidates is None:
+                print("Warning: No candidates available. Loading all candidates from dataset.")
+                return [[] for _ in queries]
+            return [self.find_most_similar(query_text, self.candidates, top_k) for query_text in queries]
 
+        # 쿼리 임베딩 계산
+        with stage_timer("query_embedding"):
+            query_embeddings = np.ascontiguousarray(self.embed_texts(queries), dtype=np.float32)
+            faiss.normalize_L2(query_embeddings)
+
+        # 길이 기반 필터링 (선택적): 기본 구간의 ID 구간과 delta 구간의 길이 순 위치 구간이 같은 쿼리끼리 묶음
+        groups = {}
+        for row, query_text in enumerate(queries):
+            window = None
+            if length_tolerance > 0 and self.length_offsets is not None:
+                start, end = self._length_range(len(query_text), length_tolerance)
+                delta_start, delta_end = length_range(self.delta_offsets, len(query_text), length_tolerance)
+                if end > start or delta_end > delta_start:  # 구간이 비어 있으면 모든 후보 사용
+                    window = (start, end, delta_start, delta_end)
+            groups.setdefault(window, []).append(row)
+
+        # 유사도 검색 (구간 검색은 작은 구간을 정확히 검색하고, 근사 색인에서 결과가 모자라지 않도록 보정)
+        # 삭제 표시한 후보는 결과에서 버리므로 그 수만큼 더 검색
+        fetch_k = top_k + len(self.deleted_ids)
+        results = [None] * len(queries)
+        with stage_timer("faiss_search"):
+            for window, rows in groups.items():
+                found = []
+                if window is not None:
+                    start, end, delta_start, delta_end = window
+                    if end > start:
+                        found.append(search_range(self.faiss_index, self.candidate_embeddings, query_embeddings[rows],
+                                                  start, end, fetch_k, nprobe=self.nprobe, ef_search=self.ef_search,
+                                                  exact_window_size=self.exact_window_size))
+                    if delta_end > delta_start:
+                        # delta 구간은 작으므로 길이가 맞는 행만 정확히 검색 (ID는 base_count부터)
+                        similarities, delta_rows = exact_id_search(self.delta_embeddings, query_embeddings[rows],
+                                                                   self.delta_order[delta_start:delta_end], fetch_k)
+                        found.append((similarities, delta_rows + self.base_count))
+                else:
+                    params = search_parameters(self.faiss_index, nprobe=self.nprobe, ef_search=self.ef_search)
+                    found.append(self.faiss_index.search(query_embeddings[rows], fetch_k, params=params))
+                similarities, indices = merge_results(found, top_k, self.deleted_ids)
+
+                # 결과가 k보다 적으면 -1로 채워지므로 제외
+                for row, row_similarities, row_indices in zip(rows, similarities, indices):
+                    results[row] = [(self.candidates[idx], float(similarity))
+                                    for similarity, idx in zip(row_similarities, row_indices)
+                                    if 0 <= idx < len(self.candidates)]
         return results
 
     def find_most_similar(self, query_text, reference_texts, top_k=5):
@@ -0,0 +1,378 @@
+"""
+후보 문장 임베딩의 디스크 저장 형식 모듈
+
+임베딩은 L2 정규화한 뒤 float32, float16 또는 int8(차원별 스케일 양자화)로 .npy 파일에 저장하고
+np.load(mmap_mode='r')로 읽습니다. 여러 워커 프로세스가 같은 페이지 캐시를 공유하고,
+시작할 때 파일 전체를 읽지 않으며 필요한 부분만 페이지 단위로 읽습니다.
+- float32: embeddings.npy (기존 형식과 같은 파일 이름, 벡터당 4d 바이트)
+- float16: embeddings_fp16.npy (벡터당 2d 바이트)
+- int8: embeddings_int8.npy + embeddings_int8_scale.npy (벡터당 d 바이트, 차원별 최대 절댓값으로 스케일)
+전체 구축 후 추가한 후보는 길이 순으로 정렬된 기본 구간과 따로 delta 구간(delta_embeddings*.npy, 추가 순서,
+int8은 기본 구간의 스케일 공유)에 저장하고, 삭제한 후보는 deleted_ids.npy에 ID로만 기록합니다(압축할 때 정리).
+디렉토리의 manifest.json에는 임베딩 모델 이름, 차원, 저장 형식, 후보 수, 코퍼스 해시와 버전을 기록하여
+다른 모델로 만든 임베딩이나 후보 목록과 맞지 않는 파일을 로드하지 않도록 합니다.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+_FILE_NAMES = {
+    "float32": "embeddings.npy",
+    "float16": "embeddings_fp16.npy",
+    "int8": "embeddings_int8.npy",
+}
+_INT8_SCALE_FILE = "embeddings_int8_scale.npy"
+DELTA_SEGMENT = "delta"
+DELETED_IDS_FILE = "deleted_ids.npy"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+
+
+class EmbeddingManifestError(ValueError):
+    """저장된 임베딩이 현재 임베딩 모델/차원 또는 후보 목록과 맞지 않을 때 발생하는 예외"""
+
+
+class EmbeddingMatrix:
+    """
+    저장 형식과 관계없이 float32 행을 꺼낼 수 있는 임베딩 행렬 (mmap 배열을 감쌈)
+
+    Example:
+        >>> matrix = load_embeddings("./embeddings", "int8")
+        >>> matrix.to_float32(slice(0, 1024)).shape
+        (1024, 1024)
+    """
+
+    def __init__(self, vectors, scale=None):
+        """
+        Args:
+            vectors (np.ndarray): 저장된 벡터 배열 (N, d) (np.memmap 가능)
+            scale (np.ndarray): int8 형식의 차원별 스케일 (d,) (기본값: None)
+        """
+        self.vectors = vectors
+        self.scale = scale
+
+    @property
+    def shape(self):
+        return self.vectors.shape
+
+    @property
+    def storage(self):
+        if self.scale is not None:
+            return "int8"
+        return "float16" if self.vectors.dtype == np.float16 else "float32"
+
+    @property
+    def nbytes(self):
+        return int(self.vectors.nbytes)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __getitem__(self, index):
+        """행 선택 (정렬 등으로 순서를 바꾸면 메모리에 복사된 행렬 반환)"""
+        return EmbeddingMatrix(np.asarray(self.vectors[index]), self.scale)
+
+    def append(self, embeddings):
+        """
+        새 임베딩을 같은 형식(int8은 같은 스케일)으로 변환하여 뒤에 붙인 행렬 반환 (메모리에 복사)
+
+        Args:
+            embeddings (np.ndarray): 추가할 임베딩 배열 (M, d)
+
+        Returns:
+            EmbeddingMatrix: (N + M, d) 임베딩 행렬
+        """
+        encoded, _ = encode_embeddings(embeddings, self.storage, self.scale)
+        return EmbeddingMatrix(np.concatenate([np.asarray(self.vectors), encoded]), self.scale)
+
+    def to_float32(self, index=slice(None)):
+        """
+        선택한 행을 float32로 변환 (int8은 스케일을 곱해 복원)
+
+        Args:
+            index (slice | np.ndarray): 행 선택 (기본값: 전체)
+
+        Returns:
+            np.ndarray: C 연속 float32 배열
+        """
+        rows = np.asarray(self.vectors[index], dtype=np.float32)
+        if self.scale is not None:
+            rows = rows * self.scale
+        return np.ascontiguousarray(rows, dtype=np.float32)
+
+
+def embeddings_file_name(storage, segment=""):
+    """저장 형식/구간별 임베딩 파일 이름 (segment가 있으면 앞에 붙임, 예: delta_embeddings.npy)"""
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage: {storage} (expected one of {STORAGE_TYPES})")
+    return f"{segment}_{_FILE_NAMES[storage]}" if segment else _FILE_NAMES[storage]
+
+
+def available_storage(directory, segment=""):
+    """
+    디렉토리에 저장된 임베딩 형식 목록 (float32, float16, int8 순)
+
+    Args:
+        directory (str): 임베딩 디렉토리
+        segment (str): 임베딩 구간 (기본값: "", 기본 구간)
+
+    Returns:
+        list: 저장 형식 리스트 (없으면 빈 리스트)
+    """
+    if not directory:
+        return []
+    return [storage for storage in STORAGE_TYPES
+            if os.path.exists(os.path.join(directory, embeddings_file_name(storage, segment)))]
+
+
+def storage_file_names(storage, segment=""):
+    """저장 형식이 사용하는 파일 이름 목록 (int8 스케일 파일은 기본 구간에만 있음)"""
+    names = [embeddings_file_name(storage, segment)]
+    if storage == "int8" and not segment:
+        names.append(_INT8_SCALE_FILE)
+    return names
+
+
+def encode_embeddings(embeddings, storage="float32", scale=None):
+    """
+    임베딩을 L2 정규화하여 저장 형식으로 변환
+
+    Args:
+        embeddings (np.ndarray): 임베딩 배열 (N, d)
+        storage (str): 저장 형식 (float32, float16, int8) (기본값: float32)
+        scale (np.ndarray): int8 차원별 스케일 (기본값: None, 임베딩에서 계산)
+
+    Returns:
+        tuple: (변환된 벡터 배열, int8 스케일 또는 None)
+    """
+    vectors = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+
+    if storage == "float16":
+        return vectors.astype(np.float16), None
+    if storage == "int8":
+        # 차원별 최대 절댓값을 127에 맞추는 대칭 양자화 (정규화 벡터는 성분이 작아 전역 스케일은 정밀도가 낮음)
+        if scale is None:
+            scale = np.abs(vectors).max(axis=0) / 127.0 if len(vectors) else np.ones(vectors.shape[1])
+            scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+        return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8), scale
+    return vectors, None
+
+
+@contextmanager
+def replacing(path):
+    """
+    같은 디렉토리의 고유한 임시 파일 경로를 넘겨주고, 쓰기가 끝나면 path로 교체
+
+    여러 프로세스(워커, 갱신 스크립트)가 같은 파일을 동시에 써도 서로의 임시 파일을 덮어쓰지 않으며,
+    이 파일을 mmap으로 읽고 있는 프로세스는 이전 내용을 계속 사용합니다. 쓰다가 실패하면 임시 파일을 삭제합니다.
+
+    Args:
+        path (str): 최종 파일 경로
+
+    Yields:
+        str: 임시 파일 경로
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        # mkstemp는 소유자만 읽을 수 있게 만들므로 다른 사용자로 실행하는 서버도 읽을 수 있게 변경
+        os.chmod(tmp_path, 0o644)
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save_array(path, array):
+    """임시 파일에 쓴 뒤 교체"""
+    with replacing(path) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+
+
+def write_embeddings(directory, matrix, segment=""):
+    """
+    임베딩 행렬을 저장 형식 그대로 저장
+
+    Args:
+        directory (str): 출력 디렉토리
+        matrix (EmbeddingMatrix): 임베딩 행렬
+        segment (str): 임베딩 구간 (기본값: "", 기본 구간)
+                       delta 구간은 기본 구간의 int8 스케일을 공유하므로 스케일 파일을 쓰지 않음
+
+    Returns:
+        str: 저장한 임베딩 파일 경로
+    """
+    path = os.path.join(directory, embeddings_file_name(matrix.storage, segment))
+    if matrix.scale is not None and not segment:
+        _save_array(os.path.join(directory, _INT8_SCALE_FILE), matrix.scale)
+    _save_array(path, np.asarray(matrix.vectors))
+    return path
+
+
+def save_embeddings(directory, embeddings, storage="float32", segment="", scale=None):
+    """
+    임베딩을 L2 정규화하여 지정한 형식으로 저장
+
+    Args:
+        directory (str): 출력 디렉토리
+        embeddings (np.ndarray): 임베딩 배열 (N, d)
+        storage (str): 저장 형식 (float32, float16, int8) (기본값: float32)
+        segment (str): 임베딩 구간 (기본값: "", 기본 구간)
+        scale (np.ndarray): int8 차원별 스케일 (기본값: None, 임베딩에서 계산)
+
+    Returns:
+        str: 저장한 임베딩 파일 경로
+    """
+    vectors, scale = encode_embeddings(embeddings, storage, scale)
+    return write_embeddings(directory, EmbeddingMatrix(vectors, scale), segment)
+
+
+def load_embeddings(directory, storage="float32", mmap=True, segment=""):
+    """
+    저장된 임베딩 로드
+
+    Args:
+        directory (str): 임베딩 디렉토리
+        storage (str): 저장 형식 (기본값: float32)
+        mmap (bool): mmap_mode='r'로 읽을지 여부 (기본값: True, False면 메모리에 모두 읽음)
+        segment (str): 임베딩 구간 (기본값: "", 기본 구간)
+
+    Returns:
+        EmbeddingMatrix: 임베딩 행렬
+    """
+    mmap_mode = "r" if mmap else None
+    vectors = np.load(os.path.join(directory, embeddings_file_name(storage, segment)), mmap_mode=mmap_mode)
+    scale = None
+    if storage == "int8":
+        scale = np.load(os.path.join(directory, _INT8_SCALE_FILE)).astype(np.float32)
+    return EmbeddingMatrix(vectors, scale)
+
+
+def save_deleted_ids(directory, ids):
+    """삭제 표시한 후보 ID 저장 (없으면 파일 삭제)"""
+    path = os.path.join(directory, DELETED_IDS_FILE)
+    if len(ids):
+        _save_array(path, np.asarray(ids, dtype=np.int64))
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def load_deleted_ids(directory):
+    """삭제 표시한 후보 ID 로드 (정렬된 int64 배열, 없으면 빈 배열)"""
+    path = os.path.join(directory, DELETED_IDS_FILE)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64)
+    return np.load(path).astype(np.int64)
+
+
+def content_hash(text):
+    """후보 문장 내용 해시 (16자리 16진수)"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def corpus_hash(candidates):
+    """
+    저장된 순서의 후보 문장 목록 해시 (16자리 16진수)
+
+    순서도 포함하므로 후보 목록과 임베딩 행의 대응이 어긋난 경우도 찾아냅니다.
+
+    Args:
+        candidates (list): 저장된 순서의 후보 문장 리스트
+
+    Returns:
+        str: 코퍼스 해시
+    """
+    digest = hashlib.sha1()
+    for value in (content_hash(text) for text in candidates):
+        digest.update(value.encode("ascii"))
+    return digest.hexdigest()[:16]
+
+
+def read_manifest(directory):
+    """매니페스트 로드 (없으면 None, 매니페스트 이전에 만든 디렉토리)"""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_manifest(directory, embedding_model, dimension, storage, candidates, base_count=None, deleted_count=0):
+    """
+    매니페스트 저장 (기존 매니페스트가 있으면 버전 증가)
+
+    Args:
+        directory (str): 임베딩 디렉토리
+        embedding_model (str): 임베딩 모델 이름
+        dimension (int): 임베딩 차원
+        storage (str): 저장 형식
+        candidates (list): ID 순서의 후보 문장 리스트 (기본 구간 뒤에 delta 구간, 삭제 표시한 후보 포함)
+        base_count (int): 길이 순으로 정렬된 기본 구간의 후보 수 (기본값: None, 전체)
+        deleted_count (int): 삭제 표시한 후보 수 (기본값: 0)
+
+    Returns:
+        dict: 저장한 매니페스트
+    """
+    previous = read_manifest(directory)
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": (previous or {}).get("version", 0) + 1,
+        "embedding_model": embedding_model,
+        "dimension": int(dimension),
+        "storage": storage,
+        "count": len(candidates),
+        "base_count": len(candidates) if base_count is None else int(base_count),
+        "deleted_count": int(deleted_count),
+        "corpus_hash": corpus_hash(candidates),
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    path = os.path.join(directory, MANIFEST_FILE)
+    with replacing(path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def check_manifest(manifest, embedding_model, dimension, candidates, base_count=None, deleted_count=0):
+    """
+    저장된 임베딩이 현재 임베딩 모델/차원, 후보 목록과 맞는지 확인
+
+    Args:
+        manifest (dict): 매니페스트
+        embedding_model (str): 현재 임베딩 모델 이름
+        dimension (int): 로드한 임베딩 차원
+        candidates (list): 로드한 ID 순서의 후보 문장 리스트 (기본 구간 뒤에 delta 구간)
+        base_count (int): 로드한 기본 구간의 후보 수 (기본값: None, 전체)
+        deleted_count (int): 로드한 삭제 표시 수 (기본값: 0)
+
+    Raises:
+        EmbeddingManifestError: 모델, 차원, 후보 수, 구간 크기, 삭제 수 또는 코퍼스 해시가 다른 경우
+    """
+    if manifest.get("format", MANIFEST_FORMAT) > MANIFEST_FORMAT:
+        raise EmbeddingManifestError(f"Unsupported embedding manifest format: {manifest['format']}")
+    if manifest["embedding_model"] != embedding_model:
+        raise EmbeddingManifestError(f"Embeddings were built with {manifest['embedding_model']}, "
+                                     f"but the embedding model is {embedding_model}.")
+    if manifest["dimension"] != dimension:
+        raise EmbeddingManifestError(f"Embedding dimension mismatch: manifest {manifest['dimension']}, "
+                                     f"stored {dimension}.")
+    base_count = len(candidates) if base_count is None else base_count
+    if (manifest["count"] != len(candidates) or manifest.get("base_count", manifest["count"]) != base_count
+            or manifest.get("deleted_count", 0) != deleted_count
+            or manifest["corpus_hash"] != corpus_hash(candidates)):
+        raise EmbeddingManifestError("Stored candidates do not match the manifest "
+                                     "(incomplete copy or update); rebuild or re-copy the embedding directory.")
@@ -0,0 +1,155 @@
+"""
+지연 시간 목표(SLO)에 맞춰 생성 예산을 조절하기 위한 모듈
+
+요청 처리 지연 시간의 p99, 대기열 깊이, 입력 길이와 한글 전용 여부 같은 가벼운 신호로
+배치마다 생성 프로파일(greedy, small_beam, full)을 고릅니다.
+과부하 시에는 시간 초과로 요청을 잃는 대신 탐색 폭을 줄여 품질을 단계적으로 낮춥니다.
+"""
+
+import re
+import threading
+from collections import deque
+
+from utils.generation_utils import DEFAULT_GENERATION_KWARGS
+
+# 비용이 낮은 순서의 생성 프로파일
+PROFILE_ORDER = ("greedy", "small_beam", "full")
+
+GENERATION_PROFILES = {
+    "greedy": {
+        "num_beams": 1,
+        "num_return_sequences": 1,
+        "do_sample": False,
+        "early_stopping": False,
+    },
+    "small_beam": {
+        "num_beams": 4,
+        "num_return_sequences": 3,
+        "do_sample": False,
+    },
+    "full": dict(DEFAULT_GENERATION_KWARGS),
+}
+
+# 한글, 공백, 기본 문장부호로만 이루어진 입력
+HANGUL_ONLY_PATTERN = re.compile(r"^[가-힣ㄱ-ㅎㅏ-ㅣ\s.,?!~\"'’”…·-]+$")
+
+
+def is_hangul_only(text):
+    """입력이 한글과 기본 문장부호로만 이루어졌는지 확인"""
+    return bool(HANGUL_ONLY_PATTERN.match(text))
+
+
+class GenerationBudgetController:
+    """
+    SLO 기반 생성 프로파일 선택기
+
+    최근 요청 지연 시간의 p99가 목표를 넘거나 대기열이 차오르면 프로파일을 한 단계 낮추고,
+    p99가 목표보다 충분히 낮고 대기열이 비어 있으면 한 단계 올립니다.
+    단계를 바꾼 뒤에는 관측 창을 비우고 새 표본이 모일 때까지 다시 바꾸지 않습니다.
+    """
+
+    def __init__(self, latency_target_ms=1000, window_size=200, min_samples=20, recover_ratio=0.6,
+                 overload_queue_ratio=0.5, short_length=20, long_length=80, enabled=True):
+        """
+        Args:
+            latency_target_ms (float): 요청 지연 시간 p99 목표(ms) (기본값: 1000)
+            window_size (int): p99 계산에 사용할 최근 요청 수 (기본값: 200)
+            min_samples (int): 단계를 바꾸기 전에 필요한 최소 표본 수 (기본값: 20)
+            recover_ratio (float): p99가 목표의 이 비율 아래면 한 단계 올림 (기본값: 0.6)
+            overload_queue_ratio (float): 대기열 사용률이 이 값 이상이면 즉시 greedy 사용 (기본값: 0.5)
+            short_length (int): 짧은 입력으로 보는 최대 글자 수 (기본값: 20)
+            long_length (int): 긴 입력으로 보는 최소 글자 수 (기본값: 80)
+            enabled (bool): False면 항상 full 프로파일 사용 (기본값: True)
+        """
+        self.latency_target = latency_target_ms / 1000.0
+        self.min_samples = max(1, int(min_samples))
+        self.recover_ratio = recover_ratio
+        self.overload_queue_ratio = overload_queue_ratio
+        self.short_length = short_length
+        self.long_length = long_length
+        self.enabled = enabled
+        self.level = len(PROFILE_ORDER) - 1
+        self._latencies = deque(maxlen=max(self.min_samples, int(window_size)))
+        self._lock = threading.Lock()
+
+        # 통계
+        self.downgrades = 0
+        self.upgrades = 0
+
+    def observe(self, seconds):
+        """요청 하나의 지연 시간(초) 기록"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def p99(self):
+        """최근 요청 지연 시간의 p99(초), 표본이 없으면 None"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+    def _update_level(self):
+        """최근 p99로 기본 단계 조정"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return
+            latencies = sorted(self._latencies)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+            if p99 > self.latency_target and self.level > 0:
+                self.level -= 1
+                self.downgrades += 1
+                self._latencies.clear()
+            elif p99 < self.latency_target * self.recover_ratio and self.level < len(PROFILE_ORDER) - 1:
+                self.level += 1
+                self.upgrades += 1
+                self._latencies.clear()
+
+    def choose(self, texts, queue_depth=0, max_queue_size=1):
+        """
+        배치에 사용할 생성 프로파일 선택
+
+        Args:
+            texts (list): generate에 넣을 입력 문장 리스트
+            queue_depth (int): 현재 대기열 깊이
+            max_queue_size (int): 대기열 최대 크기
+
+        Returns:
+            str: 프로파일 이름 ("greedy", "small_beam", "full")
+        """
+        if not self.enabled:
+            return "full"
+
+        self._update_level()
+        level = self.level
+
+        # 대기열이 차오르면 p99가 반영되기 전에 바로 가장 싼 프로파일 사용
+        if queue_depth / max(1, max_queue_size) >= self.overload_queue_ratio:
+            return PROFILE_ORDER[0]
+
+        # 이미 낮춘 상태에서 긴 입력은 generate 비용이 크므로 한 단계 더 낮추고,
+        # 대기 중인 요청이 있을 때 짧은 한글 전용 입력은 좁은 탐색으로 충분하므로 small_beam까지만 사용
+        max_length = max((len(text) for text in texts), default=0)
+        if level < len(PROFILE_ORDER) - 1 and max_length >= self.long_length:
+            level = max(0, level - 1)
+        elif queue_depth > 0 and max_length <= self.short_length and all(is_hangul_only(t) for t in texts):
+            level = min(level, 1)
+        return PROFILE_ORDER[level]
+
+    def stats(self):
+        """
+        컨트롤러 통계 반환
+
+        Returns:
+            dict: 현재 기본 프로파일 단계, 최근 p99(ms), 목표(ms), 단계 변경 횟수
+        """
+        p99 = self.p99()
+        return {
+            "level": self.level,
+            "profile": PROFILE_ORDER[self.level],
+            "p99_ms": round(p99 * 1000.0, 3) if p99 is not None else None,
+            "latency_target_ms": self.latency_target * 1000.0,
+            "downgrades": self.downgrades,
+            "upgrades": self.upgrades,
+        }
@@ -0,0 +1,171 @@
+"""
+교정 모델의 문장 생성을 위한 유틸리티 모듈
+
+여러 입력 문장을 길이 기준으로 정렬한 뒤 하나의 패딩된 배치로 묶어
+model.generate를 한 번만 호출하고, 생성된 n-best 예측을 입력별로 다시 나누어 반환합니다.
+마감 시각(Deadline)이 주어지면 디코딩 단계마다 확인하여 만료 즉시 generate를 중단합니다.
+greedy 디코딩에서는 입력 복사 기반 추측 디코딩(utils/speculative_decoding.py)을 선택적으로 사용할 수 있습니다.
+"""
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, LogitsProcessorList
+from utils.deadline import DeadlineExceededError
+from utils.length_control import (row_length_bounds, forced_eos_token, RowLengthLogitsProcessor,
+                                  RowMaxLengthCriteria)
+from utils.speculative_decoding import supports_speculative, speculative_generate
+from utils.metrics import stage_timer, BATCH_SIZE
+from utils.precision_utils import precision_context
+
+# app.py와 evaluation.py에서 사용하던 기본 생성 파라미터
+DEFAULT_GENERATION_KWARGS = {
+    "num_beams": 10,
+    "num_return_sequences": 5,
+    "do_sample": True,
+    "temperature": 0.7,
+    "repetition_penalty": 2.5,
+    "length_penalty": 0.5,
+    "no_repeat_ngram_size": 3,
+    "early_stopping": True,
+}
+
+
+class DeadlineStoppingCriteria(StoppingCriteria):
+    """마감 시각이 지나거나 취소되면 모든 시퀀스의 생성을 중단하는 generate 중단 조건"""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.deadline.expired(), dtype=torch.bool, device=input_ids.device)
+
+
+def generate_predictions(model, tokenizer, texts, device, max_input_length=128, generation_kwargs=None,
+                         precision="fp32", deadline=None, speculative=False, num_draft_tokens=8):
+    """
+    여러 문장을 하나의 배치로 묶어 문장별 n-best 예측 생성
+
+    입력 문장을 토큰 길이 기준으로 정렬하여 패딩 낭비를 줄이고, generate를 한 번만 호출합니다.
+    최소/최대 길이는 문장을 하나씩 생성할 때와 같이 입력별 길이(input_len - 5, input_len + 2)로 적용하므로
+    결과는 함께 묶인 다른 문장에 따라 달라지지 않습니다. 빔 서치는 행별로 생성을 멈출 수 없으므로
+    토큰 길이가 같은 입력끼리 묶어 generate를 호출합니다(utils/length_control.py 참고).
+
+    Args:
+        model: Seq2Seq 모델
+        tokenizer: 토크나이저
+        texts (list): 입력 문장 리스트
+        device (torch.device): 모델이 올라간 디바이스
+        max_input_length (int): 입력 토큰화 최대 길이 (기본값: 128)
+        generation_kwargs (dict): 기본 생성 파라미터를 덮어쓸 값 (기본값: None)
+        precision (str): 추론 정밀도 ("fp32", "int8", "bf16", 기본값: "fp32")
+        deadline (Deadline): 마감 시각 (기본값: None, 시간 제한 없음)
+        speculative (bool): greedy 디코딩이고 입력이 한 문장일 때 입력 복사 기반 추측 디코딩 사용 여부
+            (기본값: False, 추측 디코딩은 문장별로 디코딩하므로 여러 문장은 배치 generate가 더 빠름)
+        num_draft_tokens (int): 추측 디코딩에서 한 번에 검증할 최대 초안 토큰 수 (기본값: 8)
+
+    Returns:
+        list: 입력 순서와 같은 순서의 예측 문장 리스트의 리스트
+
+    Raises:
+        DeadlineExceededError: generate 전이나 도중에 마감 시각이 지난 경우
+    """
+    if not texts:
+        return []
+
+    gen_kwargs = dict(DEFAULT_GENERATION_KWARGS)
+    if generation_kwargs:
+        gen_kwargs.update(generation_kwargs)
+    num_return_sequences = gen_kwargs.get("num_return_sequences", 1)
+
+    BATCH_SIZE.observe(len(texts), kind="generate")
+
+    with stage_timer("tokenization"):
+        # 문장별 토큰화 후 길이 기준 정렬
+        encoded = tokenizer(list(texts), max_length=max_input_length, truncation=True)["input_ids"]
+        order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+        lengths = [len(encoded[i]) for i in order]
+
+        # 정렬된 순서로 패딩하여 하나의 배치 구성
+        batch = tokenizer.pad({"input_ids": [encoded[i] for i in order]}, padding=True, return_tensors="pt")
+        input_ids = batch["input_ids"].to(device)
+        attention_mask = batch["attention_mask"].to(device)
+
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceededError("Request deadline passed before generation.")
+
+    if speculative and len(texts) == 1 and supports_speculative(model, gen_kwargs):
+        with stage_timer("generate"), precision_context(precision, device):
+            min_lengths, max_lengths = row_length_bounds(lengths)
+            res = speculative_generate(model, input_ids, attention_mask, max_length=max_lengths,
+                                       min_length=min_lengths, generation_kwargs=gen_kwargs,
+                                       num_draft_tokens=num_draft_tokens, deadline=deadline)
+        num_return_sequences = 1
+    else:
+        res = _generate(model, input_ids, attention_mask, lengths, gen_kwargs, precision, device, deadline)
+
+    with stage_timer("decode"):
+        decoded = [d.strip() for d in tokenizer.batch_decode(res, skip_special_tokens=True)]
+
+    # n-best 결과를 원래 입력 순서로 분배
+    results = [None] * len(texts)
+    for pos, idx in enumerate(order):
+        results[idx] = decoded[pos * num_return_sequences:(pos + 1) * num_return_sequences]
+    return results
+
+
+def _generate(model, input_ids, attention_mask, lengths, gen_kwargs, precision, device, deadline):
+    """
+    model.generate로 배치 생성 (입력별 길이 제한 적용, 마감 시각이 있으면 디코딩 단계마다 확인)
+
+    greedy/샘플링은 배치 전체를 한 번에 생성하고, 행별 최소 길이는 logits processor로,
+    최대 길이는 행별 중단 조건으로 적용합니다(최대 길이에 도달한 행은 이후 위치가 패딩).
+    빔 서치는 중단 조건이 배치 전체에만 적용되고, 최대 길이에서 끝난 가설은 종료 토큰 없이 길이 정규화되므로
+    종료 토큰을 강제하면 빔 점수가 달라집니다. 그래서 토큰 길이가 같은 입력(정렬되어 연속)끼리 패딩 없이 묶어
+    generate의 min_length/max_length를 그대로 사용합니다.
+    """
+    min_lengths, max_lengths = row_length_bounds(lengths)
+    stopping_criteria = list(gen_kwargs.get("stopping_criteria") or [])
+    if deadline is not None:
+        stopping_criteria.append(DeadlineStoppingCriteria(deadline))
+
+    if gen_kwargs.get("num_beams", 1) > 1:
+        groups = []
+        for row, length in enumerate(lengths):
+            if groups and lengths[groups[-1][0]] == length:
+                groups[-1].append(row)
+            else:
+                groups.append([row])
+        calls = []
+        for rows in groups:
+            # 같은 길이끼리는 패딩이 필요 없으므로 단일 문장 생성과 같은 입력이 되도록 패딩 열 제거
+            keep = attention_mask[rows].bool()
+            shape = (len(rows), lengths[rows[0]])
+            calls.append((input_ids[rows][keep].view(shape), attention_mask[rows][keep].view(shape),
+                          min_lengths[rows[0]], max_lengths[rows[0]],
+                          {**gen_kwargs, "stopping_criteria": StoppingCriteriaList(stopping_criteria)}))
+    else:
+        # 배치 전체의 min_length/max_length는 가장 느슨한 값으로 두고 입력별 제한을 행마다 적용
+        eos_token_id = model.generation_config.eos_token_id
+        if isinstance(eos_token_id, (list, tuple)):
+            eos_token_id = eos_token_id[0]
+        processors = LogitsProcessorList(gen_kwargs.get("logits_processor") or [])
+        processors.append(RowLengthLogitsProcessor(min_lengths, max_lengths, eos_token_id,
+                                                   forced_eos_token(model.generation_config, gen_kwargs)))
+        criteria = StoppingCriteriaList(stopping_criteria + [RowMaxLengthCriteria(max_lengths)])
+        calls = [(input_ids, attention_mask, min(min_lengths), max(max_lengths),
+                  {**gen_kwargs, "logits_processor": processors, "stopping_criteria": criteria})]
+
+    res = []
+    for call_ids, call_mask, min_length, max_length, call_kwargs in calls:
+        with stage_timer("generate"), torch.no_grad(), precision_context(precision, device):
+            res.extend(model.generate(
+                input_ids=call_ids,
+                attention_mask=call_mask,
+                max_length=max_length,
+                min_length=min_length,
+                **call_kwargs
+            ).cpu().tolist())
+
+        # 중단된 generate의 결과는 완성되지 않은 문장이므로 사용하지 않음
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceededError("Request deadline passed during generation.")
+    return res
@@ -0,0 +1,201 @@
+"""
+서빙 구성 요소 무중단 재로드를 위한 모듈
+
+새 체크포인트나 다시 만든 임베딩/FAISS 색인이 배포되면, 서비스 중인 묶음은 그대로 둔 채
+새 구성 요소 묶음(CorrectorBundle)을 백그라운드에서 로드하고 예열한 뒤 한 번에 교체합니다.
+처리 중인 요청은 시작할 때 잡은 이전 묶음으로 마무리되며, 이전 묶음을 참조하는 요청이 모두 끝나면
+메모리를 회수합니다. 재로드는 관리자 엔드포인트 또는 원본 파일 감시로 시작할 수 있습니다.
+"""
+
+import gc
+import time
+import asyncio
+import weakref
+
+import torch
+
+from utils.model_loader import StartupStatus
+
+
+class BundleReloader:
+    """
+    구성 요소 묶음 재로드 관리자 (이벤트 루프 안에서 사용)
+
+    Example:
+        >>> reloader = BundleReloader(load_fn, warmup_fn, activate_fn, lambda: bundle, source_fn)
+        >>> reloader.trigger("admin")
+    """
+
+    def __init__(self, load_fn, warmup_fn, activate_fn, current_fn, source_fn, release_timeout_s=120):
+        """
+        Args:
+            load_fn (callable): StartupStatus를 받아 새 묶음을 반환하는 로드 함수 (스레드 풀에서 실행)
+            warmup_fn (callable): 묶음을 받아 예열하는 함수 (스레드 풀에서 실행)
+            activate_fn (callable): 묶음을 요청 처리에 사용하도록 교체하는 함수
+            current_fn (callable): 현재 사용 중인 묶음을 반환하는 함수
+            source_fn (callable): 원본 파일 지문을 반환하는 함수 (스레드 풀에서 실행)
+            release_timeout_s (float): 이전 묶음 메모리 회수를 기다리는 최대 시간(초) (기본값: 120)
+        """
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.activate_fn = activate_fn
+        self.current_fn = current_fn
+        self.source_fn = source_fn
+        self.release_timeout = release_timeout_s
+        self.source_version = None
+        self.status = None
+        self._lock = asyncio.Lock()
+        self._reload_task = None
+        self._watch_task = None
+        self._release_tasks = set()
+
+        # 통계
+        self.reloads = 0
+        self.reload_failures = 0
+        self.released_bundles = 0
+        self.last_reason = None
+        self.last_reload_at = None
+        self.last_reload_seconds = None
+        self.last_error = None
+
+    @property
+    def reloading(self):
+        return self._lock.locked()
+
+    async def reload(self, reason="manual"):
+        """
+        새 묶음을 로드하고 예열한 뒤 교체
+
+        Args:
+            reason (str): 재로드 사유 (기록용)
+
+        Returns:
+            bool: 교체 성공 여부 (이미 재로드 중이거나 실패하면 False)
+        """
+        if self._lock.locked():
+            return False
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            self.status = StartupStatus()
+            self.last_reason = reason
+            source_version = None
+            try:
+                # 원본 지문은 로드 전에 계산 (로드 중에 바뀐 파일은 다음 감시에서 다시 재로드)
+                source_version = await loop.run_in_executor(None, self.source_fn)
+                current = await loop.run_in_executor(None, self.load_fn, self.status)
+                await loop.run_in_executor(None, self.status.run, "warmup", self.warmup_fn, current)
+            except Exception as e:
+                self.reload_failures += 1
+                self.last_error = str(e)
+                self.status.error = str(e)
+                # 같은 파일로 실패를 반복하지 않도록 파일이 다시 바뀔 때까지 감시에서 제외
+                if source_version is not None:
+                    self.source_version = source_version
+                print(f"Error reloading components ({reason}): {e}")
+                return False
+
+            previous = self.current_fn()
+            self.activate_fn(current)
+            self.source_version = source_version
+            self.status.ready = True
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload_at = time.time()
+            self.last_reload_seconds = time.perf_counter() - start
+            print(f"Reloaded components ({reason}): version {current.version} "
+                  f"in {self.last_reload_seconds:.1f}s")
+
+            if previous is not None and previous is not current:
+                task = asyncio.create_task(self._release(weakref.ref(previous)))
+                self._release_tasks.add(task)
+                task.add_done_callback(self._release_tasks.discard)
+                del previous
+            return True
+
+    def trigger(self, reason="manual"):
+        """
+        재로드를 백그라운드에서 시작
+
+        Returns:
+            bool: 시작 여부 (이미 재로드 중이면 False)
+        """
+        if self.reloading or (self._reload_task is not None and not self._reload_task.done()):
+            return False
+        self._reload_task = asyncio.create_task(self.reload(reason))
+        return True
+
+    async def _release(self, previous_ref):
+        """이전 묶음을 참조하는 요청이 모두 끝날 때까지 기다린 뒤 메모리 회수"""
+        deadline = time.monotonic() + self.release_timeout
+        while time.monotonic() < deadline:
+            gc.collect()
+            if previous_ref() is None:
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+                self.released_bundles += 1
+                return
+            await asyncio.sleep(0.5)
+        print("Warning: previous components are still referenced after reload; memory not released yet.")
+
+    def start(self, source_version, interval_s):
+        """
+        원본 파일 감시 시작
+
+        Args:
+            source_version (str): 현재 묶음을 로드할 때의 원본 파일 지문
+            interval_s (float): 확인 주기(초)
+        """
+        self.source_version = source_version
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval_s))
+
+    async def _watch(self, interval_s):
+        """원본 파일 지문이 바뀌고 한 주기 동안 그대로면(복사 완료) 재로드"""
+        loop = asyncio.get_running_loop()
+        pending = None
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                source_version = await loop.run_in_executor(None, self.source_fn)
+            except Exception as e:
+                print(f"Error checking component files: {e}")
+                continue
+            if source_version == self.source_version:
+                pending = None
+            elif source_version == pending:
+                pending = None
+                await self.reload("watch")
+            else:
+                pending = source_version
+
+    async def stop(self):
+        """파일 감시와 진행 중인 재로드 종료"""
+        tasks = [task for task in (self._watch_task, self._reload_task, *self._release_tasks)
+                 if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watch_task = None
+
+    def stats(self):
+        """
+        재로드 통계 반환
+
+        Returns:
+            dict: 현재 버전, 재로드 진행 여부, 성공/실패/메모리 회수 횟수, 마지막 재로드 정보와 구성 요소별 로드 상태
+        """
+        current = self.current_fn()
+        return {
+            "version": current.version if current is not None else None,
+            "reloading": self.reloading,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "released_bundles": self.released_bundles,
+            "pending_releases": len(self._release_tasks),
+            "last_reason": self.last_reason,
+            "last_reload_at": self.last_reload_at,
+            "last_reload_seconds": round(self.last_reload_seconds, 3) if self.last_reload_seconds is not None else None,
+            "last_error": self.last_error,
+            "status": self.status.snapshot() if self.status is not None else None,
+        }
@@ -0,0 +1,113 @@
+"""
+입력 중 실시간 교정(WebSocket)을 위한 세션 상태 모듈
+
+연결마다 직전 문서의 문장 목록과 문장별 교정 결과를 보관하고, 새 문서를 문장 단위로 비교하여
+바뀐 구간만 다시 교정하도록 합니다. 결과는 문장 목록에 대한 splice 형태의 패치로 반환합니다.
+"""
+
+from collections import OrderedDict
+
+from utils.text_utils import split_sentences, restore_punctuation
+
+
+class IncrementalSession:
+    """
+    연결 하나의 증분 교정 상태
+
+    Example:
+        >>> session = IncrementalSession()
+        >>> segments, pending = session.plan("안녕하세요. 반갑슴니다")
+        >>> patch = session.update(segments, {body: corrector(body) for body in pending})
+    """
+
+    def __init__(self, max_sentences=512):
+        """
+        Args:
+            max_sentences (int): 세션에 보관할 문장별 교정 결과 최대 개수 (기본값: 512)
+        """
+        self.max_sentences = max(1, int(max_sentences))
+        self.segments = []
+        self.results = OrderedDict()
+
+    def plan(self, text):
+        """
+        새 문서를 문장으로 나누고 다시 교정해야 하는 문장 목록 계산
+
+        직전 문서와 공통인 앞/뒤 문장을 제외한 변경 구간에서, 세션에 결과가 없는 문장만 반환합니다.
+
+        Args:
+            text (str): 새 문서
+
+        Returns:
+            tuple: (문장 목록, 교정이 필요한 문장 리스트)
+        """
+        segments = split_sentences(text)
+        start, old_end, new_end = self._changed_range(segments)
+
+        pending = []
+        for body, _ in segments[start:new_end]:
+            if body and body not in self.results and body not in pending:
+                pending.append(body)
+        return segments, pending
+
+    def update(self, segments, corrected):
+        """
+        교정 결과를 반영하고 직전 문서 대비 패치 생성
+
+        Args:
+            segments (list): plan이 반환한 문장 목록
+            corrected (dict): 문장 → 응답 본문 (plan이 반환한 문장들의 교정 결과)
+
+        Returns:
+            dict: {"start": 시작 위치, "delete": 지울 문장 수, "segments": 새 문장 결과 리스트, "length": 전체 문장 수}
+        """
+        for body, response in corrected.items():
+            self.results[body] = response
+            self.results.move_to_end(body)
+
+        start, old_end, new_end = self._changed_range(segments)
+        patch = {
+            "start": start,
+            "delete": old_end - start,
+            "segments": [self._segment_payload(body, separator) for body, separator in segments[start:new_end]],
+            "length": len(segments),
+        }
+        self.segments = segments
+        self._trim()
+        return patch
+
+    def _changed_range(self, segments):
+        """직전 문장 목록과 공통인 앞/뒤 구간을 제외한 변경 구간 (시작, 기존 끝, 새 끝)"""
+        old = self.segments
+        limit = min(len(old), len(segments))
+        start = 0
+        while start < limit and old[start] == segments[start]:
+            start += 1
+
+        suffix = 0
+        while suffix < limit - start and old[len(old) - 1 - suffix] == segments[len(segments) - 1 - suffix]:
+            suffix += 1
+        return start, len(old) - suffix, len(segments) - suffix
+
+    def _segment_payload(self, body, separator):
+        """문장 하나의 패치 항목 구성 (끝 문장부호는 원문 기준으로 복원)"""
+        if not body:
+            return {"input_text": body, "separator": separator, "corrected_text": body}
+        response = self.results[body]
+        return {
+            **response,
+            "input_text": body,
+            "separator": separator,
+            "corrected_text": restore_punctuation(body, response["corrected_text"]),
+        }
+
+    def _trim(self):
+        """현재 문서에 없는 오래된 결과부터 제거하여 최대 개수 유지"""
+        if len(self.results) <= self.max_sentences:
+            return
+        current = {body for body, _ in self.segments}
+        for body in list(self.results):
+            if len(self.results) <= self.max_sentences:
+                break
+            if body not in current:
+                del self.results[body]
@@ -0,0 +1,83 @@
+"""
+배치 생성에서 입력 문장마다 다른 디코더 길이 제한을 적용하기 위한 모듈
+
+기존 단일 문장 생성은 model.generate(min_length=input_len - 5, max_length=input_len + 2)로 호출했습니다.
+generate의 min_length/max_length는 배치 전체에 하나만 지정할 수 있으므로, 여러 문장을 묶을 때는
+행별 최소 길이를 logits processor로, 행별 최대 길이를 중단 조건으로 적용하여 문장 하나를 생성할 때와 같은 결과를 냅니다.
+최대 길이에 도달한 행은 마지막 위치에도 내용 토큰을 생성한 뒤 끝나며(종료 토큰으로 바꾸지 않음),
+종료 토큰 강제는 모델 생성 설정에 forced_eos_token_id가 있을 때만 generate와 같이 적용합니다.
+"""
+
+import torch
+from transformers import StoppingCriteria, LogitsProcessor
+
+
+def row_length_bounds(lengths):
+    """입력 토큰 길이별 디코더 최소/최대 길이 (기존 단일 문장 생성의 input_len - 5, input_len + 2)"""
+    return [max(1, length - 5) for length in lengths], [length + 2 for length in lengths]
+
+
+def _expand(values, num_rows, device):
+    """입력별 값을 빔 서치/샘플링으로 확장된 행(입력당 num_beams 또는 num_return_sequences개)에 맞춤"""
+    return values.to(device).repeat_interleave(num_rows // len(values))
+
+
+class RowLengthLogitsProcessor(LogitsProcessor):
+    """
+    행별 최소 길이 전에는 종료 토큰을 막고, forced_eos_token_id가 있으면 행별 최대 길이의 마지막 위치에서 강제
+
+    generate가 min_length/forced_eos_token_id로 적용하는 MinLengthLogitsProcessor, ForcedEOSTokenLogitsProcessor의
+    행별 버전입니다. 최대 길이에서 생성을 멈추는 것은 RowMaxLengthCriteria가 담당합니다.
+    """
+
+    def __init__(self, min_lengths, max_lengths, eos_token_id, forced_eos_token_id=None):
+        """
+        Args:
+            min_lengths (list): 입력별 디코더 시퀀스 최소 길이
+            max_lengths (list): 입력별 디코더 시퀀스 최대 길이 (디코더 시작 토큰 포함)
+            eos_token_id (int): 종료 토큰 ID
+            forced_eos_token_id (int): 최대 길이에서 강제할 종료 토큰 ID (기본값: None, 강제하지 않음)
+        """
+        self.min_lengths = torch.tensor(min_lengths)
+        self.max_lengths = torch.tensor(max_lengths)
+        self.eos_token_id = eos_token_id
+        self.forced_eos_token_id = forced_eos_token_id
+
+    def __call__(self, input_ids, scores):
+        cur_len = input_ids.shape[-1]
+        min_lengths = _expand(self.min_lengths, input_ids.shape[0], scores.device)
+        scores[cur_len < min_lengths, self.eos_token_id] = -float("inf")
+
+        if self.forced_eos_token_id is not None:
+            force = cur_len == _expand(self.max_lengths, input_ids.shape[0], scores.device) - 1
+            if force.any():
+                scores[force] = -float("inf")
+                scores[force, self.forced_eos_token_id] = 0
+        return scores
+
+
+class RowMaxLengthCriteria(StoppingCriteria):
+    """
+    행별 최대 길이에 도달한 행을 끝난 것으로 처리하는 generate 중단 조건 (greedy/샘플링)
+
+    끝난 행은 generate가 이후 위치를 패딩 토큰으로 채우므로, 마지막 위치의 토큰은 그대로 남습니다.
+    빔 서치는 중단 조건을 배치 전체에만 적용하므로 사용할 수 없습니다.
+    """
+
+    def __init__(self, max_lengths):
+        """
+        Args:
+            max_lengths (list): 입력별 디코더 시퀀스 최대 길이 (디코더 시작 토큰 포함)
+        """
+        self.max_lengths = torch.tensor(max_lengths)
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return input_ids.shape[-1] >= _expand(self.max_lengths, input_ids.shape[0], input_ids.device)
+
+
+def forced_eos_token(generation_config, generation_kwargs=None):
+    """생성 파라미터 또는 모델 생성 설정의 forced_eos_token_id (리스트면 첫 번째 값, 없으면 None)"""
+    token_id = (generation_kwargs or {}).get("forced_eos_token_id", generation_config.forced_eos_token_id)
+    if isinstance(token_id, (list, tuple)):
+        token_id = token_id[0]
+    return token_id
@@ -0,0 +1,209 @@
+"""
+학습 코퍼스의 오류 문장 → 정답 문장 쌍을 저장하는 조회 테이블 모듈
+
+train_data_path_list, candidate_data_path_list의 err_sentence/cor_sentence 쌍으로 오프라인에서 테이블을 만들고,
+서빙 시에는 메모리 매핑으로 열어 seq2seq 모델 호출 전에 이미 알려진 오타를 즉시 교정합니다.
+
+디렉토리 구성:
+    keys.npy          정규화된 오류 문장의 64비트 해시 (정렬됨)
+    value_ids.npy     keys와 같은 순서의 정답 문장 번호
+    jamo_keys.npy     자모 정규화된 오류 문장의 64비트 해시 (정렬됨)
+    jamo_value_ids.npy
+    value_offsets.npy 정답 문장 바이트 오프셋 (정답 문장 수 + 1)
+    values.bin        UTF-8로 이어 붙인 정답 문장
+    meta.json         항목 수 등 메타데이터
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from utils.text_utils import normalize_text, normalize_jamo
+
+
+def hash_key(text):
+    """
+    정규화된 문장을 64비트 정수 해시로 변환
+
+    Args:
+        text (str): 정규화된 문장
+
+    Returns:
+        int: 64비트 부호 없는 정수 해시
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def load_sentence_pairs(data_path_list, src_col="err_sentence", tgt_col="cor_sentence"):
+    """
+    JSON 데이터 파일들에서 (오류 문장, 정답 문장) 쌍 로드
+
+    Args:
+        data_path_list (list): JSON 데이터 파일 경로 리스트
+        src_col (str): 오류 문장 필드 이름
+        tgt_col (str): 정답 문장 필드 이름
+
+    Returns:
+        list: (오류 문장, 정답 문장) 튜플 리스트
+    """
+    pairs = []
+    for data_path in data_path_list:
+        with open(data_path, 'r', encoding='utf-8') as f:
+            _temp_json = json.load(f)
+        pairs.extend((str(x['annotation'][src_col]), str(x['annotation'][tgt_col])) for x in _temp_json['data'])
+        print(f'{data_path} : {len(_temp_json["data"])} pairs loaded')
+    return pairs
+
+
+def _build_key_table(pairs, key_fn, value_ids):
+    """
+    키 함수로 정규화한 오류 문장별로 가장 많이 등장한 정답 문장을 골라 정렬된 해시 테이블 생성
+
+    Returns:
+        tuple: (정렬된 키 배열, 정답 문장 번호 배열, 모호한 키 수)
+    """
+    counts = defaultdict(Counter)
+    for err, cor in pairs:
+        counts[hash_key(key_fn(err))][cor] += 1
+
+    keys = np.fromiter(counts.keys(), dtype=np.uint64, count=len(counts))
+    ids = np.fromiter((value_ids[counter.most_common(1)[0][0]] for counter in counts.values()),
+                      dtype=np.uint32, count=len(counts))
+    ambiguous = sum(1 for counter in counts.values() if len(counter) > 1)
+
+    order = np.argsort(keys)
+    return keys[order], ids[order], ambiguous
+
+
+def build_lookup_table(pairs, output_dir):
+    """
+    (오류 문장, 정답 문장) 쌍으로 조회 테이블을 만들어 저장
+
+    같은 오류 문장에 여러 정답이 있으면 가장 많이 등장한 정답을 사용합니다.
+
+    Args:
+        pairs (list): (오류 문장, 정답 문장) 튜플 리스트
+        output_dir (str): 출력 디렉토리
+
+    Returns:
+        dict: 메타데이터
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pairs = [(err, normalize_text(cor)) for err, cor in pairs if normalize_text(err) and normalize_text(cor)]
+
+    # 중복 제거된 정답 문장 테이블
+    values = sorted({cor for _, cor in pairs})
+    value_ids = {cor: i for i, cor in enumerate(values)}
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.uint64)
+    with open(os.path.join(output_dir, 'values.bin'), 'wb') as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(output_dir, 'value_offsets.npy'), offsets)
+
+    keys, ids, ambiguous = _build_key_table(pairs, normalize_text, value_ids)
+    np.save(os.path.join(output_dir, 'keys.npy'), keys)
+    np.save(os.path.join(output_dir, 'value_ids.npy'), ids)
+
+    jamo_keys, jamo_ids, _ = _build_key_table(pairs, normalize_jamo, value_ids)
+    np.save(os.path.join(output_dir, 'jamo_keys.npy'), jamo_keys)
+    np.save(os.path.join(output_dir, 'jamo_value_ids.npy'), jamo_ids)
+
+    meta = {
+        "num_pairs": len(pairs),
+        "num_keys": int(len(keys)),
+        "num_jamo_keys": int(len(jamo_keys)),
+        "num_values": len(values),
+        "ambiguous_keys": ambiguous,
+    }
+    with open(os.path.join(output_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class CorrectionLookupTable:
+    """
+    메모리 매핑된 오류 문장 → 정답 문장 조회 테이블
+
+    여러 워커 프로세스가 같은 파일을 열면 페이지를 공유합니다.
+    """
+
+    def __init__(self, table_dir):
+        """
+        Args:
+            table_dir (str): build_lookup_table로 만든 디렉토리
+        """
+        self.table_dir = table_dir
+        self.keys = np.load(os.path.join(table_dir, 'keys.npy'), mmap_mode='r')
+        self.value_ids = np.load(os.path.join(table_dir, 'value_ids.npy'), mmap_mode='r')
+        self.jamo_keys = np.load(os.path.join(table_dir, 'jamo_keys.npy'), mmap_mode='r')
+        self.jamo_value_ids = np.load(os.path.join(table_dir, 'jamo_value_ids.npy'), mmap_mode='r')
+        self.value_offsets = np.load(os.path.join(table_dir, 'value_offsets.npy'), mmap_mode='r')
+        self.values = np.memmap(os.path.join(table_dir, 'values.bin'), dtype=np.uint8, mode='r') \
+            if os.path.getsize(os.path.join(table_dir, 'values.bin')) > 0 else np.zeros(0, dtype=np.uint8)
+
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.jamo_hits = 0
+        self.misses = 0
+        print(f"Loaded lookup table with {len(self.keys)} keys from {table_dir}")
+
+    @staticmethod
+    def _search(keys, key):
+        """정렬된 키 배열에서 이진 탐색"""
+        pos = int(np.searchsorted(keys, np.uint64(key)))
+        if pos < len(keys) and int(keys[pos]) == key:
+            return pos
+        return None
+
+    def _value(self, value_id):
+        start, end = int(self.value_offsets[value_id]), int(self.value_offsets[value_id + 1])
+        return bytes(self.values[start:end]).decode("utf-8")
+
+    def lookup(self, text):
+        """
+        오류 문장에 대한 정답 문장 조회
+
+        정규화된 문장으로 먼저 찾고, 없으면 자모 정규화된 문장으로 찾습니다.
+
+        Args:
+            text (str): 입력 문장
+
+        Returns:
+            tuple: (정답 문장, "exact" 또는 "jamo") 또는 None
+        """
+        pos = self._search(self.keys, hash_key(normalize_text(text)))
+        if pos is not None:
+            with self._lock:
+                self.exact_hits += 1
+            return self._value(int(self.value_ids[pos])), "exact"
+
+        pos = self._search(self.jamo_keys, hash_key(normalize_jamo(text)))
+        if pos is not None:
+            with self._lock:
+                self.jamo_hits += 1
+            return self._value(int(self.jamo_value_ids[pos])), "jamo"
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def stats(self):
+        """
+        조회 통계 반환
+
+        Returns:
+            dict: 항목 수와 적중/미스 건수, 적중률
+        """
+        lookups = self.exact_hits + self.jamo_hits + self.misses
+        return {
+            "size": int(len(self.keys)),
+            "exact_hits": self.exact_hits,
+            "jamo_hits": self.jamo_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.jamo_hits) / lookups, 4) if lookups else 0.0,
+        }
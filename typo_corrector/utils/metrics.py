@@ -0,0 +1,274 @@
+"""
+서빙 지표 수집 및 Prometheus 텍스트 형식 출력을 위한 모듈
+
+토큰화, generate, 디코딩, 쿼리 임베딩, FAISS 검색, 후보 점수 계산 등 단계별 소요 시간과
+배치 크기, 대기열 대기 시간, 캐시 적중 등을 히스토그램/카운터로 기록합니다.
+기록 비용은 time.perf_counter 호출과 잠금 한 번 정도로, 운영 환경에서 항상 켜 둘 수 있습니다.
+"""
+
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# 단계별 소요 시간(초) 버킷: 0.5ms ~ 10s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 배치 크기 버킷
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    """라벨을 Prometheus 텍스트 형식으로 변환"""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+               for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """임의로 설정할 수 있는 현재 값"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """누적 버킷 히스토그램"""
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # 라벨 값 -> [버킷별 개수, 합계, 전체 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """with 블록의 소요 시간을 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, [list(series[0]), series[1], series[2]]) for key, series in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    지표 저장소
+
+    Counter/Gauge/Histogram 외에, 호출 시점의 값을 반환하는 콜백(예: 대기열 깊이, 캐시 통계)도 등록할 수 있습니다.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS, labelnames=()):
+        metric = Histogram(name, documentation, buckets, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_callback(self, prefix, fn, metric_types=None, documentation=""):
+        """
+        통계 딕셔너리를 반환하는 함수를 지표로 등록
+
+        숫자 값만 {prefix}_{키} 이름의 지표로 출력하며, 카운터는 Prometheus 명명 규칙에 따라 _total을 붙입니다.
+
+        Args:
+            prefix (str): 지표 이름 접두사
+            fn (callable): dict를 반환하는 함수 (None을 반환하면 출력하지 않음)
+            metric_types (dict): 키별 지표 유형 ("counter" 또는 "gauge", 기본값: gauge)
+            documentation (str): HELP 설명에 사용할 구성 요소 설명 (기본값: 접두사)
+        """
+        with self._lock:
+            self._callbacks.append((prefix, fn, metric_types or {}, documentation or prefix))
+
+    def render(self):
+        """
+        모든 지표를 Prometheus 텍스트 형식으로 출력
+
+        Returns:
+            str: Prometheus 텍스트 형식 문자열
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+            callbacks = list(self._callbacks)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, fn, metric_types, documentation in callbacks:
+            try:
+                stats = fn()
+            except Exception:
+                continue
+            for key, value in (stats or {}).items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric_type = metric_types.get(key, "gauge")
+                name = f"{prefix}_{key}"
+                if metric_type == "counter" and not name.endswith("_total"):
+                    name += "_total"
+                lines.append(f"# HELP {name} {documentation}: {key.replace('_', ' ')}.")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 기본 저장소와 공통 지표
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "typo_corrector_stage_duration_seconds",
+    "Duration of each correction pipeline stage in seconds.",
+    labelnames=("stage",)
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "typo_corrector_batch_size",
+    "Number of inputs per inference batch.",
+    buckets=BATCH_SIZE_BUCKETS,
+    labelnames=("kind",)
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "typo_corrector_queue_wait_seconds",
+    "Time requests spent waiting in the admission queue in seconds.",
+    labelnames=("lane",)
+)
+LANE_LATENCY = REGISTRY.histogram(
+    "typo_corrector_lane_latency_seconds",
+    "Time from enqueue to result for batched requests in seconds, by priority lane.",
+    labelnames=("lane",)
+)
+REQUESTS = REGISTRY.counter(
+    "typo_corrector_requests_total",
+    "Correction requests by serving path (model, coalesced, cache, semantic_cache, known_correct, lookup_exact, lookup_jamo).",
+    labelnames=("path",)
+)
+
+CANDIDATE_SOURCE = REGISTRY.counter(
+    "typo_corrector_candidate_source_total",
+    "Generated sentences by how the candidate list was built (retrieval, candidate_index).",
+    labelnames=("source",)
+)
+
+GENERATION_PROFILE = REGISTRY.counter(
+    "typo_corrector_generation_profile_total",
+    "Sentences generated per generation profile (greedy, small_beam, full).",
+    labelnames=("profile",)
+)
+
+MODEL_VERSION = REGISTRY.gauge(
+    "typo_corrector_model_info",
+    "Model/candidate index version (1 = active, 0 = replaced by hot reload).",
+    labelnames=("version",)
+)
+
+
+def stage_timer(stage):
+    """
+    파이프라인 단계 소요 시간을 기록하는 컨텍스트 매니저
+
+    Example:
+        >>> with stage_timer("generate"):
+        ...     pass
+    """
+    return STAGE_LATENCY.time(stage=stage)
+
+
+def observe_stage(stage, seconds):
+    """파이프라인 단계 소요 시간(초) 기록"""
+    STAGE_LATENCY.observe(seconds, stage=stage)
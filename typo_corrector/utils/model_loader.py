@@ -0,0 +1,279 @@
+"""
+서빙 구성 요소 로드를 위한 모듈
+
+교정 모델/토크나이저, 후보 문장과 정답 문장 색인, 오류 문장 조회 테이블, 임베딩 관리자(bge-m3 모델과 FAISS 색인)를
+스레드 풀에서 병렬로 로드하여 하나의 묶음(CorrectorBundle)으로 반환합니다.
+구성 요소별 로드 상태와 소요 시간은 StartupStatus에 기록되어 준비 상태 확인(/readyz)에 사용됩니다.
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+from utils.embedding_manager import FastEmbeddingManager
+from utils.embedding_store import available_storage
+from utils.candidate_index import CandidateIndex
+from utils.lookup_table import CorrectionLookupTable
+from utils.cache_manager import compute_fingerprint, path_fingerprint
+from utils.precision_utils import apply_precision
+from utils.onnx_backend import load_onnx_model
+
+
+class StartupStatus:
+    """
+    구성 요소별 로드 상태 기록
+
+    상태는 "pending", "loading", "ready", "failed", "skipped" 중 하나입니다.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self.ready = False
+        self.error = None
+        self._lock = threading.Lock()
+
+    def set(self, name, state, seconds=None, error=None):
+        with self._lock:
+            entry = self.components.setdefault(name, {})
+            entry["state"] = state
+            if seconds is not None:
+                entry["seconds"] = round(seconds, 3)
+            if error is not None:
+                entry["error"] = str(error)
+
+    def run(self, name, fn, *args, required=True, **kwargs):
+        """
+        구성 요소 로드 함수를 실행하며 상태와 소요 시간 기록
+
+        Args:
+            name (str): 구성 요소 이름
+            fn (callable): 로드 함수
+            required (bool): 실패 시 예외를 다시 발생시킬지 여부 (False면 None 반환)
+
+        Returns:
+            로드 함수의 반환값
+        """
+        self.set(name, "loading")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.set(name, "failed", time.perf_counter() - start, error=e)
+            print(f"Error loading {name}: {e}")
+            if required:
+                raise
+            return None
+        self.set(name, "ready" if result is not None else "skipped", time.perf_counter() - start)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "error": self.error,
+                "components": {name: dict(entry) for name, entry in self.components.items()},
+            }
+
+
+class CorrectorBundle:
+    """
+    교정 요청 처리에 필요한 구성 요소 묶음
+
+    요청 처리 중에는 하나의 묶음 참조를 끝까지 사용하므로, 묶음 단위로 교체하면
+    처리 중인 요청은 이전 구성 요소로 마무리됩니다.
+    """
+
+    def __init__(self, model, tokenizer, device, candidates, candidate_index, lookup_table, embedding_manager,
+                 fingerprint, precision="fp32"):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.precision = precision
+        self.candidates = candidates
+        self.candidate_index = candidate_index
+        self.lookup_table = lookup_table
+        self.embedding_manager = embedding_manager
+        self.fingerprint = fingerprint
+        self.version = fingerprint
+
+
+def load_seq2seq_model(model_path, device, precision="fp32", backend="torch", onnx_dir=None, onnx_threads=0):
+    """
+    교정 모델과 토크나이저 로드
+
+    Args:
+        model_path (str): 모델 경로
+        device (torch.device): 모델을 올릴 디바이스
+        precision (str): 추론 정밀도 ("fp32", "int8", "bf16", 기본값: "fp32")
+        backend (str): 추론 백엔드 ("torch" 또는 "onnx", 기본값: "torch")
+        onnx_dir (str): export_onnx.py로 내보낸 ONNX 그래프 디렉토리 (onnx 백엔드)
+        onnx_threads (int): onnxruntime 세션별 intra-op 스레드 수 (0이면 기본값)
+
+    Returns:
+        tuple: (모델, 토크나이저)
+    """
+    if backend == "onnx":
+        # int8은 export_onnx.py --quantize로 만든 양자화 그래프 사용
+        if precision == "bf16":
+            raise ValueError("bf16 precision is not supported by the onnx backend.")
+        return load_onnx_model(onnx_dir, quantized=precision == "int8", num_threads=onnx_threads)
+    if backend != "torch":
+        raise ValueError(f"Unknown model backend: {backend} (expected 'torch' or 'onnx')")
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model.to(device)
+    model.eval()
+    model = apply_precision(model, precision, device)
+    return model, tokenizer
+
+
+def load_candidates(candidate_file):
+    """
+    후보 데이터 파일에서 정답 문장 리스트 로드
+
+    Args:
+        candidate_file (str): 후보 데이터 파일 경로
+
+    Returns:
+        list: 정답 후보 문장 리스트
+    """
+    with open(candidate_file, 'r') as f:
+        json_dataset = json.load(f)
+    return [data['annotation']['cor_sentence'] for data in json_dataset['data']]
+
+
+def load_embedding_manager(embedding_model, precomputed_dir, candidates, index_type="flat", index_params=None,
+                           nprobe=16, ef_search=64, storage="float32", mmap=True, exact_window_size=50000):
+    """
+    임베딩 관리자 초기화
+
+    미리 계산된 임베딩이 없으면 계산하여 저장하고, 첫 요청이 느려지지 않도록 임베딩 모델을 미리 로드합니다.
+
+    Args:
+        embedding_model (str): 임베딩 모델 이름
+        precomputed_dir (str): 미리 계산된 임베딩 디렉토리
+        candidates (list): 정답 후보 문장 리스트
+        index_type (str): FAISS 색인 종류 (flat, ivf_flat, ivf_pq, hnsw) (기본값: flat)
+        index_params (dict): 색인 생성 파라미터 (기본값: None)
+        nprobe (int): IVF 색인에서 검색할 군집 수 (기본값: 16)
+        ef_search (int): HNSW 색인 탐색 폭 (기본값: 64)
+        storage (str): 임베딩 파일과 색인의 벡터 형식 (float32, float16, int8) (기본값: float32)
+        mmap (bool): 임베딩 파일과 색인을 mmap으로 읽을지 여부 (기본값: True)
+        exact_window_size (int): 길이 구간 후보가 이 수 이하이면 정확히 검색 (기본값: 50000)
+
+    Returns:
+        FastEmbeddingManager: 임베딩 관리자
+    """
+    embedding_manager = FastEmbeddingManager(model_name=embedding_model, precomputed_dir=precomputed_dir,
+                                             index_type=index_type, index_params=index_params,
+                                             nprobe=nprobe, ef_search=ef_search, storage=storage, mmap=mmap,
+                                             exact_window_size=exact_window_size)
+    print(f"Embedding manager initialized with model: {embedding_model}")
+
+    # 후보 문장 설정
+    if not hasattr(embedding_manager, 'candidates') or embedding_manager.candidates is None:
+        print("Setting candidates for embedding manager...")
+        embedding_manager.candidates = candidates
+
+    # 임베딩 미리 계산 (없는 경우)
+    if precomputed_dir and not available_storage(precomputed_dir):
+        print("Precomputing embeddings...")
+        os.makedirs(precomputed_dir, exist_ok=True)
+        embedding_manager.precompute_embeddings(candidates, output_dir=precomputed_dir)
+
+    # 쿼리 임베딩용 모델 미리 로드
+    embedding_manager._load_model()
+    return embedding_manager
+
+
+def load_lookup_table(table_dir):
+    """조회 테이블이 있으면 로드 (없으면 None)"""
+    if table_dir and os.path.exists(os.path.join(table_dir, 'keys.npy')):
+        return CorrectionLookupTable(table_dir)
+    return None
+
+
+def faiss_index_params(config):
+    """서빙 설정에서 FAISS 색인 생성 파라미터 추출 (utils/ann_index.py의 build_ann_index 인자)"""
+    return {
+        "nlist": config.faiss_nlist,
+        "pq_m": config.faiss_pq_m,
+        "hnsw_m": config.faiss_hnsw_m,
+    }
+
+
+def source_fingerprint(config):
+    """
+    구성 요소 원본 파일(체크포인트, 후보 문장, 사전 계산 임베딩/FAISS 색인, ONNX 그래프, 조회 테이블)의 지문
+
+    파일 감시로 새 버전 배포 여부를 확인할 때 사용합니다.
+
+    Args:
+        config (OmegaConf): 서빙 설정
+
+    Returns:
+        str: 16자리 16진수 지문
+    """
+    return compute_fingerprint(path_fingerprint(config.model_path), path_fingerprint(config.candidate_file),
+                               path_fingerprint(config.precomputed_dir), path_fingerprint(config.onnx_model_dir),
+                               path_fingerprint(config.lookup_table_dir))
+
+
+def load_bundle(config, status=None):
+    """
+    서빙 구성 요소를 병렬로 로드하여 묶음으로 반환
+
+    모델, 후보 문장, 조회 테이블은 동시에 로드하고, 임베딩 관리자와 정답 문장 색인은 후보 문장 로드 후 시작합니다.
+    임베딩 관리자 로드에 실패하면 기존과 같이 임베딩 없이 동작합니다.
+
+    Args:
+        config (OmegaConf): 서빙 설정
+        status (StartupStatus): 로드 상태 기록 객체 (기본값: None)
+
+    Returns:
+        CorrectorBundle: 로드된 구성 요소 묶음
+    """
+    status = status or StartupStatus()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    for name in ("model", "candidates", "candidate_index", "lookup_table", "embedding_manager"):
+        status.set(name, "pending")
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="loader") as executor:
+        model_future = executor.submit(status.run, "model", load_seq2seq_model, config.model_path, device,
+                                       config.model_precision, config.model_backend, config.onnx_model_dir,
+                                       config.onnx_threads)
+        lookup_future = executor.submit(status.run, "lookup_table", load_lookup_table, config.lookup_table_dir,
+                                        required=False)
+        candidates = status.run("candidates", load_candidates, config.candidate_file)
+
+        embedding_future = executor.submit(status.run, "embedding_manager", load_embedding_manager,
+                                           config.embedding_model, config.precomputed_dir, candidates,
+                                           required=False, index_type=config.faiss_index_type,
+                                           index_params=faiss_index_params(config),
+                                           nprobe=config.faiss_nprobe, ef_search=config.faiss_ef_search,
+                                           storage=config.embedding_storage, mmap=config.embedding_mmap,
+                                           exact_window_size=config.faiss_exact_window_size)
+        candidate_index = status.run("candidate_index", CandidateIndex, candidates,
+                                     use_bloom=config.candidate_index_bloom,
+                                     false_positive_rate=config.candidate_index_bloom_fp_rate)
+
+        model, tokenizer = model_future.result()
+        lookup_table = lookup_future.result()
+        embedding_manager = embedding_future.result()
+
+    fingerprint = compute_fingerprint(config.model_path, path_fingerprint(config.model_path), config.candidate_file,
+                                      path_fingerprint(config.candidate_file),
+                                      path_fingerprint(config.precomputed_dir),
+                                      config.embedding_model, embedding_manager is not None, config.model_precision,
+                                      config.model_backend, path_fingerprint(config.onnx_model_dir),
+                                      config.faiss_index_type, faiss_index_params(config), config.faiss_nprobe,
+                                      config.faiss_ef_search, config.faiss_exact_window_size,
+                                      config.embedding_storage, path_fingerprint(config.lookup_table_dir))
+    return CorrectorBundle(model, tokenizer, device, candidates, candidate_index, lookup_table, embedding_manager,
+                           fingerprint, precision=config.model_precision)
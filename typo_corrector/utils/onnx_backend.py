@@ -0,0 +1,151 @@
+"""
+ONNX Runtime 추론 백엔드를 위한 모듈
+
+train.py로 학습한 KoBART 체크포인트를 인코더 그래프, 첫 디코딩 단계용 디코더 그래프,
+KV 캐시(past_key_values)를 입력으로 받는 디코더 그래프로 내보내고, onnxruntime CPU 실행 공급자로 로드합니다.
+로드된 모델은 transformers의 generate를 그대로 지원하므로 빔 서치 설정과 후처리는 torch 경로와 같습니다.
+optimum[onnxruntime] 패키지가 필요합니다.
+"""
+
+import os
+
+from utils.generation_utils import generate_predictions
+
+# 내보내는 그래프 파일 (인코더, 첫 단계 디코더, KV 캐시 디코더)
+ONNX_FILE_NAMES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+QUANTIZED_SUFFIX = "_quantized"
+
+
+def _import_optimum():
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError("ONNX backend requires the 'optimum[onnxruntime]' package: "
+                          "pip install optimum[onnxruntime]") from e
+    return ORTModelForSeq2SeqLM
+
+
+def onnx_file_names(quantized=False):
+    """양자화 여부에 따른 그래프 파일 이름 튜플 반환"""
+    if not quantized:
+        return ONNX_FILE_NAMES
+    return tuple(name.replace(".onnx", f"{QUANTIZED_SUFFIX}.onnx") for name in ONNX_FILE_NAMES)
+
+
+def export_onnx(model_path, output_dir, quantize=False):
+    """
+    학습된 체크포인트를 ONNX 그래프로 내보내기
+
+    Args:
+        model_path (str): 학습된 체크포인트 경로
+        output_dir (str): 그래프와 토크나이저를 저장할 디렉토리
+        quantize (bool): 가중치를 int8로 동적 양자화한 그래프도 함께 저장할지 여부 (기본값: False)
+
+    Returns:
+        list: 저장된 그래프 파일 경로 리스트
+    """
+    from transformers import AutoTokenizer
+
+    ORTModelForSeq2SeqLM = _import_optimum()
+    os.makedirs(output_dir, exist_ok=True)
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True, use_cache=True, use_merged=False)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(output_dir)
+    saved = [os.path.join(output_dir, name) for name in ONNX_FILE_NAMES]
+
+    if quantize:
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        # 활성값은 실행 시점에 양자화하는 동적 양자화 (보정 데이터 불필요)
+        quantization_config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        for name in ONNX_FILE_NAMES:
+            quantizer = ORTQuantizer.from_pretrained(output_dir, file_name=name)
+            quantizer.quantize(save_dir=output_dir, quantization_config=quantization_config)
+        saved.extend(os.path.join(output_dir, name) for name in onnx_file_names(quantized=True))
+    return saved
+
+
+def load_onnx_model(onnx_dir, quantized=False, num_threads=0):
+    """
+    내보낸 ONNX 그래프를 onnxruntime CPU 실행 공급자로 로드
+
+    Args:
+        onnx_dir (str): export_onnx로 저장한 디렉토리
+        quantized (bool): int8 양자화 그래프 사용 여부 (기본값: False)
+        num_threads (int): 세션별 intra-op 스레드 수 (0이면 onnxruntime 기본값)
+
+    Returns:
+        tuple: (모델, 토크나이저)
+    """
+    import onnxruntime
+    from transformers import AutoTokenizer
+
+    ORTModelForSeq2SeqLM = _import_optimum()
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads > 0:
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+
+    encoder_file, decoder_file, decoder_with_past_file = onnx_file_names(quantized)
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        onnx_dir,
+        encoder_file_name=encoder_file,
+        decoder_file_name=decoder_file,
+        decoder_with_past_file_name=decoder_with_past_file,
+        use_cache=True,
+        use_merged=False,
+        provider="CPUExecutionProvider",
+        session_options=session_options
+    )
+    tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+    return model, tokenizer
+
+
+def check_parity(reference_model, onnx_model, tokenizer, texts, device, batch_size=8, max_input_length=128,
+                 max_mismatches=10):
+    """
+    torch 모델과 ONNX 모델의 n-best 예측 일치 여부 확인
+
+    샘플링 없이(do_sample=False) 같은 빔 서치 설정으로 두 모델의 n-best를 생성하여 비교합니다.
+
+    Args:
+        reference_model: torch Seq2Seq 모델
+        onnx_model: load_onnx_model로 로드한 모델
+        tokenizer: 토크나이저
+        texts (list): 비교할 입력 문장 리스트
+        device (torch.device): torch 모델이 올라간 디바이스
+        batch_size (int): 한 번에 생성할 문장 수 (기본값: 8)
+        max_input_length (int): 입력 토큰화 최대 길이 (기본값: 128)
+        max_mismatches (int): 결과에 포함할 불일치 예시 최대 개수 (기본값: 10)
+
+    Returns:
+        dict: 문장 수, n-best 전체 일치율, 첫 번째 예측 일치율, 불일치 예시
+    """
+    generation_kwargs = {"do_sample": False}
+    nbest_match = 0
+    top1_match = 0
+    mismatches = []
+
+    for i in range(0, len(texts), batch_size):
+        chunk = texts[i:i + batch_size]
+        expected = generate_predictions(reference_model, tokenizer, chunk, device,
+                                        max_input_length=max_input_length, generation_kwargs=generation_kwargs)
+        actual = generate_predictions(onnx_model, tokenizer, chunk, onnx_model.device,
+                                      max_input_length=max_input_length, generation_kwargs=generation_kwargs)
+        for text, torch_nbest, onnx_nbest in zip(chunk, expected, actual):
+            nbest_match += int(torch_nbest == onnx_nbest)
+            top1_match += int(torch_nbest[:1] == onnx_nbest[:1])
+            if torch_nbest != onnx_nbest and len(mismatches) < max_mismatches:
+                mismatches.append({"text": text, "torch": torch_nbest, "onnx": onnx_nbest})
+
+    total = max(1, len(texts))
+    return {
+        "num_texts": len(texts),
+        "nbest_match_rate": nbest_match / total,
+        "top1_match_rate": top1_match / total,
+        "mismatches": mismatches,
+    }
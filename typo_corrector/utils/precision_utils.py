@@ -0,0 +1,65 @@
+"""
+교정 모델의 CPU 추론 정밀도 설정을 위한 유틸리티 모듈
+
+- fp32: 기존과 같은 32비트 부동소수점 추론
+- int8: nn.Linear 가중치를 int8로 동적 양자화 (활성값은 실행 시점에 양자화, CPU 전용)
+- bf16: 가중치는 그대로 두고 generate를 bfloat16 autocast 안에서 실행
+"""
+
+from contextlib import nullcontext
+
+import torch
+
+PRECISION_MODES = ("fp32", "int8", "bf16")
+
+
+def check_precision(precision, device):
+    """
+    정밀도 모드가 디바이스에서 사용 가능한지 확인
+
+    Args:
+        precision (str): 정밀도 모드 ("fp32", "int8", "bf16")
+        device (torch.device): 모델이 올라간 디바이스
+
+    Raises:
+        ValueError: 지원하지 않는 모드이거나 디바이스에서 사용할 수 없는 경우
+    """
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision mode: {precision} (expected one of {', '.join(PRECISION_MODES)})")
+    if precision == "int8" and torch.device(device).type != "cpu":
+        raise ValueError("int8 dynamic quantization is only supported on CPU.")
+
+
+def apply_precision(model, precision, device):
+    """
+    정밀도 모드에 맞게 모델 변환
+
+    int8은 nn.Linear 층을 동적 양자화된 층으로 교체한 새 모델을 반환하고,
+    fp32/bf16은 모델을 그대로 반환합니다 (bf16은 precision_context에서 적용).
+
+    Args:
+        model: Seq2Seq 모델 (eval 모드, 디바이스에 올라간 상태)
+        precision (str): 정밀도 모드
+        device (torch.device): 모델이 올라간 디바이스
+
+    Returns:
+        변환된 모델
+    """
+    check_precision(precision, device)
+    if precision == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+    return model
+
+
+def precision_context(precision, device):
+    """
+    추론 구간에 적용할 정밀도 컨텍스트 반환
+
+    Example:
+        >>> with precision_context("bf16", torch.device("cpu")):
+        ...     pass
+    """
+    if precision == "bf16":
+        return torch.autocast(device_type=torch.device(device).type, dtype=torch.bfloat16)
+    return nullcontext()
@@ -0,0 +1,205 @@
+"""
+의미 기반 근사 캐시를 관리하는 모듈
+
+정확히 같은 입력만 찾는 결과 캐시와 달리, 끝 문장부호나 띄어쓰기, 자모 하나 정도만 다른 입력도
+이전 교정 결과를 재사용할 수 있도록 과거 입력의 임베딩(FastEmbeddingManager 인코더)과 최종 교정 결과를
+작은 메모리 내부 FAISS 색인에 보관합니다. 색인 크기는 제한되며 가장 오래 사용되지 않은 항목부터 제거합니다.
+항목 수가 수천 개 수준이므로 근사 색인 대신 정확한 내적 색인(IndexFlatIP)을 ID 매핑과 함께 사용합니다.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import faiss
+from Levenshtein import distance as levenshtein_distance
+
+from utils.text_utils import normalize_text, decompose_jamo, restore_punctuation
+
+# 비교에서 제외할 끝 문장부호
+_TRAILING_PUNCTUATION = ".?!。…,~\"'”’)]」』"
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def core_text(text):
+    """
+    문장부호/띄어쓰기 차이를 무시하고 비교하기 위한 핵심 문자열 (끝 문장부호와 모든 공백 제거)
+
+    Example:
+        >>> core_text("안녕 하세요 !")
+        '안녕하세요'
+    """
+    return _WHITESPACE_RE.sub("", normalize_text(text).rstrip(_TRAILING_PUNCTUATION + " "))
+
+
+class SemanticCache:
+    """
+    임베딩 근사 검색으로 비슷한 입력의 교정 결과를 재사용하는 캐시
+
+    임베딩 유사도가 similarity_threshold 이상이고, 핵심 문자열(core_text)의 자모 편집 거리가
+    max_jamo_distance 이하인 입력을 찾으면 그 교정 결과에 현재 입력의 끝 문장부호를 입혀 반환합니다.
+
+    Example:
+        >>> cache = SemanticCache(max_size=5000)
+        >>> cache.add([(text, response)], embedding_manager, fingerprint)
+        >>> cache.lookup(["반갑슴니다!"], embedding_manager, fingerprint)
+    """
+
+    def __init__(self, max_size=5000, similarity_threshold=0.95, max_jamo_distance=1, top_k=4):
+        """
+        Args:
+            max_size (int): 보관할 최대 입력 수 (기본값: 5000)
+            similarity_threshold (float): 재사용할 최소 코사인 유사도 (기본값: 0.95)
+            max_jamo_distance (int): 재사용할 최대 자모 편집 거리 (기본값: 1)
+            top_k (int): 확인할 최근접 이웃 수 (기본값: 4)
+        """
+        self.max_size = max(1, int(max_size))
+        self.similarity_threshold = similarity_threshold
+        self.max_jamo_distance = max_jamo_distance
+        self.top_k = max(1, int(top_k))
+        self.fingerprint = None
+        self._index = None
+        self._entries = OrderedDict()  # id -> (정규화 입력, 응답 본문), 오래 사용되지 않은 순
+        self._ids = {}  # 정규화 입력 -> id
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.insertions = 0
+        self.evictions = 0
+
+    def reset(self, fingerprint):
+        """모델/후보 색인 지문을 바꾸고 모든 항목 제거 (이전 버전 결과는 재사용하지 않음)"""
+        with self._lock:
+            self.fingerprint = fingerprint
+            self._index = None
+            self._entries.clear()
+            self._ids.clear()
+
+    @staticmethod
+    def _embed(texts, embedding_manager):
+        """정규화된 float32 임베딩 계산 (임베딩 관리자의 캐시를 사용하므로 후보 검색과 중복 계산하지 않음)"""
+        embeddings = np.ascontiguousarray(embedding_manager.embed_texts(list(texts)), dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+    def lookup(self, texts, embedding_manager, fingerprint):
+        """
+        입력별로 재사용할 수 있는 교정 결과 조회
+
+        Args:
+            texts (list): 입력 문장 리스트
+            embedding_manager (FastEmbeddingManager): 임베딩 관리자
+            fingerprint (str): 현재 모델/후보 색인 지문
+
+        Returns:
+            list: 입력 순서와 같은 순서의 응답 본문 또는 None 리스트
+        """
+        if not texts or fingerprint != self.fingerprint or not self._entries:
+            return [None] * len(texts)
+
+        embeddings = self._embed(texts, embedding_manager)
+        results = []
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return [None] * len(texts)
+            similarities, ids = self._index.search(embeddings, min(self.top_k, self._index.ntotal))
+            for text, row_similarities, row_ids in zip(texts, similarities, ids):
+                response = self._match(text, row_similarities, row_ids)
+                if response is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                results.append(response)
+        return results
+
+    def _match(self, text, similarities, ids):
+        """최근접 이웃 중 임계값을 만족하는 첫 항목의 교정 결과를 현재 입력에 맞게 조정"""
+        query_core = core_text(text)
+        for similarity, entry_id in zip(similarities, ids):
+            if entry_id < 0 or similarity < self.similarity_threshold:
+                break
+            entry = self._entries.get(int(entry_id))
+            if entry is None:
+                continue
+            cached_text, response = entry
+            distance = levenshtein_distance(decompose_jamo(query_core), decompose_jamo(core_text(cached_text)))
+            if distance > self.max_jamo_distance:
+                continue
+
+            self._entries.move_to_end(int(entry_id))
+            return {
+                **response,
+                "input_text": text,
+                "corrected_text": restore_punctuation(text, response["corrected_text"]),
+                "semantic_cache": {
+                    "matched_input": cached_text,
+                    "similarity": round(float(similarity), 4),
+                    "jamo_distance": distance,
+                },
+            }
+        return None
+
+    def add(self, items, embedding_manager, fingerprint):
+        """
+        모델로 교정한 입력과 응답 본문 저장
+
+        Args:
+            items (list): (입력 문장, 응답 본문) 튜플 리스트
+            embedding_manager (FastEmbeddingManager): 임베딩 관리자
+            fingerprint (str): 결과를 만든 모델/후보 색인 지문 (현재 지문과 다르면 저장하지 않음)
+        """
+        items = [(normalize_text(text), response) for text, response in items if normalize_text(text)]
+        if not items or fingerprint != self.fingerprint:
+            return
+
+        embeddings = self._embed([text for text, _ in items], embedding_manager)
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                return
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+
+            for (text, response), embedding in zip(items, embeddings):
+                # 같은 입력은 새 결과로 교체
+                if text in self._ids:
+                    self._remove([self._ids[text]])
+                entry_id = self._next_id
+                self._next_id += 1
+                self._index.add_with_ids(embedding.reshape(1, -1), np.array([entry_id], dtype=np.int64))
+                self._entries[entry_id] = (text, response)
+                self._ids[text] = entry_id
+                self.insertions += 1
+
+            # 색인에서 제거할 때마다 벡터 배열이 다시 복사되므로, 넘치면 한 번에 max_size의 90%까지 비움
+            if len(self._entries) > self.max_size:
+                excess = len(self._entries) - int(self.max_size * 0.9)
+                evicted = [entry_id for entry_id, _ in zip(self._entries, range(excess))]
+                self._remove(evicted)
+                self.evictions += len(evicted)
+
+    def _remove(self, entry_ids):
+        """항목들을 색인과 목록에서 제거"""
+        for entry_id in entry_ids:
+            text, _ = self._entries.pop(entry_id)
+            del self._ids[text]
+        self._index.remove_ids(np.array(entry_ids, dtype=np.int64))
+
+    def stats(self):
+        """
+        캐시 통계 반환
+
+        Returns:
+            dict: 항목 수, 최대 크기, 적중/실패/저장/제거 횟수
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "insertions": self.insertions,
+            "evictions": self.evictions,
+        }
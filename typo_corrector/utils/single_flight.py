@@ -0,0 +1,100 @@
+"""
+같은 입력의 동시 요청을 하나의 계산으로 합치기 위한 모듈 (single-flight)
+
+같은 키의 계산이 이미 진행 중이면 새 요청은 그 계산에 합류하여 결과를 공유합니다.
+캐시는 계산이 끝난 뒤에야 채워지므로, 같은 문장이 동시에 몰리는 순간의 중복 generate 호출을 막습니다.
+계산의 마감 시각은 합류한 요청들 중 가장 늦은 마감 시각을 따르며,
+결과를 기다리는 요청이 모두 떠나면(시간 초과, 연결 종료) 계산을 취소합니다.
+"""
+
+import asyncio
+
+from utils.deadline import Deadline, LatestDeadline
+
+
+class _Flight:
+    """진행 중인 계산 하나 (작업, 마감 시각, 대기 중인 요청 수)"""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.task = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    키별 진행 중 계산 공유기 (이벤트 루프 안에서만 사용)
+
+    Example:
+        >>> flights = SingleFlight()
+        >>> result, shared = await flights.do(key, lambda deadline: batcher.submit(text, deadline), deadline)
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+        # 통계
+        self.leader_requests = 0
+        self.coalesced_requests = 0
+        self.abandoned_flights = 0
+
+    async def do(self, key, fn, deadline=None):
+        """
+        키의 계산이 진행 중이면 합류하고, 없으면 새로 시작하여 결과 대기
+
+        Args:
+            key (Hashable): 계산 키 (같은 키의 요청은 같은 결과를 받음)
+            fn (callable): 계산 마감 시각(Deadline)을 받아 결과를 반환하는 코루틴 함수
+            deadline (Deadline): 요청 마감 시각 (기본값: None, 시간 제한 없음)
+
+        Returns:
+            tuple: (결과, 다른 요청의 계산에 합류했는지 여부)
+        """
+        deadline = deadline or Deadline()
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            flight.deadline.add(deadline)
+            self.coalesced_requests += 1
+        else:
+            flight = _Flight(LatestDeadline([deadline]))
+            flight.task = asyncio.ensure_future(fn(flight.deadline))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+            self._flights[key] = flight
+            self.leader_requests += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            # 결과를 기다리는 요청이 모두 떠나면 계산 취소
+            if flight.waiters == 0 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.abandoned_flights += 1
+
+    def _finish(self, key, flight, task):
+        """계산이 끝나면 진행 중 목록에서 제거 (아무도 받지 않은 예외도 여기서 소비)"""
+        self._forget(key, flight)
+        if not task.cancelled():
+            task.exception()
+
+    def _forget(self, key, flight):
+        """키에 같은 계산이 등록되어 있으면 제거 (이후 요청은 새 계산을 시작)"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self):
+        """
+        합류 통계 반환
+
+        Returns:
+            dict: 진행 중인 계산 수, 계산을 시작한 요청 수, 합류한 요청 수, 취소된 계산 수
+        """
+        return {
+            "inflight": len(self._flights),
+            "leader_requests": self.leader_requests,
+            "coalesced_requests": self.coalesced_requests,
+            "abandoned_flights": self.abandoned_flights,
+        }
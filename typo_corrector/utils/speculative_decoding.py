@@ -0,0 +1,203 @@
+"""
+입력 복사 기반 추측 디코딩(prompt-lookup speculative decoding)을 위한 모듈
+
+오타 교정 결과는 입력과 거의 같으므로, 지금까지 생성한 마지막 n-gram과 정렬되는 입력(소스) 토큰 뒤의
+토큰들을 초안(draft)으로 제안하고, 디코더 forward 한 번으로 초안 전체를 검증합니다.
+검증은 generate의 greedy 디코딩과 같은 logits processor를 위치마다 적용한 argmax와 비교하므로,
+수락된 토큰은 일반 greedy 디코딩 결과와 같습니다. 길이 제한도 배치 generate와 같은 행별 규칙
+(utils/length_control.py)을 사용합니다. greedy 전용이며 빔 서치와 샘플링은 지원하지 않습니다.
+"""
+
+import copy
+
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+from transformers.generation.logits_process import (
+    LogitsProcessorList,
+    RepetitionPenaltyLogitsProcessor,
+    NoRepeatNGramLogitsProcessor,
+    ForcedBOSTokenLogitsProcessor,
+)
+
+from utils.deadline import DeadlineExceededError
+from utils.length_control import RowLengthLogitsProcessor, forced_eos_token
+
+
+def supports_speculative(model, generation_kwargs):
+    """
+    추측 디코딩을 사용할 수 있는 모델/생성 설정인지 확인 (torch 인코더-디코더 모델의 greedy 디코딩)
+
+    Args:
+        model: Seq2Seq 모델
+        generation_kwargs (dict): 생성 파라미터
+
+    Returns:
+        bool: 사용 가능 여부
+    """
+    return (isinstance(model, torch.nn.Module) and hasattr(model, "get_encoder") and
+            generation_kwargs.get("num_beams", 1) == 1 and not generation_kwargs.get("do_sample", False) and
+            generation_kwargs.get("num_return_sequences", 1) == 1)
+
+
+def build_logits_processor(generation_config, max_length, min_length):
+    """
+    generate의 greedy 디코딩과 같은 logits processor 구성
+
+    최소 길이와 종료 토큰 강제는 배치 generate(utils/generation_utils.py)와 같은 RowLengthLogitsProcessor로 적용하므로,
+    최대 길이에 도달한 문장의 마지막 토큰도 배치 크기와 관계없이 같습니다 (forced_eos_token_id가 있을 때만 강제).
+    """
+    eos_token_id = generation_config.eos_token_id
+    if isinstance(eos_token_id, (list, tuple)):
+        eos_token_id = eos_token_id[0]
+    processors = LogitsProcessorList()
+    if generation_config.repetition_penalty is not None and generation_config.repetition_penalty != 1.0:
+        processors.append(RepetitionPenaltyLogitsProcessor(penalty=generation_config.repetition_penalty))
+    if generation_config.no_repeat_ngram_size:
+        processors.append(NoRepeatNGramLogitsProcessor(generation_config.no_repeat_ngram_size))
+    if generation_config.forced_bos_token_id is not None:
+        processors.append(ForcedBOSTokenLogitsProcessor(generation_config.forced_bos_token_id))
+    if eos_token_id is not None:
+        processors.append(RowLengthLogitsProcessor([min_length or 0], [max_length], eos_token_id,
+                                                   forced_eos_token(generation_config)))
+    return processors
+
+
+def propose_draft(sequence, source, num_tokens, max_ngram=3):
+    """
+    생성 중인 시퀀스의 마지막 n-gram과 정렬되는 소스 위치 뒤의 토큰을 초안으로 제안
+
+    가장 긴 n-gram부터 찾으며, 일치 위치가 여러 개면 현재 생성 위치와 가장 가까운 곳을 사용합니다.
+    일치하는 n-gram이 없으면 같은 위치의 소스 토큰을 제안합니다.
+
+    Args:
+        sequence (list): 지금까지 생성한 디코더 토큰 리스트
+        source (list): 입력(소스) 토큰 리스트 (패딩 제외)
+        num_tokens (int): 제안할 최대 토큰 수
+        max_ngram (int): 일치를 찾을 최대 n-gram 크기 (기본값: 3)
+
+    Returns:
+        list: 초안 토큰 리스트
+    """
+    if num_tokens <= 0:
+        return []
+    position = len(sequence)
+    for n in range(min(max_ngram, len(sequence)), 0, -1):
+        pattern = sequence[-n:]
+        best = None
+        for i in range(len(source) - n):
+            if source[i:i + n] == pattern and (best is None or abs(i + n - position) < abs(best - position)):
+                best = i + n
+        if best is not None:
+            return source[best:best + num_tokens]
+    return source[max(0, position - 1):max(0, position - 1) + num_tokens]
+
+
+def _crop_past(past_key_values, length):
+    """디코더 self-attention KV 캐시를 length 위치까지 자름 (cross-attention 캐시는 유지)"""
+    if hasattr(past_key_values, "crop"):
+        past_key_values.crop(length)
+        return past_key_values
+    return tuple(
+        (layer[0][:, :, :length], layer[1][:, :, :length]) + tuple(layer[2:])
+        for layer in past_key_values
+    )
+
+
+@torch.no_grad()
+def speculative_generate(model, input_ids, attention_mask, max_length, min_length=0, generation_kwargs=None,
+                         num_draft_tokens=8, deadline=None, stats=None):
+    """
+    입력 복사 초안으로 greedy 디코딩
+
+    인코더는 배치 전체에 한 번 실행하고, 디코딩은 문장별로 초안 제안 → 디코더 forward 한 번으로 검증 →
+    일치하는 앞부분 수락 + 첫 불일치 위치의 greedy 토큰 추가를 반복합니다.
+
+    Args:
+        model: torch Seq2Seq 모델
+        input_ids (torch.Tensor): 입력 토큰 (batch, seq)
+        attention_mask (torch.Tensor): 입력 마스크 (batch, seq)
+        max_length (int | list): 디코더 시퀀스 최대 길이 (디코더 시작 토큰 포함, 리스트면 문장별 값)
+        min_length (int | list): 디코더 시퀀스 최소 길이 (기본값: 0, 리스트면 문장별 값)
+        generation_kwargs (dict): 생성 파라미터 (repetition_penalty, no_repeat_ngram_size 등)
+        num_draft_tokens (int): 한 번에 검증할 최대 초안 토큰 수 (기본값: 8)
+        deadline (Deadline): 마감 시각 (기본값: None)
+        stats (dict): 디코더 forward 횟수, 생성/수락 토큰 수를 누적할 딕셔너리 (기본값: None)
+
+    Returns:
+        list: 문장별 생성 토큰 리스트 (디코더 시작 토큰 포함, 종료 토큰에서 끝남)
+    """
+    generation_config = copy.deepcopy(model.generation_config)
+    known = {key: value for key, value in (generation_kwargs or {}).items() if hasattr(generation_config, key)}
+    generation_config.update(**known)
+    num_rows = input_ids.shape[0]
+    max_lengths = list(max_length) if isinstance(max_length, (list, tuple)) else [max_length] * num_rows
+    min_lengths = list(min_length) if isinstance(min_length, (list, tuple)) else [min_length] * num_rows
+    eos_token_id = generation_config.eos_token_id
+    start_token_id = generation_config.decoder_start_token_id
+    if start_token_id is None:
+        start_token_id = model.config.decoder_start_token_id
+
+    stats = stats if stats is not None else {}
+    for key in ("forward_passes", "generated_tokens", "accepted_draft_tokens"):
+        stats.setdefault(key, 0)
+
+    encoder_hidden = model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+    results = []
+    for row in range(num_rows):
+        max_length = max_lengths[row]
+        processors = build_logits_processor(generation_config, max_length, min_lengths[row])
+        mask = attention_mask[row:row + 1]
+        encoder_outputs = BaseModelOutput(last_hidden_state=encoder_hidden[row:row + 1])
+        source = input_ids[row][attention_mask[row].bool()].tolist()
+
+        sequence = [start_token_id]
+        past_key_values = None
+        while len(sequence) < max_length:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceededError("Request deadline passed during generation.")
+
+            # 남은 길이 안에서 초안 제안 (검증 후 토큰이 하나 더 추가되므로 1개 여유)
+            draft = propose_draft(sequence, source, min(num_draft_tokens, max_length - len(sequence) - 1))
+            outputs = model(
+                encoder_outputs=encoder_outputs,
+                attention_mask=mask,
+                decoder_input_ids=torch.tensor([sequence[-1:] + draft], device=input_ids.device),
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+            stats["forward_passes"] += 1
+            logits = outputs.logits[0].float()
+
+            # 위치마다 greedy 토큰을 구해 초안과 비교
+            accepted = 0
+            next_token = None
+            for j in range(len(draft) + 1):
+                prefix = torch.tensor([sequence + draft[:j]], device=input_ids.device)
+                scores = processors(prefix, logits[j:j + 1].clone())
+                next_token = int(scores.argmax(dim=-1))
+                if j == len(draft) or next_token != draft[j]:
+                    break
+                accepted += 1
+                if draft[j] == eos_token_id:
+                    next_token = None
+                    break
+
+            sequence.extend(draft[:accepted])
+            if next_token is not None:
+                sequence.append(next_token)
+            stats["accepted_draft_tokens"] += accepted
+            if sequence[-1] == eos_token_id:
+                break
+            past_key_values = _crop_past(outputs.past_key_values, len(sequence) - 1)
+
+        sequence = sequence[:max_length]
+        stats["generated_tokens"] += len(sequence) - 1
+        results.append(sequence)
+    return results
+
+
+def pad_sequences(sequences, pad_token_id, device=None):
+    """토큰 리스트들을 pad_token_id로 오른쪽 패딩한 텐서로 변환"""
+    width = max(len(sequence) for sequence in sequences)
+    return torch.tensor([sequence + [pad_token_id] * (width - len(sequence)) for sequence in sequences],
+                        device=device)
@@ -0,0 +1,153 @@
+"""
+서빙 단계에서 사용하는 텍스트 정규화 유틸리티 모듈
+
+캐시 키, 후보 색인 등에서 같은 문장을 같은 키로 다루기 위한 정규화 함수와
+긴 문서를 문장 단위로 나누고 다시 이어 붙이는 함수를 제공합니다.
+"""
+
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_SENTENCE_END_CHARS = ".?!。…"
+_CLOSING_CHARS = "\"'”’)]」』"
+
+
+def normalize_text(text):
+    """
+    문장을 비교/색인용 키로 정규화
+
+    유니코드 NFC 정규화 후 앞뒤 공백을 제거하고, 연속된 공백을 하나로 합칩니다.
+
+    Args:
+        text (str): 입력 문장
+
+    Returns:
+        str: 정규화된 문장
+
+    Example:
+        >>> normalize_text("  안녕   하세요 ")
+        '안녕 하세요'
+    """
+    if text is None:
+        return ""
+    text = unicodedata.normalize("NFC", str(text))
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+# 한글 호환 자모 (초성 19자, 중성 21자, 종성 27자 + 없음)
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ", "ㅁ",
+              "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+
+def decompose_jamo(text):
+    """
+    완성형 한글 음절을 호환 자모 문자열로 분해
+
+    외부 라이브러리 없이 유니코드 산술로 분해하며, 한글 음절이 아닌 문자는 그대로 둡니다.
+    완성형으로 입력한 문장과 자모를 풀어 쓴 문장을 같은 키로 비교할 때 사용합니다.
+
+    Args:
+        text (str): 입력 문장
+
+    Returns:
+        str: 자모 단위로 분해된 문장
+
+    Example:
+        >>> decompose_jamo("한글")
+        'ㅎㅏㄴㄱㅡㄹ'
+    """
+    result = []
+    for char in text:
+        code = ord(char) - 0xAC00
+        if 0 <= code <= 11171:
+            result.append(_CHOSEONG[code // 588])
+            result.append(_JUNGSEONG[(code % 588) // 28])
+            result.append(_JONGSEONG[code % 28])
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+def normalize_jamo(text):
+    """
+    문장을 자모 단위 비교용 키로 정규화
+
+    Args:
+        text (str): 입력 문장
+
+    Returns:
+        str: normalize_text 후 자모로 분해한 문장
+    """
+    return decompose_jamo(normalize_text(text))
+
+
+def split_sentences(text):
+    """
+    문서를 문장 단위로 분리
+
+    문장 끝 문장부호(. ? ! 。 …, 뒤따르는 닫는 따옴표/괄호 포함) 뒤의 공백이나 줄바꿈을 경계로 나눕니다.
+    각 문장 뒤의 공백을 함께 보관하므로 join_sentences로 원문을 그대로 복원할 수 있습니다.
+
+    Args:
+        text (str): 입력 문서
+
+    Returns:
+        list: (문장, 뒤따르는 공백) 튜플 리스트 (문서가 공백으로 시작하면 첫 항목의 문장은 빈 문자열)
+
+    Example:
+        >>> split_sentences("안녕하세요. 반갑습니다!\\n네")
+        [('안녕하세요.', ' '), ('반갑습니다!', '\\n'), ('네', '')]
+    """
+    segments = []
+    start = 0
+    for match in _WHITESPACE_RE.finditer(text):
+        if match.start() == 0:
+            segments.append(("", match.group()))
+            start = match.end()
+            continue
+
+        body = text[start:match.start()]
+        last_char = body.rstrip(_CLOSING_CHARS)[-1:]
+        if ("\n" in match.group() or match.end() == len(text) or
+                (last_char and last_char in _SENTENCE_END_CHARS)):
+            segments.append((body, match.group()))
+            start = match.end()
+
+    if start < len(text):
+        segments.append((text[start:], ""))
+    return segments
+
+
+def join_sentences(segments):
+    """
+    split_sentences 결과(문장, 공백) 리스트를 다시 하나의 문서로 결합
+
+    Args:
+        segments (list): (문장, 뒤따르는 공백) 튜플 리스트
+
+    Returns:
+        str: 결합된 문서
+    """
+    return "".join(body + separator for body, separator in segments)
+
+
+def restore_punctuation(original, corrected):
+    """
+    교정된 문장의 끝 문장부호를 원문의 끝 문장부호로 복원
+
+    Args:
+        original (str): 원문 문장
+        corrected (str): 교정된 문장
+
+    Returns:
+        str: 끝 문장부호가 원문과 같은 교정 문장
+    """
+    punctuation = _SENTENCE_END_CHARS + _CLOSING_CHARS
+    original_tail = original[len(original.rstrip(punctuation)):]
+    body = corrected.rstrip(punctuation)
+    if not body:
+        return corrected
+    return body + original_tail